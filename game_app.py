@@ -1,23 +1,45 @@
+import argparse
 import pygame
 import sys
 import game_logic
+import game_bitboard
 from game_state import GameState
 from game_renderer import gameRenderer
-from game_solver import BFSSolver, DFSSolver, UCSSolver, AStarSolver
+from game_background import SolverRace
+from game_cache import SolutionCache
+from game_replan import ReplanningSolver
+from game_cli import SOLVERS
+from game_levels import load_level
+from game_replay import write_replays
+
+# key -> solver (game_cli name); pressing several keys races them
+SOLVER_KEYS = {
+    pygame.K_b: 'bfs',
+    pygame.K_d: 'dfs',
+    pygame.K_u: 'ucs',
+    pygame.K_a: 'astar',
+    pygame.K_g: 'greedy',
+}
+# seconds a hint may take on the UI thread before it goes to the background
+HINT_BUDGET = 0.03
 
 class PygameApp:
-    def __init__(self, level_file, tile_size=40):
+    def __init__(self, level_file, tile_size=40, replay_file=None):
         self.level_file = level_file
         self.tile_size = tile_size
+        # whole-level solutions are appended here as replays (see game_replay); None: not kept
+        self.replay_file = replay_file
         
-        initial_state = game_logic.parse_level_file(level_file)
+        # states are immutable, so restarting just goes back to this one
+        self.initial_state = initial_state = load_level(level_file)
         board_rows = len(initial_state.board)
         board_cols = len(initial_state.board[0])
         
         self.renderer = gameRenderer(
             width=board_cols * tile_size,
             height=board_rows * tile_size + 60,
-            tile_size=tile_size
+            tile_size=tile_size,
+            dirty_rects=True
         )
         
         self.current_state = initial_state
@@ -29,6 +51,16 @@ class PygameApp:
         self.solver_index = 0
 
         self.current_solver_moves = []
+        self.race = SolverRace(engine_name='bitboard')
+        self.race_state = None
+        self.cache = SolutionCache('solutions.sqlite')
+        # H: hint from the current state; keeps its search between hints, so
+        # after the first one they take milliseconds. A hint that needs more
+        # than a frame is solved by A* in the background instead.
+        self.replanner = ReplanningSolver(engine=game_bitboard, level_state=initial_state,
+                                          time_limit=HINT_BUDGET)
+        self.hint_race = SolverRace(engine_name='bitboard')
+        self.hint_state = None
 
         self.clock = pygame.time.Clock()
         self.running = True
@@ -37,20 +69,23 @@ class PygameApp:
         self.last_move_time = 0
         self.path_coords = set()
 
-    def calculate_path_coordinates(self):
+    def calculate_path_coordinates(self, path=None):
         self.path_coords.clear()
                 
         simulated_state = self.current_state 
         self.path_coords.add(simulated_state.player_pos)
         
-        if self.solver_path:
-            for action in self.solver_path:                
+        path = self.solver_path if path is None else path
+        if path:
+            for action in path:                
                 simulated_state = game_logic.apply_transition(simulated_state, action)
                 self.path_coords.add(simulated_state.player_pos)
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                self.race.cancel()
+                self.hint_race.cancel()
                 self.running = False
                 return
 
@@ -61,35 +96,28 @@ class PygameApp:
 
             if event.type == pygame.KEYDOWN:
                 action = None                
-                if event.key == pygame.K_b:
-                    print("Running BFS Solver : ")                                        
-                    solver = BFSSolver()
-                    results = solver.solve(self.current_state)
-                    self.process_solver_results(results)
-
-                elif event.key == pygame.K_d:
-                    print("Running DFS Solver : ")
-                    solver = DFSSolver()
-                    results = solver.solve(self.current_state)
-                    self.process_solver_results(results)
-                        
-                elif event.key == pygame.K_u:
-                    print("Running UCS Solver : ")
-                    solver = UCSSolver()
-                    results = solver.solve(self.current_state)
-                    self.process_solver_results(results)
-
-                elif event.key == pygame.K_a:
-                    print("Running A* Solver : ")
-                    solver = AStarSolver()
-                    results = solver.solve(self.current_state)
-                    self.process_solver_results(results)
-
-                elif event.key == pygame.K_m: self.undo_move()
-                elif event.key == pygame.K_r: self.restart_game()
-                elif event.key == pygame.K_q: self.running = False
+                if event.key in SOLVER_KEYS:
+                    self.start_solver(SOLVER_KEYS[event.key])
+
+                elif event.key == pygame.K_h:
+                    self.show_hint()
+
+                elif event.key in (pygame.K_c, pygame.K_ESCAPE):
+                    if self.race.running:
+                        print("Solver cancelled")
+                    self.race.cancel()
+
+                elif event.key == pygame.K_m:
+                    self.race.cancel()
+                    self.undo_move()
+                elif event.key == pygame.K_r:
+                    self.race.cancel()
+                    self.restart_game()
+                elif event.key == pygame.K_q:
+                    self.race.cancel()
+                    self.running = False
                                 
-                elif self.solver_path is None:
+                elif self.solver_path is None and not self.race.running:
                     if event.key == pygame.K_UP: action = 'w' 
                     elif event.key == pygame.K_DOWN: action = 's'
                     elif event.key == pygame.K_LEFT: action = 'a'
@@ -103,6 +131,66 @@ class PygameApp:
                     if game_logic.is_terminal(self.current_state):
                         self.game_over = True
 
+    def start_solver(self, solver_name):
+        # The search runs in the background from the current state; a solver
+        # path being played back stops so that state stays put
+        cached = self.cache.get(SOLVERS[solver_name].name, self.current_state)
+        if cached is not None:
+            self.race.cancel()
+            self.process_solver_results(cached)
+            return
+        if not self.race.running:
+            self.solver_path = None
+            self.path_coords.clear()
+            self.race_state = self.current_state
+        if self.race.start(solver_name, self.current_state):
+            print(f"Running {solver_name} solver in the background (C to cancel)")
+
+    def show_hint(self):
+        # Draws the way to the goal without playing it
+        results = self.replanner.solve(self.current_state)
+        if results.get("path") is None and results.get("budget_exhausted"):
+            self.hint_race.cancel()
+            self.hint_state = self.current_state
+            self.hint_race.start('astar', self.current_state)
+            print("Hint: searching in the background")
+            return
+        self.draw_hint(results)
+
+    def draw_hint(self, results):
+        path = results.get("path")
+        if path:
+            print(f"Hint: {path[0].upper()} ({len(path)} moves to go, {results.get('replan', 'search')}, "
+                  f"{results['execution_time'] * 1000:.0f} ms)")
+            self.calculate_path_coordinates(path)
+        elif path is None:
+            reason = "out of time" if results.get("budget_exhausted") else "no way to the goal from here"
+            print(f"Hint: {reason}")
+            self.path_coords.clear()
+
+    def poll_hint(self):
+        results = self.hint_race.poll()
+        if results is None:
+            return
+        if results.get("path"):
+            self.replanner.add_solution(self.hint_state, results["path"])
+        # only drawn if the player is still where the hint was asked
+        if self.hint_state == self.current_state:
+            self.draw_hint(results)
+
+    def solver_status(self):
+        if not self.race.running:
+            return None
+        parts = []
+        for name in self.race.solver_names():
+            snapshot = self.race.progress.get(name)
+            if snapshot is None:
+                parts.append(f"{name}: starting")
+            else:
+                parts.append(f"{name}: {snapshot['expanded']} exp {snapshot['nodes_per_sec']:.0f}/s "
+                             f"{snapshot['elapsed']:.0f}s")
+        return "Solving... " + " | ".join(parts) + " (C: cancel)"
+
     def save_state(self):
         self.history.append(self.current_state)
         self.move_history.append(self.move_count)
@@ -113,7 +201,7 @@ class PygameApp:
             self.move_count = self.move_history.pop()
 
     def restart_game(self):
-        self.current_state = game_logic.parse_level_file(self.level_file)
+        self.current_state = self.initial_state
         self.move_count = 0
         self.history.clear()
         self.move_history.clear()
@@ -128,6 +216,10 @@ class PygameApp:
             self.current_solver_moves.clear()
 
         solver_name = results.get("solver_name", "Solver")
+        if results.get("cached"):
+            print(f"{solver_name}: found in the solution cache ({results['cache_offset']} moves into a stored path)")
+        if "error" in results:
+            print(f"{solver_name} failed:\n{results['error']}")
         
         print("\n" + "="*70)
         print(f"Performance analysis results for{solver_name} ")
@@ -135,6 +227,7 @@ class PygameApp:
                
         print(f"Implementation period : {results.get('execution_time', 0.0):.4f} seconds")
         print(f"Number of births : {results.get('generated_states_count', 0)}")
+        print(f"Dead states pruned : {results.get('pruned_states_count', 0)} {results.get('pruned_by_check', {})}")
         print(f"Number of cases detected (Processed) : {results.get('discovered_states_count', 0)}")
         
         if self.solver_path is not None:
@@ -154,6 +247,17 @@ class PygameApp:
 
         while self.running:
             self.handle_events()
+            self.poll_hint()
+
+            results = self.race.poll()
+            if results is not None:
+                self.cache.put(results.get("solver_name"), self.race_state, results)
+                if self.replay_file and results.get("path") and self.race_state == self.initial_state:
+                    write_replays(self.replay_file, [(self.level_file, results["path"])], append=True)
+                if results.get("path") and results.get("solver_name") in ("BFS", "A*"):
+                    # shortest paths, so hints that run into them stay shortest
+                    self.replanner.add_solution(self.race_state, results["path"])
+                self.process_solver_results(results)
 
             if self.solver_path and not self.game_over:
                 current_time = pygame.time.get_ticks()
@@ -185,13 +289,21 @@ class PygameApp:
                 self.renderer.show_end_screen(self.current_state, self.move_count, won)
             else:
 
-                self.renderer.render(self.current_state, self.move_count, available_moves, self.path_coords, self.current_solver_moves)
+                self.renderer.render(self.current_state, self.move_count, available_moves, self.path_coords, self.current_solver_moves,
+                                     status=self.solver_status())
             
             self.clock.tick(30)
 
+        self.hint_race.cancel()
+        self.cache.close()
         pygame.quit()
         sys.exit()
  
 if __name__ == "__main__":
-    app = PygameApp('level12.txt')
+    parser = argparse.ArgumentParser(description="Play a level.")
+    parser.add_argument('level', nargs='?', default='level12.txt')
+    parser.add_argument('--record', default=None, metavar='FILE',
+                        help="append solutions of the whole level to this replay file")
+    args = parser.parse_args()
+    app = PygameApp(args.level, replay_file=args.record)
     app.run()
\ No newline at end of file
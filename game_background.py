@@ -0,0 +1,98 @@
+import multiprocessing
+import traceback
+from game_cli import make_solver
+from game_instrument import Instrumentation
+
+# Solvers running in worker processes, so the caller (the pygame loop) never
+# blocks on a search. Every start() launches one more solver on the same
+# state; they race, and poll() hands back the first solution to arrive and
+# stops the rest. Each worker talks over its own pipe, so cancelling one is
+# just terminating it and closing its end.
+
+
+def _run(conn, solver_name, engine_name, state, interval):
+    def progress(snapshot):
+        conn.send(('progress', snapshot))
+    try:
+        solver = make_solver(solver_name, engine_name,
+                             Instrumentation(progress=progress, interval=interval))
+        conn.send(('done', solver.solve(state)))
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+    conn.close()
+
+
+class SolverRace:
+    def __init__(self, engine_name='bitboard', progress_interval=0.25):
+        self.engine_name = engine_name
+        self.progress_interval = progress_interval
+        self.runs = {}          # connection -> (solver name, process)
+        self.progress = {}      # solver name -> latest progress snapshot
+        self.failed = []        # results of solvers that finished without a path
+
+    @property
+    def running(self):
+        return bool(self.runs)
+
+    def solver_names(self):
+        return [name for name, _ in self.runs.values()]
+
+    def start(self, solver_name, state):
+        # solver_name as in game_cli (bfs, dfs, ucs, astar, greedy ...);
+        # False if that solver is already in the race
+        if solver_name in self.solver_names():
+            return False
+        recv_end, send_end = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_run, daemon=True,
+            args=(send_end, solver_name, self.engine_name, state, self.progress_interval))
+        process.start()
+        send_end.close()
+        self.runs[recv_end] = (solver_name, process)
+        self.progress[solver_name] = None
+        return True
+
+    def poll(self):
+        # Never blocks. Returns the results of the first solver to find a path
+        # (the others are cancelled), or once every solver has given up the
+        # results of the last one; otherwise None.
+        for conn in list(self.runs):
+            solver_name, process = self.runs[conn]
+            try:
+                while conn.poll():
+                    kind, payload = conn.recv()
+                    if kind == 'progress':
+                        self.progress[solver_name] = payload
+                        continue
+                    if kind == 'error':
+                        payload = {"path": None, "solver_name": solver_name, "error": payload}
+                    self._finish(conn)
+                    if payload.get("path") is not None:
+                        self.cancel()
+                        return payload
+                    self.failed.append(payload)
+                    break
+            except EOFError:
+                self._finish(conn)
+                self.failed.append({"path": None, "solver_name": solver_name,
+                                    "error": f"worker exited with code {process.exitcode}"})
+
+        if self.failed and not self.runs:
+            results = self.failed[-1]
+            self.failed = []
+            return results
+        return None
+
+    def cancel(self):
+        for conn in list(self.runs):
+            _, process = self.runs[conn]
+            process.terminate()
+            self._finish(conn)
+        self.progress.clear()
+        self.failed = []
+
+    def _finish(self, conn):
+        solver_name, process = self.runs.pop(conn)
+        conn.close()
+        process.join(timeout=1)
+        self.progress.pop(solver_name, None)
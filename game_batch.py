@@ -0,0 +1,263 @@
+import time
+from collections import Counter
+from typing import List, Sequence, Tuple
+import numpy as np
+import game_bitboard
+from game_state import GameState
+from game_logic import (WALL, GOAL, LAVA, WATER, ICE, EMPTY, BLOCK, MESH, COIN,
+                        MESH_LAVA, MESH_WATER)
+from game_solver import Solver
+
+# Batched engine: N states are stacked into one uint8 array (N x rows x cols)
+# plus the player row/column arrays, and a whole batch is expanded with array
+# shifts and masks. Needs numpy; game_logic / game_bitboard do not.
+
+CODE_EMPTY, CODE_WALL, CODE_GOAL, CODE_LAVA, CODE_WATER, CODE_ICE = 0, 1, 2, 3, 4, 5
+CODE_BLOCK, CODE_MESH, CODE_COIN, CODE_MESH_LAVA, CODE_MESH_WATER = 6, 7, 8, 9, 10
+# a numbered cell with n turns left is stored as COUNTER_BASE + n
+COUNTER_BASE = 15
+MAX_COUNTER = 255 - COUNTER_BASE
+
+CELL_CODES = {EMPTY: CODE_EMPTY, WALL: CODE_WALL, GOAL: CODE_GOAL, LAVA: CODE_LAVA,
+              WATER: CODE_WATER, ICE: CODE_ICE, BLOCK: CODE_BLOCK, MESH: CODE_MESH,
+              COIN: CODE_COIN, MESH_LAVA: CODE_MESH_LAVA, MESH_WATER: CODE_MESH_WATER}
+CODE_CELLS = {code: cell for cell, code in CELL_CODES.items()}
+
+# same order as game_logic.get_available_transitions
+DIRECTIONS = (('w', (-1, 0)), ('s', (1, 0)), ('a', (0, -1)), ('d', (0, 1)))
+
+_NOT_WALKABLE = np.array([CODE_WALL, CODE_BLOCK, CODE_MESH], dtype=np.uint8)
+_ICE_PUSH_ALLOWED = np.array([CODE_EMPTY, CODE_WATER, CODE_LAVA, CODE_COIN], dtype=np.uint8)
+
+
+def encode_states(states: Sequence[GameState]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, cols = len(states[0].board), len(states[0].board[0])
+    boards = np.empty((len(states), rows, cols), dtype=np.uint8)
+    for i, state in enumerate(states):
+        for r, row in enumerate(state.board):
+            for c, cell in enumerate(row):
+                if cell in CELL_CODES:
+                    boards[i, r, c] = CELL_CODES[cell]
+                elif cell.isdigit() and int(cell) <= MAX_COUNTER:
+                    boards[i, r, c] = COUNTER_BASE + int(cell)
+                else:
+                    raise ValueError(f"Cannot encode cell '{cell}' at {(r, c)}")
+    prow = np.array([state.player_pos[0] for state in states], dtype=np.int64)
+    pcol = np.array([state.player_pos[1] for state in states], dtype=np.int64)
+    return boards, prow, pcol
+
+
+def decode_state(board: np.ndarray, prow: int, pcol: int) -> GameState:
+    cells = tuple(
+        tuple(CODE_CELLS[code] if code < COUNTER_BASE else str(code - COUNTER_BASE)
+              for code in row.tolist())
+        for row in board)
+    return GameState(board=cells, player_pos=(int(prow), int(pcol)))
+
+
+def _neighbours(mask: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(mask)
+    out[:, 1:, :] |= mask[:, :-1, :]
+    out[:, :-1, :] |= mask[:, 1:, :]
+    out[:, :, 1:] |= mask[:, :, :-1]
+    out[:, :, :-1] |= mask[:, :, 1:]
+    return out
+
+
+def _in_bounds(r: np.ndarray, c: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    return (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+
+
+def available_moves(boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray) -> np.ndarray:
+    # (N x 4) bool, column d is DIRECTIONS[d]; same rules as get_available_transitions
+    n, rows, cols = boards.shape
+    ar = np.arange(n)
+    legal = np.zeros((n, len(DIRECTIONS)), dtype=bool)
+    for d, (_, (dr, dc)) in enumerate(DIRECTIONS):
+        tr, tc = prow + dr, pcol + dc
+        ok = _in_bounds(tr, tc, rows, cols)
+        target = boards[ar, np.clip(tr, 0, rows - 1), np.clip(tc, 0, cols - 1)]
+        ok &= ~np.isin(target, _NOT_WALKABLE) & (target < COUNTER_BASE)
+
+        ir, ic = tr + dr, tc + dc
+        dest = boards[ar, np.clip(ir, 0, rows - 1), np.clip(ic, 0, cols - 1)]
+        can_push = _in_bounds(ir, ic, rows, cols) & np.isin(dest, _ICE_PUSH_ALLOWED)
+        ok &= (target != CODE_ICE) | can_push
+        legal[:, d] = ok
+    return legal
+
+
+def apply_direction(boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray, d: int):
+    # Moves every player in the batch one step in DIRECTIONS[d]; all moves must be legal
+    dr, dc = DIRECTIONS[d][1]
+    boards = boards.copy()
+    n, rows, cols = boards.shape
+    ar = np.arange(n)
+    nr, nc = prow + dr, pcol + dc
+    target = boards[ar, nr, nc]
+
+    # Ice pushing: the pushed ice covers whatever was at its destination
+    push = np.nonzero(target == CODE_ICE)[0]
+    boards[push, nr[push] + dr, nc[push] + dc] = CODE_ICE
+    boards[push, nr[push], nc[push]] = CODE_EMPTY
+
+    coin = np.nonzero(target == CODE_COIN)[0]
+    boards[coin, nr[coin], nc[coin]] = CODE_EMPTY
+
+    # Update numbered squares
+    counting = boards > COUNTER_BASE
+    boards[counting] -= 1
+    boards[boards == COUNTER_BASE] = CODE_EMPTY
+
+    # Spread Lava and Water, all sources act on the board as it was before spreading
+    lava, water = boards == CODE_LAVA, boards == CODE_WATER
+    empty, mesh = boards == CODE_EMPTY, boards == CODE_MESH
+    lava_reach, water_reach = _neighbours(lava), _neighbours(water)
+
+    new_water = water_reach & empty
+    new_lava = lava_reach & empty & ~new_water
+    new_mesh_water = water_reach & mesh
+    new_mesh_lava = lava_reach & mesh & ~new_mesh_water
+
+    boards[new_lava] = CODE_LAVA
+    boards[new_water] = CODE_WATER
+    boards[lava_reach & water] = CODE_BLOCK
+    boards[new_mesh_lava] = CODE_MESH_LAVA
+    boards[new_mesh_water] = CODE_MESH_WATER
+
+    dies = lava_reach[ar, nr, nc]
+    boards[ar[dies], nr[dies], nc[dies]] = CODE_LAVA
+    return boards, nr, nc
+
+
+def expand(boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray):
+    # Successors of every state in the batch, ordered by (parent, direction) like
+    # the sequential solvers; moves straight onto lava are skipped
+    n, rows, cols = boards.shape
+    legal = available_moves(boards, prow, pcol)
+    parts = []
+    for d, (_, (dr, dc)) in enumerate(DIRECTIONS):
+        idx = np.nonzero(legal[:, d])[0]
+        if len(idx):
+            idx = idx[boards[idx, prow[idx] + dr, pcol[idx] + dc] != CODE_LAVA]
+        if not len(idx):
+            continue
+        succ, nr, nc = apply_direction(boards[idx], prow[idx], pcol[idx], d)
+        parts.append((idx, np.full(len(idx), d, dtype=np.uint8), succ, nr, nc))
+    if not parts:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8),
+                np.empty((0, rows, cols), dtype=np.uint8),
+                np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    parents, actions, succ, nr, nc = (np.concatenate(part) for part in zip(*parts))
+    order = np.lexsort((actions, parents))
+    return parents[order], actions[order], succ[order], nr[order], nc[order]
+
+
+def is_dead(boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray) -> np.ndarray:
+    return boards[np.arange(len(boards)), prow, pcol] == CODE_LAVA
+
+
+def is_goal(boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray) -> np.ndarray:
+    on_goal = boards[np.arange(len(boards)), prow, pcol] == CODE_GOAL
+    return on_goal & ~(boards == CODE_COIN).any(axis=(1, 2))
+
+
+class ZobristTable:
+    # Vectorised Zobrist hashing: XOR of one random key per (cell, code) plus the player
+    def __init__(self, rows: int, cols: int, seed: int = 0x1A7A):
+        rng = np.random.default_rng(seed)
+        self.cols = cols
+        self.cells = rng.integers(0, 2 ** 63, size=(rows * cols, 256), dtype=np.uint64)
+        self.cells[:, CODE_EMPTY] = 0
+        self.player = rng.integers(0, 2 ** 63, size=rows * cols, dtype=np.uint64)
+        self.cell_index = np.arange(rows * cols)
+
+    def hash(self, boards: np.ndarray, prow: np.ndarray, pcol: np.ndarray) -> np.ndarray:
+        flat = boards.reshape(len(boards), len(self.cell_index))
+        keys = self.cells[self.cell_index, flat]
+        return np.bitwise_xor.reduce(keys, axis=1) ^ self.player[prow * self.cols + pcol]
+
+
+class BatchBFSSolver(Solver):
+    # Breadth-first search that expands one whole depth layer per engine call.
+    # Visits states in the same order as BFSSolver, so it returns the same path.
+    # batch_size bounds how many parents are expanded in one array operation.
+    # It has no engine to choose and no deadlock checks: it matches
+    # BFSSolver(deadlock_checks=()).
+    name = "BFS (batch)"
+
+    def __init__(self, batch_size: int = 8192, instrumentation=None,
+                 time_limit=None, memory_limit_mb=None):
+        super().__init__(deadlock_checks=(), instrumentation=instrumentation,
+                         time_limit=time_limit, memory_limit_mb=memory_limit_mb)
+        self.batch_size = batch_size
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        if isinstance(initial_state, game_bitboard.BitboardState):
+            initial_state = game_bitboard.to_game_state(initial_state)
+        boards, prow, pcol = encode_states([initial_state])
+        table = ZobristTable(boards.shape[1], boards.shape[2])
+
+        visited = np.sort(table.hash(boards, prow, pcol))
+        # per layer: parent index into the previous layer and the action taken
+        layers: List[Tuple[np.ndarray, np.ndarray]] = []
+        generated_states_count = 1
+        discovered_states_count = 0
+        goal_index = 0 if is_goal(boards, prow, pcol)[0] else None
+
+        while goal_index is None and len(boards):
+            layer_parts = []
+            layer_hashes = np.empty(0, dtype=np.uint64)
+            for start in range(0, len(boards), self.batch_size):
+                chunk = slice(start, start + self.batch_size)
+                parents, actions, succ, nr, nc = expand(boards[chunk], prow[chunk], pcol[chunk])
+                alive = ~is_dead(succ, nr, nc) | is_goal(succ, nr, nc)
+                parents, actions, succ, nr, nc = (a[alive] for a in (parents, actions, succ, nr, nc))
+
+                hashes = table.hash(succ, nr, nc)
+                _, first = np.unique(hashes, return_index=True)
+                first.sort()
+                keep = first[~_contains(visited, hashes[first]) & ~_contains(layer_hashes, hashes[first])]
+                layer_hashes = np.sort(np.concatenate((layer_hashes, hashes[keep])))
+                layer_parts.append((parents[keep] + start, actions[keep], succ[keep], nr[keep], nc[keep]))
+
+            discovered_states_count += len(boards)
+            if not layer_parts:
+                break
+            parents, actions, boards, prow, pcol = (np.concatenate(part) for part in zip(*layer_parts))
+            layers.append((parents, actions))
+            generated_states_count += len(boards)
+            visited = np.union1d(visited, layer_hashes)
+
+            goals = np.nonzero(is_goal(boards, prow, pcol))[0]
+            if len(goals):
+                goal_index = int(goals[0])
+                # BFSSolver pops every state queued before the goal first
+                discovered_states_count += goal_index
+            elif monitor.tick(discovered_states_count, generated_states_count,
+                              len(boards), len(visited), len(layers)):
+                break
+
+        if goal_index is None:
+            return monitor.finish(self._results(None, start_time, generated_states_count,
+                                                discovered_states_count, Counter()))
+
+        path = []
+        index = goal_index
+        for parents, actions in reversed(layers):
+            path.append(DIRECTIONS[actions[index]][0])
+            index = parents[index]
+        path.reverse()
+        discovered_states_count += 1
+        return monitor.finish(self._results(path, start_time, generated_states_count,
+                                            discovered_states_count, Counter()))
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    pos = np.searchsorted(sorted_keys, keys)
+    return sorted_keys[np.minimum(pos, len(sorted_keys) - 1)] == keys
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import game_logic
+from game_cli import ENGINES, SOLVERS, run_batch
+
+# Benchmarks for the engine hot paths and the solvers, with a saved baseline:
+#   python game_bench.py --save-baseline      record this machine's numbers
+#   python game_bench.py                      compare against them
+# Exits with status 1 when something got slower than --threshold allows.
+
+BASELINE_FILE = 'bench_baseline.json'
+DEFAULT_LEVELS = ['level1.txt', 'level2.txt', 'level3.txt', 'level4.txt',
+                  'level5.txt', 'level6.txt', 'level8.txt']
+MICRO_OPS = ('apply_transition', 'get_available_transitions', 'expand', 'state_id', 'is_goal')
+# metric -> True if bigger is better
+METRICS = {'ops_per_sec': True, 'wall_time': False, 'nodes_per_sec': True,
+           'peak_memory_kb': False}
+
+
+def sample_states(engine, level_files, walks=40, max_steps=40, seed=0):
+    # The same random walks on every run, so micro numbers are comparable
+    rng = random.Random(seed)
+    states = []
+    for level_file in level_files:
+        initial = game_logic.parse_level_file(level_file)
+        if hasattr(engine, 'from_game_state'):
+            initial = engine.from_game_state(initial)
+        for _ in range(walks):
+            state = initial
+            for _ in range(rng.randint(1, max_steps)):
+                actions = engine.get_available_transitions(state)
+                if not actions:
+                    break
+                state = engine.apply_transition(state, rng.choice(actions))
+                if engine.is_terminal(state):
+                    break
+                states.append(state)
+    return states
+
+
+def _calls_per_sec(fn, calls, repeat, min_time=0.05):
+    # fn makes `calls` calls; it is looped until one measurement takes at least
+    # min_time, and the best of `repeat` measurements is kept
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            break
+        loops *= 2
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return calls * loops / best
+
+
+def micro_benchmarks(level_files, repeat=5):
+    results = {}
+    for engine_name, engine in ENGINES.items():
+        states = sample_states(engine, level_files)
+        moves = [(state, action) for state in states
+                 for action in engine.get_available_transitions(state)]
+        apply_transition, get_available_transitions = engine.apply_transition, engine.get_available_transitions
+        state_id, is_goal, expand = engine.state_id, engine.is_goal, engine.expand
+
+        def run_apply():
+            for state, action in moves:
+                apply_transition(state, action)
+
+        def run_transitions():
+            for state in states:
+                get_available_transitions(state)
+
+        def run_expand():
+            for state in states:
+                expand(state)
+
+        def run_state_id():
+            for state in states:
+                state_id(state)
+
+        def run_is_goal():
+            for state in states:
+                is_goal(state)
+
+        runs = {'apply_transition': (run_apply, len(moves)),
+                'get_available_transitions': (run_transitions, len(states)),
+                'expand': (run_expand, len(states)),
+                'state_id': (run_state_id, len(states)),
+                'is_goal': (run_is_goal, len(states))}
+        for op in MICRO_OPS:
+            fn, count = runs[op]
+            results[f"{engine_name}.{op}"] = {'ops_per_sec': _calls_per_sec(fn, count, repeat)}
+    return results
+
+
+def solver_benchmarks(level_files, solver_names, engine_name='bitboard', timeout=120, jobs=1):
+    # One process per run (see game_cli), so peak memory belongs to that run alone.
+    # jobs defaults to 1: runs sharing the CPU would skew each other's timings.
+    results = {}
+    for record in run_batch(level_files, solver_names, engine_name, jobs, timeout):
+        key = f"{record['solver']}.{os.path.basename(record['level'])}"
+        if record['status'] not in ('solved', 'no_solution'):
+            results[key] = {'status': record['status']}
+            continue
+        wall_time = record['execution_time']
+        results[key] = {
+            'status': record['status'],
+            'wall_time': wall_time,
+            'nodes_per_sec': record.get('generated_states_count', 0) / wall_time if wall_time else 0.0,
+            'peak_memory_kb': record.get('peak_memory_kb'),
+            'path_length': record.get('path_length'),
+        }
+    return results
+
+
+def compare(current, baseline, threshold):
+    # Returns a list of human-readable regressions
+    regressions = []
+    for key, base in baseline.items():
+        now = current.get(key)
+        if now is None:
+            continue
+        if base.get('status') == 'solved' and now.get('status') != 'solved':
+            regressions.append(f"{key}: was solved, now {now.get('status')}")
+            continue
+        if 'path_length' in base and now.get('path_length') != base['path_length']:
+            regressions.append(f"{key}: path length {base['path_length']} -> {now.get('path_length')}")
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), now.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(f"{key}: {metric} {old:.4g} -> {new:.4g} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine and solver benchmarks.")
+    parser.add_argument('--levels', nargs='*', default=DEFAULT_LEVELS)
+    parser.add_argument('--solvers', default=','.join(SOLVERS))
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='bitboard',
+                        help="engine the solvers run on")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds per solver run")
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-solvers', action='store_true')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed relative slowdown before a regression is flagged")
+    args = parser.parse_args(argv)
+
+    current = {}
+    if not args.skip_micro:
+        current.update(micro_benchmarks(args.levels))
+    if not args.skip_solvers:
+        solvers = [name.strip() for name in args.solvers.split(',') if name.strip()]
+        current.update(solver_benchmarks(args.levels, solvers, args.engine, args.timeout))
+
+    for key, values in current.items():
+        shown = ', '.join(f"{metric}={value:.4g}" if isinstance(value, float) else f"{metric}={value}"
+                          for metric, value in values.items())
+        print(f"{key:<40} {shown}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
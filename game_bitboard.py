@@ -0,0 +1,409 @@
+import struct
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from game_state import GameState, zobrist_key
+from game_logic import (WALL, GOAL, LAVA, WATER, ICE, EMPTY, BLOCK, MESH, COIN,
+                        MESH_LAVA, MESH_WATER)
+
+# Bitboard engine: every cell kind is one Python int, bit (r * cols + c) is set
+# when cell (r, c) holds that kind. It exposes the same functions as game_logic
+# (get_available_transitions, apply_transition, is_goal, ...) so the solvers can
+# run on either representation.
+
+# (name, cell offset as (dr, dc)); order matches game_logic.get_available_transitions
+DIRECTIONS = (('w', (-1, 0)), ('s', (1, 0)), ('a', (0, -1)), ('d', (0, 1)))
+_DIRECTION_INDEX = {move: i for i, (move, _) in enumerate(DIRECTIONS)}
+# dynamic bit layers, in the order of Level.zobrist tables; the player comes last
+_HASHED_LAYERS = ('lava', 'water', 'ice', 'block', 'mesh_lava', 'mesh_water', 'coin')
+
+
+@dataclass(frozen=True)
+class Level:
+    # Immutable layer of a level, compiled once and shared by all of its states
+    rows: int
+    cols: int
+    wall: int
+    goal: int
+    goal_pos: Optional[Tuple[int, int]]
+    mesh: int                   # every mesh cell, with or without fluid under it
+    full: int
+    not_first_col: int
+    not_last_col: int
+    # neighbours[idx][d]: index of the cell next to idx in DIRECTIONS[d], or None
+    neighbours: Tuple[Tuple[Optional[int], ...], ...]
+    # zobrist[layer][idx], one table per _HASHED_LAYERS entry plus the player
+    zobrist: Tuple[Tuple[int, ...], ...]
+
+    @classmethod
+    def compile(cls, rows: int, cols: int, wall: int, goal: int, mesh: int,
+                neighbours=None, zobrist=None) -> 'Level':
+        # neighbours and zobrist may come precomputed (game_levels stores them)
+        full = (1 << (rows * cols)) - 1
+        first_col = 0
+        for r in range(rows):
+            first_col |= 1 << (r * cols)
+        last_col = first_col << (cols - 1)
+
+        if neighbours is None:
+            neighbours = []
+            for r in range(rows):
+                for c in range(cols):
+                    cell = []
+                    for _, (dr, dc) in DIRECTIONS:
+                        nr, nc = r + dr, c + dc
+                        cell.append(nr * cols + nc if 0 <= nr < rows and 0 <= nc < cols else None)
+                    neighbours.append(tuple(cell))
+
+        goal_pos = divmod((goal & -goal).bit_length() - 1, cols) if goal else None
+        if zobrist is None:
+            zobrist = tuple(tuple(zobrist_key(layer, idx) for idx in range(rows * cols))
+                            for layer in _HASHED_LAYERS + ('player',))
+        return cls(rows=rows, cols=cols, wall=wall, goal=goal, goal_pos=goal_pos, mesh=mesh,
+                   full=full, not_first_col=full & ~first_col, not_last_col=full & ~last_col,
+                   neighbours=tuple(neighbours), zobrist=zobrist)
+
+    def spread(self, mask: int) -> int:
+        return (((mask << 1) & self.not_first_col) | ((mask >> 1) & self.not_last_col)
+                | ((mask << self.cols) & self.full) | (mask >> self.cols))
+
+
+@dataclass(frozen=True)
+class BitboardState:
+    # Dynamic layer only; the level is shared and ignored by ==/hash
+    level: Level = field(compare=False, repr=False)
+    lava: int
+    water: int
+    ice: int
+    block: int
+    mesh_lava: int
+    mesh_water: int
+    coin: int
+    counter: int
+    counters: Tuple[Tuple[int, int], ...]   # (cell index, remaining turns), sorted by index
+    player: int
+    # 64-bit Zobrist hash of the dynamic layer; apply_transition passes it in
+    # already updated, otherwise it is computed here from scratch
+    zobrist: Optional[int] = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.zobrist is None:
+            object.__setattr__(self, 'zobrist', _full_zobrist(self))
+
+    def __hash__(self):
+        return self.zobrist
+
+    @property
+    def player_pos(self) -> Tuple[int, int]:
+        return divmod(self.player, self.level.cols)
+
+    # the aggregate counts GameState carries, popcounts here
+    @property
+    def lava_count(self) -> int:
+        return self.lava.bit_count()
+
+    @property
+    def water_count(self) -> int:
+        return self.water.bit_count()
+
+    @property
+    def coin_count(self) -> int:
+        return self.coin.bit_count()
+
+    @property
+    def counter_count(self) -> int:
+        return len(self.counters)
+
+
+def _xor_bits(h: int, mask: int, keys: Tuple[int, ...]) -> int:
+    while mask:
+        low = mask & -mask
+        h ^= keys[low.bit_length() - 1]
+        mask ^= low
+    return h
+
+
+_counter_keys = {}
+
+def _counters_zobrist(counters: Tuple[Tuple[int, int], ...]) -> int:
+    h = 0
+    for counter in counters:
+        key = _counter_keys.get(counter)
+        if key is None:
+            key = _counter_keys[counter] = zobrist_key('counter', *counter)
+        h ^= key
+    return h
+
+
+def _full_zobrist(state: 'BitboardState') -> int:
+    tables = state.level.zobrist
+    h = tables[-1][state.player] ^ _counters_zobrist(state.counters)
+    for layer, keys in zip(_HASHED_LAYERS, tables):
+        h = _xor_bits(h, getattr(state, layer), keys)
+    return h
+
+
+def _ice_push_allowed(state: BitboardState) -> int:
+    level = state.level
+    occupied = (level.wall | level.goal | level.mesh | state.lava | state.water | state.ice
+                | state.block | state.coin | state.counter)
+    return (level.full & ~occupied) | state.water | state.lava | state.coin
+
+
+def from_game_state(state: GameState, neighbours=None, zobrist=None) -> BitboardState:
+    rows, cols = len(state.board), len(state.board[0])
+    masks = {WALL: 0, GOAL: 0, LAVA: 0, WATER: 0, ICE: 0, BLOCK: 0, COIN: 0,
+             MESH: 0, MESH_LAVA: 0, MESH_WATER: 0}
+    counter = 0
+    counters = []
+    for r, row in enumerate(state.board):
+        for c, cell in enumerate(row):
+            bit = 1 << (r * cols + c)
+            if cell in masks:
+                masks[cell] |= bit
+            elif cell.isdigit():
+                counter |= bit
+                counters.append((r * cols + c, int(cell)))
+            elif cell != EMPTY:
+                raise ValueError(f"Unknown cell '{cell}' at {(r, c)}")
+    level = Level.compile(rows, cols, wall=masks[WALL], goal=masks[GOAL],
+                          mesh=masks[MESH] | masks[MESH_LAVA] | masks[MESH_WATER],
+                          neighbours=neighbours, zobrist=zobrist)
+    pr, pc = state.player_pos
+    return BitboardState(
+        level=level, lava=masks[LAVA], water=masks[WATER], ice=masks[ICE],
+        block=masks[BLOCK], mesh_lava=masks[MESH_LAVA], mesh_water=masks[MESH_WATER],
+        coin=masks[COIN], counter=counter, counters=tuple(counters),
+        player=pr * cols + pc)
+
+
+def to_game_state(state: BitboardState) -> GameState:
+    level = state.level
+    # later layers win, so lava drawn over the goal or a mesh shows as LAVA
+    layers = ((level.wall, WALL), (level.goal, GOAL), (level.mesh, MESH),
+              (state.mesh_lava, MESH_LAVA), (state.mesh_water, MESH_WATER),
+              (state.lava, LAVA), (state.water, WATER), (state.ice, ICE),
+              (state.block, BLOCK), (state.coin, COIN))
+    board = [[EMPTY] * level.cols for _ in range(level.rows)]
+    for mask, char in layers:
+        while mask:
+            low = mask & -mask
+            r, c = divmod(low.bit_length() - 1, level.cols)
+            board[r][c] = char
+            mask ^= low
+    for idx, remaining in state.counters:
+        r, c = divmod(idx, level.cols)
+        board[r][c] = str(remaining)
+    return GameState(board=tuple(tuple(row) for row in board), player_pos=state.player_pos,
+                     lava_count=state.lava_count, water_count=state.water_count,
+                     coin_count=state.coin_count, counter_count=state.counter_count)
+
+
+def parse_level_file(level_file: str) -> Tuple[Level, BitboardState]:
+    from game_logic import parse_level_file as parse_text_level
+    state = from_game_state(parse_text_level(level_file))
+    return state.level, state
+
+
+def state_id(state: BitboardState) -> int:
+    # 64-bit Zobrist hash, kept up to date by apply_transition
+    return state.zobrist
+
+
+def get_available_transitions(state: BitboardState) -> List[str]:
+    moves = []
+    level = state.level
+    blocked = (level.wall | state.block | state.counter
+               | (level.mesh & ~(state.mesh_lava | state.mesh_water)))
+    push_allowed = None
+    for d, target in enumerate(level.neighbours[state.player]):
+        if target is None or (blocked >> target) & 1:
+            continue
+        if (state.ice >> target) & 1:
+            dest = level.neighbours[target][d]
+            if dest is None:
+                continue
+            if push_allowed is None:
+                push_allowed = _ice_push_allowed(state)
+            if not (push_allowed >> dest) & 1:
+                continue
+        moves.append(DIRECTIONS[d][0])
+    return moves
+
+
+def would_cause_immediate_death(state: BitboardState, action: str) -> bool:
+    if action not in _DIRECTION_INDEX:
+        return True
+    d = _DIRECTION_INDEX[action]
+    neighbours = state.level.neighbours
+    target = neighbours[state.player][d]
+    if target is None:
+        return True
+    if (state.lava >> target) & 1:
+        return True
+    if (state.ice >> target) & 1:
+        dest = neighbours[target][d]
+        return dest is None or not (_ice_push_allowed(state) >> dest) & 1
+    return False
+
+
+def apply_transition(state: BitboardState, action: str) -> BitboardState:
+    if action not in get_available_transitions(state):
+        return state
+    d = _DIRECTION_INDEX[action]
+    return _apply_move(state, d, state.level.neighbours[state.player][d])
+
+
+def expand(state: BitboardState) -> List[Tuple[str, Optional[BitboardState], bool, bool]]:
+    # Every legal move as (action, successor, is_goal, is_dead), in one pass
+    # and without apply_transition's legality check. A move onto lava is dead
+    # before anything spreads, so its successor is not built (None).
+    level = state.level
+    blocked = (level.wall | state.block | state.counter
+               | (level.mesh & ~(state.mesh_lava | state.mesh_water)))
+    push_allowed = None
+    successors = []
+    for d, target in enumerate(level.neighbours[state.player]):
+        if target is None or (blocked >> target) & 1:
+            continue
+        if (state.ice >> target) & 1:
+            dest = level.neighbours[target][d]
+            if dest is None:
+                continue
+            if push_allowed is None:
+                push_allowed = _ice_push_allowed(state)
+            if not (push_allowed >> dest) & 1:
+                continue
+        elif (state.lava >> target) & 1:
+            successors.append((DIRECTIONS[d][0], None, False, True))
+            continue
+        new_state = _apply_move(state, d, target)
+        player_bit = 1 << target
+        dead = bool(new_state.lava & player_bit)
+        successors.append((DIRECTIONS[d][0], new_state,
+                           not dead and bool(level.goal & player_bit) and not new_state.coin, dead))
+    return successors
+
+
+def _apply_move(state: BitboardState, d: int, player: int) -> BitboardState:
+    # The move in direction d, already known to be legal, onto cell player
+    level = state.level
+    player_bit = 1 << player
+
+    lava, water, ice, coin = state.lava, state.water, state.ice, state.coin
+    block, mesh_lava, mesh_water = state.block, state.mesh_lava, state.mesh_water
+
+    # Ice pushing: the pushed ice covers whatever was at its destination
+    if ice & player_bit:
+        dest_bit = 1 << level.neighbours[player][d]
+        ice = (ice & ~player_bit) | dest_bit
+        lava &= ~dest_bit
+        water &= ~dest_bit
+        coin &= ~dest_bit
+    coin &= ~player_bit
+
+    # Update numbered squares
+    counters = tuple((idx, remaining - 1) for idx, remaining in state.counters if remaining > 1)
+    counter = 0
+    for idx, _ in counters:
+        counter |= 1 << idx
+
+    # Spread Lava and Water, all sources act on the board as it was before spreading
+    empty = level.full & ~(level.wall | level.goal | level.mesh | lava | water | ice
+                           | block | coin | counter)
+    plain_mesh = level.mesh & ~(mesh_lava | mesh_water | lava)
+    lava_reach = level.spread(lava)
+    water_reach = level.spread(water)
+
+    new_water = water_reach & empty
+    new_lava = lava_reach & empty & ~new_water
+    water_to_block = lava_reach & water
+    new_mesh_water = water_reach & plain_mesh
+    new_mesh_lava = lava_reach & plain_mesh & ~new_mesh_water
+
+    lava |= new_lava
+    water = (water & ~water_to_block) | new_water
+    block |= water_to_block
+    mesh_lava |= new_mesh_lava
+    mesh_water |= new_mesh_water
+
+    if lava_reach & player_bit:
+        cleared = ~player_bit
+        water &= cleared
+        block &= cleared
+        mesh_lava &= cleared
+        mesh_water &= cleared
+        lava |= player_bit
+
+    tables = level.zobrist
+    h = (state.zobrist ^ tables[-1][state.player] ^ tables[-1][player]
+         ^ _counters_zobrist(state.counters) ^ _counters_zobrist(counters))
+    for keys, changed in zip(tables, (state.lava ^ lava, state.water ^ water, state.ice ^ ice,
+                                      state.block ^ block, state.mesh_lava ^ mesh_lava,
+                                      state.mesh_water ^ mesh_water, state.coin ^ coin)):
+        while changed:
+            low = changed & -changed
+            h ^= keys[low.bit_length() - 1]
+            changed ^= low
+
+    return BitboardState(
+        level=level, lava=lava, water=water, ice=ice, block=block,
+        mesh_lava=mesh_lava, mesh_water=mesh_water, coin=coin, counter=counter,
+        counters=counters, player=player, zobrist=h)
+
+
+def count_lava(state: BitboardState) -> int:
+    return state.lava.bit_count()
+
+
+def count_coins(state: BitboardState) -> int:
+    return state.coin.bit_count()
+
+
+def pack_state(state: BitboardState) -> bytes:
+    # The dynamic layer as compact bytes (for search arenas and other
+    # processes): the eight masks, player, Zobrist hash, then the counters.
+    # The level is shared, so unpack_state takes it from any state of the level.
+    size = (state.level.rows * state.level.cols + 7) // 8
+    masks = b''.join(mask.to_bytes(size, 'little') for mask in (
+        state.lava, state.water, state.ice, state.block, state.mesh_lava, state.mesh_water,
+        state.coin, state.counter))
+    counters = [value for counter in state.counters for value in counter]
+    return masks + struct.pack(f'<HQ{len(counters)}H', state.player, state.zobrist, *counters)
+
+
+def unpack_state(packed: bytes, like: BitboardState) -> BitboardState:
+    level = like.level
+    size = (level.rows * level.cols + 7) // 8
+    masks = [int.from_bytes(packed[i:i + size], 'little') for i in range(0, 8 * size, size)]
+    player, zobrist = struct.unpack_from('<HQ', packed, 8 * size)
+    values = struct.unpack_from(f'<{(len(packed) - 8 * size - 10) // 2}H', packed, 8 * size + 10)
+    return BitboardState(level, *masks, counters=tuple(zip(values[::2], values[1::2])),
+                         player=player, zobrist=zobrist)
+
+
+def dynamic_masks(state: BitboardState) -> Tuple[int, int, int, int]:
+    return state.lava, state.ice, state.block, state.coin
+
+
+def has_coin(state: BitboardState, pos: Tuple[int, int]) -> bool:
+    return bool((state.coin >> (pos[0] * state.level.cols + pos[1])) & 1)
+
+
+def get_goal_pos(state: BitboardState) -> Optional[Tuple[int, int]]:
+    if state.level.goal & ~state.lava:
+        return state.level.goal_pos
+    return None
+
+
+def is_terminal(state: BitboardState) -> bool:
+    player_bit = 1 << state.player
+    if state.lava & player_bit:
+        return True
+    if state.level.goal & player_bit:
+        return state.coin == 0
+    return False
+
+
+def is_goal(state: BitboardState) -> bool:
+    player_bit = 1 << state.player
+    return bool(state.level.goal & player_bit) and not state.lava & player_bit and state.coin == 0
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import sqlite3
+import time
+import game_logic
+import game_bitboard
+from game_state import GameState
+
+# Solver results kept across runs in an sqlite file:
+#
+#   cache = SolutionCache('solutions.sqlite')
+#   results = cache.solve(AStarSolver(engine=game_bitboard), state)
+#
+# A solution is stored once and every state along its path is indexed with
+# its position, so solving again from any of those states returns the rest of
+# the path without a search. States are keyed on a hash of the full board and
+# the player; walls and goal are on the board, so the key also tells levels
+# apart. Entries belong to a tag, the solver's name by default, since a DFS
+# path is no answer to a BFS request; solvers with non-default settings
+# (weight, heuristic ...) should get a tag of their own. Past max_entries
+# solutions, the least recently used ones are dropped.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    id INTEGER PRIMARY KEY,
+    tag TEXT NOT NULL,
+    path TEXT,                  -- actions as one string, NULL when there is no solution
+    stats TEXT NOT NULL,        -- the solver's results as JSON, without the path
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_lru ON solutions (last_used);
+CREATE TABLE IF NOT EXISTS states (
+    tag TEXT NOT NULL,
+    key BLOB NOT NULL,
+    solution INTEGER NOT NULL REFERENCES solutions (id) ON DELETE CASCADE,
+    offset INTEGER NOT NULL,    -- how many moves of the path lead here
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS states_solution ON states (solution);
+"""
+
+# results keys that are not worth keeping
+_UNCACHED = ('path', 'profile')
+
+
+def _as_game_state(state):
+    if isinstance(state, GameState):
+        return state
+    return game_bitboard.to_game_state(state)
+
+
+def state_key(state) -> bytes:
+    state = _as_game_state(state)
+    return hashlib.blake2b(repr((state.board, state.player_pos)).encode(), digest_size=16).digest()
+
+
+class SolutionCache:
+    def __init__(self, filename='solutions.sqlite', max_entries=1000):
+        self.filename = filename
+        self.max_entries = max_entries
+        # the timeout lets several processes (game_cli -j) share the file
+        self.db = sqlite3.connect(filename, timeout=30)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(_SCHEMA)
+
+    def get(self, tag, state):
+        # Results shaped like a solver's, with "cached": True and the search
+        # statistics of the original run under "cached_results"; None on a miss
+        start_time = time.time()
+        row = self.db.execute(
+            "SELECT solutions.id, path, stats, offset FROM states "
+            "JOIN solutions ON solutions.id = states.solution "
+            "WHERE states.tag = ? AND states.key = ?", (tag, state_key(state))).fetchone()
+        if row is None:
+            return None
+        solution, path, stats, offset = row
+        with self.db:
+            self.db.execute("UPDATE solutions SET last_used = ? WHERE id = ?", (time.time(), solution))
+        path = list(path[offset:]) if path is not None else None
+        return {
+            "path": path,
+            "execution_time": time.time() - start_time,
+            "generated_states_count": 0,
+            "pruned_states_count": 0,
+            "pruned_by_check": {},
+            "discovered_states_count": 0,
+            "path_length": len(path) if path else 0,
+            "solver_name": tag,
+            "budget_exhausted": None,
+            "cached": True,
+            "cache_offset": offset,
+            "cached_results": json.loads(stats),
+        }
+
+    def put(self, tag, state, results):
+        # Results cut short by a budget or an error say nothing for certain,
+        # so they are not kept; returns whether the results were stored
+        if results.get("budget_exhausted") or results.get("cached") or "error" in results:
+            return False
+        state = _as_game_state(state)
+        path = results.get("path")
+        stats = {key: value for key, value in results.items() if key not in _UNCACHED}
+        keys = [state_key(state)]
+        for action in path or ():
+            state = game_logic.apply_transition(state, action)
+            keys.append(state_key(state))
+
+        with self.db:
+            solution = self.db.execute(
+                "INSERT INTO solutions (tag, path, stats, last_used) VALUES (?, ?, ?, ?)",
+                (tag, ''.join(path) if path is not None else None, json.dumps(stats),
+                 time.time())).lastrowid
+            self.db.executemany("INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?)",
+                                [(tag, key, solution, offset) for offset, key in enumerate(keys)])
+            self._evict()
+        return True
+
+    def solve(self, solver, state, tag=None):
+        tag = tag or solver.name
+        results = self.get(tag, state)
+        if results is None:
+            results = solver.solve(state)
+            self.put(tag, state, results)
+        return results
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM solutions")
+
+    def close(self):
+        self.db.close()
+
+    def _evict(self):
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.db.execute("DELETE FROM solutions WHERE id IN "
+                            "(SELECT id FROM solutions ORDER BY last_used LIMIT ?)", (excess,))
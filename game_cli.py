@@ -0,0 +1,230 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+try:
+    import resource
+except ImportError:         # not available on Windows
+    resource = None
+import game_logic
+import game_bitboard
+from game_solver import BFSSolver, DFSSolver, UCSSolver, AStarSolver, GreedySolver, AnytimeAStarSolver, IDAStarSolver
+from game_instrument import Instrumentation, print_progress, PROFILE_MODES
+from game_cache import SolutionCache
+from game_levels import load_level, load_pack
+
+# Headless batch runner: solves many levels with many solvers in parallel and
+# writes one JSON object per run, e.g.
+#   python game_cli.py level*.txt --solvers bfs,astar --timeout 60 -o results.jsonl
+
+SOLVERS = {
+    'bfs': BFSSolver,
+    'dfs': DFSSolver,
+    'ucs': UCSSolver,
+    'astar': AStarSolver,
+    'greedy': GreedySolver,
+    'anytime': AnytimeAStarSolver,
+    'idastar': IDAStarSolver,
+}
+ENGINES = {'bitboard': game_bitboard, 'logic': game_logic}
+
+
+def _solver_class(name):
+    if name == 'batch-bfs':
+        # needs numpy, so only imported when asked for
+        from game_batch import BatchBFSSolver
+        return BatchBFSSolver
+    if name == 'hdastar':
+        from game_parallel import HDAStarSolver
+        return HDAStarSolver
+    if name == 'external-bfs':
+        from game_external import ExternalBFSSolver
+        return ExternalBFSSolver
+    return SOLVERS[name]
+
+
+def make_solver(name, engine_name='bitboard', instrumentation=None, time_limit=None,
+                memory_limit_mb=None):
+    # batch-bfs runs on game_batch's own NumPy boards: engine_name does not
+    # apply to it, and it has no deadlock checks or doomed pruning
+    cls = _solver_class(name)
+    budget = {'instrumentation': instrumentation, 'time_limit': time_limit,
+              'memory_limit_mb': memory_limit_mb}
+    if name == 'batch-bfs':
+        return cls(**budget)
+    return cls(engine=ENGINES[engine_name], **budget)
+
+
+def make_instrumentation(progress=False, timing=False, profile=None):
+    # None when nothing is asked for; progress lines go to stderr
+    if not (progress or timing or profile):
+        return None
+    return Instrumentation(progress=print_progress if progress else None,
+                           timing=timing, profile=profile)
+
+
+_packs = {}     # pack file -> load_pack result, mapped once per process
+
+
+def open_pack(pack_file):
+    if pack_file not in _packs:
+        _packs[pack_file] = load_pack(pack_file)
+    return _packs[pack_file]
+
+
+def run_one(level_file, solver_name, engine_name='bitboard', instrumentation=None,
+            time_limit=None, memory_limit_mb=None, cache_file=None, pack_file=None):
+    # One solver on one level, in this process; returns the JSON-ready record.
+    # With cache_file, results come from / go to a game_cache.SolutionCache.
+    # With pack_file (see game_levels.build_pack), levels in it are read from it.
+    record = {"level": level_file, "solver": solver_name, "engine": engine_name}
+    state = load_level(level_file, pack=open_pack(pack_file) if pack_file else None)
+    solver = make_solver(solver_name, engine_name, instrumentation, time_limit, memory_limit_mb)
+    if cache_file:
+        cache = SolutionCache(cache_file)
+        try:
+            results = cache.solve(solver, state)
+        finally:
+            cache.close()
+    else:
+        results = solver.solve(state)
+    record.update(results)
+    if results.get("path") is not None:
+        record["status"] = "solved"
+    elif results.get("budget_exhausted"):
+        record["status"] = "budget_exhausted"
+    else:
+        record["status"] = "no_solution"
+    return record
+
+
+def _worker(conn, level_file, solver_name, engine_name, instrument, budget, cache_file, pack_file):
+    try:
+        record = run_one(level_file, solver_name, engine_name, make_instrumentation(*instrument),
+                         *budget, cache_file, pack_file)
+    except Exception:
+        record = {"level": level_file, "solver": solver_name, "engine": engine_name,
+                  "status": "error", "error": traceback.format_exc()}
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+        record["peak_memory_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send(record)
+    conn.close()
+
+
+def run_batch(level_files, solver_names, engine_name='bitboard', jobs=None, timeout=None,
+              progress=False, timing=False, profile=None, time_limit=None, memory_limit_mb=None,
+              cache_file=None, pack_file=None):
+    # Yields one record per (level, solver) as runs finish. Every run gets its
+    # own process, so a run over its timeout is simply terminated.
+    # pack_file is mapped here once; forked workers share the mapping.
+    # progress, timing and profile set up a game_instrument.Instrumentation in
+    # each run. time_limit and memory_limit_mb are the solvers' own budgets:
+    # unlike timeout, the run stops itself and still returns its results.
+    tasks = [(level, solver) for level in level_files for solver in solver_names]
+    tasks.reverse()
+    jobs = jobs or os.cpu_count() or 1
+    if pack_file:
+        open_pack(pack_file)
+    running = {}   # connection -> (process, level, solver, start time)
+
+    while tasks or running:
+        while tasks and len(running) < jobs:
+            level, solver = tasks.pop()
+            recv_end, send_end = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_worker,
+                                              args=(send_end, level, solver, engine_name,
+                                                    (progress, timing, profile),
+                                                    (time_limit, memory_limit_mb), cache_file,
+                                                    pack_file))
+            process.start()
+            send_end.close()
+            running[recv_end] = (process, level, solver, time.time())
+
+        wait_for = None
+        if timeout is not None:
+            oldest = min(started for _, _, _, started in running.values())
+            wait_for = max(0.0, oldest + timeout - time.time())
+
+        for conn in wait(list(running), wait_for):
+            process, level, solver, started = running.pop(conn)
+            try:
+                record = conn.recv()
+            except EOFError:
+                record = {"level": level, "solver": solver, "engine": engine_name,
+                          "status": "error", "error": f"worker exited with code {process.exitcode}"}
+            process.join()
+            conn.close()
+            yield record
+
+        if timeout is not None:
+            now = time.time()
+            for conn, (process, level, solver, started) in list(running.items()):
+                if now - started >= timeout:
+                    process.terminate()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    yield {"level": level, "solver": solver, "engine": engine_name,
+                           "status": "timeout", "execution_time": now - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve levels without the GUI.")
+    parser.add_argument('levels', nargs='*', help="level files (default: level*.txt)")
+    parser.add_argument('--solvers', default='bfs,dfs,ucs,astar',
+                        help="comma-separated: " + ','.join(list(SOLVERS) + ['batch-bfs', 'hdastar', 'external-bfs']))
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='bitboard')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="parallel runs (default: number of CPUs)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="seconds per run before it is killed")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="seconds per run before the solver stops and returns what it has")
+    parser.add_argument('--memory-limit', type=float, default=None,
+                        help="MB of resident memory per run before the solver stops")
+    parser.add_argument('--output', '-o', default=None,
+                        help="JSON lines file (default: stdout)")
+    parser.add_argument('--cache', default=None, metavar='FILE',
+                        help="sqlite solution cache to read and fill (see game_cache)")
+    parser.add_argument('--pack', default=None, metavar='FILE',
+                        help="level pack to read the levels from (default levels: all in it)")
+    parser.add_argument('--progress', action='store_true',
+                        help="print search progress to stderr every second")
+    parser.add_argument('--timing', action='store_true',
+                        help="record time spent per primitive (adds overhead)")
+    parser.add_argument('--profile', choices=[mode for mode in PROFILE_MODES if mode],
+                        help="add a cProfile or tracemalloc report to each record")
+    args = parser.parse_args(argv)
+
+    if args.pack and not args.levels:
+        levels = sorted(open_pack(args.pack))
+    else:
+        levels = args.levels or sorted(glob.glob('level*.txt'))
+    solvers = [name.strip() for name in args.solvers.split(',') if name.strip()]
+    for name in solvers:
+        if name not in SOLVERS and name not in ('batch-bfs', 'hdastar', 'external-bfs'):
+            parser.error(f"unknown solver '{name}'")
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for record in run_batch(levels, solvers, args.engine, args.jobs, args.timeout,
+                                args.progress, args.timing, args.profile,
+                                args.time_limit, args.memory_limit, args.cache, args.pack):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            if out is not sys.stdout:
+                print(f"{record['level']:<16} {record['solver']:<10} {record['status']:<12}"
+                      f"{record.get('execution_time', 0.0):8.2f}s", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
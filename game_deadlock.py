@@ -0,0 +1,159 @@
+from collections import Counter, OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+import game_logic
+from game_logic import WALL, GOAL, MESH, MESH_LAVA, MESH_WATER, ICE
+from game_state import GameState
+
+# Dead-state detection: each check looks at one generated state and returns
+# True when the level can provably no longer be won from it. Checks work on
+# bitmasks (bit r * cols + c) so they run the same on every engine; the
+# engine only has to provide dynamic_masks(state) -> (lava, ice, block, coin).
+#
+# Everything here relies on what never goes away: walls, blocks (water that
+# lava turned to stone), and lava that no ice block can be pushed onto.
+
+Masks = Tuple[int, int, int, int]
+Check = Callable[['DeadlockDetector', int, Masks], bool]
+# obstacle layouts whose regions are kept; nearly every lava layout a search
+# meets is a new one, so the cache would otherwise grow with the search
+REGION_CACHE_SIZE = 65536
+
+
+class DeadlockDetector:
+    # lava_schedule (a game_heuristics.LavaSchedule) adds the depth-dependent
+    # check that the lava will cut the player off in time; it is counted as 'lava_schedule'.
+    # cache_size: layouts kept by region_is_dead, least recently used dropped first
+    def __init__(self, state: GameState, engine=game_logic, checks: Sequence[Check] = (),
+                 lava_schedule=None, cache_size: int = REGION_CACHE_SIZE):
+        board = state.board
+        self.engine = engine
+        self.checks = tuple(checks)
+        self.lava_schedule = lava_schedule
+        self.rows, self.cols = rows, cols = len(board), len(board[0])
+        self.full = (1 << (rows * cols)) - 1
+        first_col = sum(1 << (r * cols) for r in range(rows))
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (cols - 1))
+
+        masks = {WALL: 0, GOAL: 0, MESH: 0}
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                kind = MESH if cell in (MESH_LAVA, MESH_WATER) else cell
+                if kind in masks:
+                    masks[kind] |= 1 << (r * cols + c)
+        self.wall, self.goal, self.mesh = masks[WALL], masks[GOAL], masks[MESH]
+        # ice is never created, so a level without it never gets any
+        self.has_ice = any(ICE in row for row in board)
+
+        self.pruned: Counter = Counter()
+        # regions already flooded, per obstacle layout; most generated states
+        # only move the player inside a region that is already known
+        self._regions: 'OrderedDict[Tuple, List[Tuple[int, bool]]]' = OrderedDict()
+        self.cache_size = cache_size
+
+    def __call__(self, state, step: int = 0) -> Optional[str]:
+        # Name of the first check that fires, or None if the state may still be won
+        masks = self.engine.dynamic_masks(state)
+        pr, pc = state.player_pos
+        player = 1 << (pr * self.cols + pc)
+        reason = next((check.__name__ for check in self.checks if check(self, player, masks)), None)
+        if reason is None and self.lava_schedule and self.lava_schedule.is_doomed(state, step, self.engine):
+            reason = 'lava_schedule'
+        if reason is not None:
+            self.pruned[reason] += 1
+        return reason
+
+    @property
+    def pruned_count(self) -> int:
+        return sum(self.pruned.values())
+
+    def spread(self, mask: int) -> int:
+        return (((mask << 1) & self.not_first_col) | ((mask >> 1) & self.not_last_col)
+                | ((mask << self.cols) & self.full) | (mask >> self.cols))
+
+    def flood(self, start: int, passable: int) -> int:
+        reached = frontier = start
+        while frontier:
+            frontier = self.spread(frontier) & passable & ~reached
+            reached |= frontier
+        return reached
+
+    def region_is_dead(self, start: int, layout: Tuple, passable: Callable[[], int],
+                       dead: Callable[[int], bool]) -> bool:
+        # Floods the region of passable() cells around start and judges it with
+        # dead(region). layout must hold every layer both depend on: regions
+        # are cached per layout and shared by all states that match it.
+        regions = self._regions.get(layout)
+        if regions is None:
+            regions = self._regions[layout] = []
+            if len(self._regions) > self.cache_size:
+                self._regions.popitem(last=False)
+        else:
+            self._regions.move_to_end(layout)
+        for shared, verdict in regions:
+            if shared & start:
+                return verdict
+        cells = passable()
+        region = self.flood(start, cells)
+        verdict = dead(region)
+        # a player next to lava that appeared this turn starts outside the
+        # passable cells; that flood belongs to the start cell alone
+        regions.append((region if start & cells else start, verdict))
+        return verdict
+
+    def frozen_ice(self, ice: int, block: int) -> int:
+        # Ice that can never be pushed again: in every direction either the
+        # cell it would move into never accepts ice, or the cell the player
+        # would push from can never be stood on
+        cols = self.cols
+        can_stand = self.full & ~(self.wall | block)
+        can_enter = can_stand & ~(self.goal | self.mesh)
+        movable = (((can_enter << cols) & (can_stand >> cols))                  # w
+                   | ((can_enter >> cols) & (can_stand << cols))                # s
+                   | ((can_enter << 1) & self.not_first_col & (can_stand >> 1) & self.not_last_col)   # a
+                   | ((can_enter >> 1) & self.not_last_col & (can_stand << 1) & self.not_first_col))  # d
+        return ice & ~movable
+
+    def targets_reached(self, reached: int, coin: int, coin_radius: bool) -> bool:
+        # The goal and every remaining coin must be reachable. A coin can also
+        # be removed by pushing ice onto it, which leaves the player next to it.
+        if not reached & self.goal:
+            return False
+        while coin:
+            low = coin & -coin
+            area = low | self.spread(low) if coin_radius else low
+            if not reached & area:
+                return False
+            coin ^= low
+        return True
+
+
+def goal_covered(detector: DeadlockDetector, player: int, masks: Masks) -> bool:
+    lava, _, block, _ = masks
+    return bool(detector.goal & (lava | block))
+
+
+def sealed_off(detector: DeadlockDetector, player: int, masks: Masks) -> bool:
+    # Walls, blocks and ice that can no longer move split the level; lava is
+    # treated as open here since ice might still be pushed over it
+    _, ice, block, coin = masks
+    return detector.region_is_dead(
+        player, ('sealed', block, ice, coin),
+        lambda: detector.full & ~(detector.wall | block | detector.frozen_ice(ice, block)),
+        lambda region: not detector.targets_reached(region, coin, detector.has_ice))
+
+
+def enclosed_by_lava(detector: DeadlockDetector, player: int, masks: Masks) -> bool:
+    # The player dies on lava and next to it. If no ice borders the region the
+    # player can still walk, nothing will ever clear that lava away.
+    lava, ice, block, coin = masks
+    if not lava:
+        return False
+    return detector.region_is_dead(
+        player, ('lava', lava, block, ice, coin),
+        lambda: detector.full & ~(detector.wall | block | ice | lava | detector.spread(lava)),
+        lambda region: not detector.spread(region) & ice
+        and not detector.targets_reached(region, coin, False))
+
+
+DEFAULT_CHECKS: Tuple[Check, ...] = (goal_covered, sealed_off, enclosed_by_lava)
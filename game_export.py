@@ -0,0 +1,142 @@
+import argparse
+import glob
+import json
+import os
+import sys
+# no window is ever opened; the dummy video driver keeps SDL from looking for one
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+import game_logic
+from game_renderer import gameRenderer
+from game_levels import load_level
+
+# Solution previews without the GUI: the moves are applied up front, then
+# every frame is drawn on an offscreen surface as fast as it renders (no 30 FPS
+# clock, no MOVE_DELAY) and written out as a PNG sequence or one sprite sheet.
+#
+#   python game_export.py level*.txt --solver astar -o previews
+#   python game_export.py level3.txt --moves ddwwa... --sheet -o previews
+#   python game_export.py --solutions results.jsonl -o previews      (game_cli output)
+#
+# Frames look like the app playing a solver path: the path stays highlighted,
+# the move log grows, and a last frame shows the end screen.
+
+
+def trajectory(state, moves):
+    # The states the app would go through: moves that are not available are
+    # skipped, and play stops at a terminal state
+    states = [state]
+    played = []
+    for action in moves:
+        if game_logic.is_terminal(state):
+            break
+        if action not in game_logic.get_available_transitions(state):
+            continue
+        state = game_logic.apply_transition(state, action)
+        states.append(state)
+        played.append(action)
+    return states, played
+
+
+def make_renderer(state, tile_size=40):
+    rows, cols = len(state.board), len(state.board[0])
+    return gameRenderer(cols * tile_size, rows * tile_size + 60, tile_size,
+                        dirty_rects=True, headless=True)
+
+
+def render_frames(state, moves, tile_size=40, renderer=None):
+    # Yields one surface per frame; it is the renderer's own screen, so copy
+    # it to keep it past the next frame
+    states, played = trajectory(state, moves)
+    renderer = renderer or make_renderer(state, tile_size)
+    renderer.invalidate()
+    path_coords = {s.player_pos for s in states}
+    for index, current in enumerate(states):
+        renderer.render(current, index, game_logic.get_available_transitions(current),
+                        path_coords, played[:index])
+        yield renderer.screen
+    final = states[-1]
+    if game_logic.is_terminal(final):
+        renderer.show_end_screen(final, len(played), game_logic.is_goal(final))
+        yield renderer.screen
+
+
+def export(state, moves, out, tile_size=40, sheet=False, columns=10, renderer=None):
+    # out is a directory for frame_0000.png ... or, with sheet, the PNG file
+    # holding every frame in rows of `columns`; returns the number of frames
+    frames = render_frames(state, moves, tile_size, renderer)
+    if not sheet:
+        os.makedirs(out, exist_ok=True)
+        count = 0
+        for count, frame in enumerate(frames, 1):
+            pygame.image.save(frame, os.path.join(out, f'frame_{count - 1:04d}.png'))
+        return count
+
+    frames = [frame.copy() for frame in frames]
+    width, height = frames[0].get_size()
+    columns = min(columns, len(frames))
+    rows = (len(frames) + columns - 1) // columns
+    surface = pygame.Surface((columns * width, rows * height))
+    for index, frame in enumerate(frames):
+        surface.blit(frame, ((index % columns) * width, (index // columns) * height))
+    pygame.image.save(surface, out)
+    return len(frames)
+
+
+def _load_solutions(filename):
+    # level -> path, from game_cli JSON lines (the first solved record per level)
+    solutions = {}
+    with open(filename) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("path") is not None:
+                solutions.setdefault(record["level"], record["path"])
+    return solutions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render solution previews without the GUI.")
+    parser.add_argument('levels', nargs='*', help="level files (default: level*.txt, or the levels in --solutions)")
+    parser.add_argument('--moves', default=None, help="moves to play (wasd), for every level given")
+    parser.add_argument('--solutions', default=None, metavar='FILE',
+                        help="game_cli JSON lines to take the paths from")
+    parser.add_argument('--solver', default='astar', help="game_cli solver for levels without moves")
+    parser.add_argument('--cache', default=None, metavar='FILE',
+                        help="sqlite solution cache to read and fill (see game_cache)")
+    parser.add_argument('--output', '-o', default='previews', help="output directory")
+    parser.add_argument('--sheet', action='store_true', help="one sprite sheet per level instead of PNG frames")
+    parser.add_argument('--columns', type=int, default=10, help="frames per sprite sheet row")
+    parser.add_argument('--tile-size', type=int, default=40)
+    args = parser.parse_args(argv)
+
+    solutions = _load_solutions(args.solutions) if args.solutions else {}
+    levels = args.levels or sorted(solutions) or sorted(glob.glob('level*.txt'))
+    os.makedirs(args.output, exist_ok=True)
+    renderers = {}      # (rows, cols) -> renderer, reused across levels of one size
+
+    for level_file in levels:
+        state = load_level(level_file)
+        if args.moves is not None:
+            moves = args.moves
+        elif level_file in solutions:
+            moves = solutions[level_file]
+        else:
+            # imported here so previews from given moves do not load the solvers
+            from game_cli import run_one
+            record = run_one(level_file, args.solver, cache_file=args.cache)
+            moves = record.get("path")
+            if moves is None:
+                print(f"{level_file:<16} {record['status']}, skipped", file=sys.stderr)
+                continue
+
+        size = (len(state.board), len(state.board[0]))
+        if size not in renderers:
+            renderers[size] = make_renderer(state, args.tile_size)
+        name = os.path.splitext(os.path.basename(level_file))[0]
+        out = os.path.join(args.output, name + ('.png' if args.sheet else ''))
+        count = export(state, moves, out, args.tile_size, args.sheet, args.columns, renderers[size])
+        print(f"{level_file:<16} {count} frames -> {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+import game_logic
+from game_solver import BFSSolver, ACTIONS
+from game_instrument import PROGRESS_EVERY
+from game_deadlock import DEFAULT_CHECKS
+
+# Breadth-first search that keeps the frontier and the closed set on disk, for
+# levels whose reachable states do not fit in memory.
+#
+# Every depth layer is a file of fixed-size records sorted by state:
+#   key length (2 bytes, big endian) | engine.pack_state, zero padded | parent | action
+# where parent is the index of the record's predecessor in the previous layer.
+# Successors are collected in memory up to chunk_size records, then sorted and
+# written out as a run. Once a layer is expanded its runs are merged with all
+# earlier layers (memory-mapped, so only the pages being read are resident),
+# and states seen before are dropped; what is left is the next layer. The path
+# is read back through the parent indices.
+#
+# States are compared on their full packed bytes, so there are no hash
+# collisions to worry about and check_collisions has nothing to add.
+
+_TAIL = struct.Struct('<IB')        # parent index, action
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+_DONTNEED = getattr(mmap, 'MADV_DONTNEED', None)     # not on Windows
+_WINDOW = 256 * mmap.PAGESIZE
+
+
+class ExternalBFSSolver(BFSSolver):
+    name = "External BFS"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, workdir=None, chunk_size=50000,
+                 keep_files=False, instrumentation=None, time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, instrumentation,
+                         time_limit, memory_limit_mb)
+        self.workdir = workdir              # where the layer directory goes (default: system temp)
+        self.chunk_size = chunk_size        # successors held in memory before a run is spilled
+        self.keep_files = keep_files
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        initial_state = self.prepare_state(initial_state)
+
+        packed = engine.pack_state(initial_state)
+        # packed states never grow along a path: the board size is fixed and
+        # counters only run out
+        self.width = len(packed)
+        self.key_size = 2 + self.width
+        self.record_size = self.key_size + _TAIL.size
+
+        if engine.is_goal(initial_state):
+            return monitor.finish(self._results([], start_time, 1, 0, deadlock.pruned, disk_bytes=0))
+
+        directory = tempfile.mkdtemp(prefix='bfs_layers_', dir=self.workdir)
+        layers = []         # (mmap, record count) per depth
+        generated_states_count = 1
+        discovered_states_count = 0
+        disk_bytes = 0
+        try:
+            layers.append(self._write(os.path.join(directory, 'layer0'),
+                                      [self._record(packed, 0, 0)]))
+            depth = 0
+            while True:
+                layer, count = layers[depth]
+                runs = []
+                buffer = []
+                size = self.record_size
+                for index in range(count):
+                    record = layer[index * size:(index + 1) * size]
+                    state = self._unpack(record, initial_state)
+                    discovered_states_count += 1
+                    for action, new_state, won, dead in engine.expand(state):
+                        if won:
+                            path = self._path(layers, depth, index) + [action]
+                            return monitor.finish(self._results(
+                                path, start_time, generated_states_count + 1,
+                                discovered_states_count, deadlock.pruned, disk_bytes=disk_bytes))
+
+                        if dead:
+                            continue
+
+                        if is_dead(new_state, depth + 1):
+                            continue
+
+                        buffer.append(self._record(engine.pack_state(new_state), index,
+                                                   _ACTION_CODES[action]))
+                        if len(buffer) >= self.chunk_size:
+                            runs.append(self._spill(directory, depth + 1, len(runs), buffer))
+                            buffer = []
+
+                    if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                            discovered_states_count, generated_states_count,
+                            count - index, generated_states_count, depth):
+                        for run, _ in runs:
+                            run.close()
+                        return monitor.finish(self._results(
+                            None, start_time, generated_states_count,
+                            discovered_states_count, deadlock.pruned, disk_bytes=disk_bytes))
+                if buffer:
+                    runs.append(self._spill(directory, depth + 1, len(runs), buffer))
+
+                next_layer = self._merge(os.path.join(directory, f'layer{depth + 1}'), runs, layers)
+                disk_bytes = max(disk_bytes, sum(mm.size() for mm, _ in layers + runs))
+                for run, _ in runs:
+                    run.close()
+                for name in os.listdir(directory):
+                    if name.startswith('run'):
+                        os.remove(os.path.join(directory, name))
+
+                if next_layer is None:
+                    return monitor.finish(self._results(
+                        None, start_time, generated_states_count,
+                        discovered_states_count, deadlock.pruned, disk_bytes=disk_bytes))
+                layers.append(next_layer)
+                generated_states_count += next_layer[1]
+                depth += 1
+        finally:
+            for layer, _ in layers:
+                layer.close()
+            if not self.keep_files:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _record(self, packed, parent, action):
+        if len(packed) > self.width:
+            raise ValueError("packed state is longer than the initial state's")
+        return (len(packed).to_bytes(2, 'big') + packed.ljust(self.width, b'\0')
+                + _TAIL.pack(parent, action))
+
+    def _unpack(self, record, like):
+        length = int.from_bytes(record[:2], 'big')
+        return self.engine.unpack_state(record[2:2 + length], like)
+
+    def _path(self, layers, depth, index):
+        path = []
+        size, key_size = self.record_size, self.key_size
+        while depth > 0:
+            layer, _ = layers[depth]
+            parent, action = _TAIL.unpack_from(layer, index * size + key_size)
+            path.append(ACTIONS[action])
+            index = parent
+            depth -= 1
+        path.reverse()
+        return path
+
+    def _write(self, filename, records):
+        # records: sorted, duplicate-free iterable; returns (mmap, count) or
+        # None when there were no records
+        count = 0
+        with open(filename, 'wb') as f:
+            for record in records:
+                f.write(record)
+                count += 1
+        if count == 0:
+            os.remove(filename)
+            return None
+        with open(filename, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), count
+
+    def _spill(self, directory, depth, number, buffer):
+        buffer.sort()
+        key_size = self.key_size
+        unique = []
+        last = None
+        for record in buffer:
+            key = record[:key_size]
+            if key != last:
+                unique.append(record)
+                last = key
+        return self._write(os.path.join(directory, f'run{depth}_{number}'), unique)
+
+    def _scan(self, mm, count, tag):
+        # Pages already scanned are handed back to the OS as we go, otherwise
+        # they stay resident and count against the process
+        size, key_size = self.record_size, self.key_size
+        released = 0
+        for offset in range(0, count * size, size):
+            if _DONTNEED is not None and offset - released >= _WINDOW:
+                mm.madvise(_DONTNEED, released, _WINDOW)
+                released += _WINDOW
+            record = mm[offset:offset + size]
+            yield record[:key_size], tag, record
+
+    def _merge(self, filename, runs, layers):
+        # One merge pass over the new runs and every earlier layer. Old records
+        # (tag 0) sort before new ones (tag 1) with the same key, so a key is
+        # written only the first time it shows up and only if it is new.
+        def unseen():
+            last = None
+            for key, tag, record in heapq.merge(*sources):
+                if key == last:
+                    continue
+                last = key
+                if tag:
+                    yield record
+
+        sources = [self._scan(mm, count, 0) for mm, count in layers]
+        sources += [self._scan(mm, count, 1) for mm, count in runs]
+        return self._write(filename, unseen())
@@ -0,0 +1,265 @@
+import collections
+import heapq
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+import game_logic
+from game_logic import WALL, BLOCK, GOAL, COIN, ICE
+from game_state import GameState
+
+INF = float('inf')
+_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def static_obstacles(state: GameState) -> FrozenSet[Tuple[int, int]]:
+    # Walls never change and blocks are never removed; every other cell can
+    # become walkable at some point, so treating it as open keeps distances a lower bound
+    return frozenset((r, c) for r, row in enumerate(state.board)
+                     for c, cell in enumerate(row) if cell in (WALL, BLOCK))
+
+
+# maps worked out ahead of time (compiled levels store the goal's), newest last
+_precomputed: Dict[Tuple, Tuple[Tuple[float, ...], ...]] = {}
+_PRECOMPUTED_SIZE = 256
+
+
+def add_distance_map(rows: int, cols: int, obstacles: FrozenSet[Tuple[int, int]],
+                     source: Tuple[int, int], dist: Tuple[Tuple[float, ...], ...]) -> None:
+    # distance_map returns dist for these arguments instead of running the BFS
+    _precomputed[(rows, cols, obstacles, source)] = dist
+    if len(_precomputed) > _PRECOMPUTED_SIZE:
+        del _precomputed[next(iter(_precomputed))]
+
+
+def distance_map(rows: int, cols: int, obstacles: FrozenSet[Tuple[int, int]],
+                 source: Tuple[int, int]) -> Tuple[Tuple[float, ...], ...]:
+    # True walking distance from source over the static layer; INF if unreachable
+    known = _precomputed.get((rows, cols, obstacles, source))
+    if known is not None:
+        return known
+    return _bfs_distance_map(rows, cols, obstacles, source)
+
+
+@lru_cache(maxsize=256)
+def _bfs_distance_map(rows: int, cols: int, obstacles: FrozenSet[Tuple[int, int]],
+                      source: Tuple[int, int]) -> Tuple[Tuple[float, ...], ...]:
+    dist = [[INF] * cols for _ in range(rows)]
+    dist[source[0]][source[1]] = 0
+    queue = collections.deque([source])
+    while queue:
+        r, c = queue.popleft()
+        d = dist[r][c] + 1
+        for dr, dc in _DIRS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and (nr, nc) not in obstacles and dist[nr][nc] == INF:
+                dist[nr][nc] = d
+                queue.append((nr, nc))
+    return tuple(tuple(row) for row in dist)
+
+
+class DistanceHeuristic:
+    """Admissible lower bound on the moves left to win.
+
+    With coins left, the player must reach some coin, then visit the others and
+    finish on the goal. That is at least the distance to the nearest coin plus
+    the minimum spanning tree over the remaining coins and the goal. A coin can
+    also be destroyed by pushing ice onto it, which the player does from the
+    next cell, so when the level has ice every coin counts as a radius-1 target.
+    """
+
+    def __init__(self, state: GameState, engine=game_logic):
+        self.engine = engine
+        rows, cols = len(state.board), len(state.board[0])
+        obstacles = static_obstacles(state)
+        self.goal_pos = game_logic.get_goal_pos(state)
+        self.coins = tuple((r, c) for r, row in enumerate(state.board)
+                           for c, cell in enumerate(row) if cell == COIN)
+        has_ice = any(ICE in row for row in state.board)
+        self.coin_radius = 1 if has_ice else 0
+
+        self.goal_dist = distance_map(rows, cols, obstacles, self.goal_pos) if self.goal_pos else None
+        self.coin_dist = tuple(distance_map(rows, cols, obstacles, coin) for coin in self.coins)
+        # edge weights between coins (by index) and the goal (index len(coins))
+        targets = self.coins + ((self.goal_pos,) if self.goal_pos else ())
+        radii = [self.coin_radius] * len(self.coins) + [0]
+        self.edges = [[max(0, self._dist_between(i, t) - radii[i] - radii[j])
+                       for j, t in enumerate(targets)] for i in range(len(targets))]
+        self._mst_cache: Dict[FrozenSet[int], float] = {}
+
+    def _dist_between(self, i: int, target: Tuple[int, int]) -> float:
+        dist = self.coin_dist[i] if i < len(self.coins) else self.goal_dist
+        return dist[target[0]][target[1]]
+
+    def _mst(self, nodes: FrozenSet[int]) -> float:
+        cached = self._mst_cache.get(nodes)
+        if cached is not None:
+            return cached
+        # Prim's algorithm on the (small) complete graph of remaining targets
+        remaining = set(nodes)
+        start = remaining.pop()
+        best = {n: self.edges[start][n] for n in remaining}
+        total = 0
+        while best:
+            n = min(best, key=best.get)
+            total += best.pop(n)
+            for m in best:
+                if self.edges[n][m] < best[m]:
+                    best[m] = self.edges[n][m]
+        self._mst_cache[nodes] = total
+        return total
+
+    def __call__(self, state) -> float:
+        if self.goal_pos is None or self.engine.get_goal_pos(state) is None:
+            return INF
+        pr, pc = state.player_pos
+        left = [i for i, coin in enumerate(self.coins) if self.engine.has_coin(state, coin)]
+        if not left:
+            return self.goal_dist[pr][pc]
+        nearest = min(max(0, self.coin_dist[i][pr][pc] - self.coin_radius) for i in left)
+        return nearest + self._mst(frozenset(left + [len(self.coins)]))
+
+
+class LavaSchedule:
+    """Earliest step from which lava is certain to make each cell deadly.
+
+    Computed once from the state a search starts in (step 0). Lava only counts
+    where nothing can stop it: cells no ice can ever be pushed onto, that water
+    cannot reach first, filled through empty cells and expiring counters. The
+    player dies on a lava cell and next to one, so a cell becomes deadly one
+    step after a neighbour turns to lava. Since the lava counted here never
+    leaves, is_doomed() can discard a state whose player cannot reach the goal
+    or a coin it still needs before those cells turn deadly.
+    """
+
+    def __init__(self, state: GameState):
+        board = state.board
+        rows, cols = len(board), len(board[0])
+        self.rows, self.cols = rows, cols
+        obstacles = static_obstacles(state)
+        cells = [(r, c) for r in range(rows) for c in range(cols)]
+
+        def neighbours(r, c):
+            for dr, dc in _DIRS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < rows and 0 <= nc < cols:
+                    yield nr, nc
+
+        def flood(sources, passable):
+            dist = {cell: 0 for cell in sources}
+            queue = collections.deque(sources)
+            while queue:
+                cell = queue.popleft()
+                if not passable(*cell):
+                    continue
+                for n in neighbours(*cell):
+                    if n not in dist and n not in obstacles:
+                        dist[n] = dist[cell] + 1
+                        queue.append(n)
+            return dist
+
+        # Every cell an ice block might ever be pushed onto: ice moves from x to
+        # x+d only into a cell it may enter and with room for the player at x-d
+        no_ice = obstacles | {cell for cell in cells if board[cell[0]][cell[1]] in
+                              (GOAL, game_logic.MESH, game_logic.MESH_LAVA, game_logic.MESH_WATER)}
+        ice_reach = {cell for cell in cells if board[cell[0]][cell[1]] == ICE}
+        queue = collections.deque(ice_reach)
+        while queue:
+            r, c = queue.popleft()
+            for dr, dc in _DIRS:
+                dest, behind = (r + dr, c + dc), (r - dr, c - dc)
+                if (dest not in ice_reach and 0 <= dest[0] < rows and 0 <= dest[1] < cols
+                        and dest not in no_ice and 0 <= behind[0] < rows and 0 <= behind[1] < cols
+                        and behind not in obstacles):
+                    ice_reach.add(dest)
+                    queue.append(dest)
+        # Lower bound on the step water could first reach each cell (meshes soak it up)
+        water_lb = flood([cell for cell in cells if board[cell[0]][cell[1]] == game_logic.WATER],
+                         lambda r, c: board[r][c] not in (GOAL, game_logic.MESH))
+
+        # Certain lava arrival, Dijkstra over empty cells and counters (free once expired)
+        certain = {}
+        heap = [(0, cell) for cell in cells
+                if board[cell[0]][cell[1]] == game_logic.LAVA and cell not in ice_reach]
+        while heap:
+            step, cell = heapq.heappop(heap)
+            if cell in certain:
+                continue
+            certain[cell] = step
+            for n in neighbours(*cell):
+                kind = board[n[0]][n[1]]
+                if n in certain or n in ice_reach or not (kind == game_logic.EMPTY or kind.isdigit()):
+                    continue
+                arrival = max(step + 1, int(kind) if kind.isdigit() else 0)
+                if water_lb.get(n, INF) > arrival:
+                    heapq.heappush(heap, (arrival, n))
+
+        deadline = {}
+        for (r, c), step in certain.items():
+            deadline[(r, c)] = min(deadline.get((r, c), INF), step)
+            for n in neighbours(r, c):
+                deadline[n] = min(deadline.get(n, INF), step + 1)
+        self.deadline = deadline
+
+        # alive[t]: bitmask of open cells the player may still occupy at step t
+        open_mask = 0
+        for r, c in cells:
+            if (r, c) not in obstacles:
+                open_mask |= 1 << (r * cols + c)
+        self.horizon = max(deadline.values(), default=0)
+        self.alive = []
+        for t in range(self.horizon + 1):
+            dead = 0
+            for (r, c), step in deadline.items():
+                if step <= t:
+                    dead |= 1 << (r * cols + c)
+            self.alive.append(open_mask & ~dead)
+        self.full = (1 << (rows * cols)) - 1
+        first_col = sum(1 << (r * cols) for r in range(rows))
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (cols - 1))
+
+        self.goal_pos = game_logic.get_goal_pos(state)
+        self.coins = tuple((r, c) for r, row in enumerate(board)
+                           for c, cell in enumerate(row) if cell == COIN)
+        has_ice = any(ICE in row for row in board)
+        # a coin can be removed from the next cell by pushing ice onto it
+        self.coin_masks = tuple(self._mask_around(coin, has_ice) for coin in self.coins)
+        self._doomed_cache: Dict[Tuple, bool] = {}
+
+    def _bit(self, pos: Tuple[int, int]) -> int:
+        return 1 << (pos[0] * self.cols + pos[1])
+
+    def _mask_around(self, pos: Tuple[int, int], with_neighbours: bool) -> int:
+        mask = self._bit(pos)
+        return mask | self._spread(mask) if with_neighbours else mask
+
+    def _spread(self, mask: int) -> int:
+        return (((mask << 1) & self.not_first_col) | ((mask >> 1) & self.not_last_col)
+                | ((mask << self.cols) & self.full) | (mask >> self.cols))
+
+    def is_doomed(self, state, step: int, engine=game_logic) -> bool:
+        if not self.deadline or self.goal_pos is None:
+            return False
+        # the answer only depends on where the player is, which coins are
+        # left and the step (nothing changes after the horizon)
+        left = tuple(engine.has_coin(state, coin) for coin in self.coins)
+        key = (state.player_pos, min(step, self.horizon), left)
+        doomed = self._doomed_cache.get(key)
+        if doomed is None:
+            doomed = self._doomed_cache[key] = self._cut_off(state.player_pos, key[1], left)
+        return doomed
+
+    def _cut_off(self, player_pos: Tuple[int, int], step: int, left: Tuple[bool, ...]) -> bool:
+        targets = [self._bit(self.goal_pos)]
+        targets += [mask for mask, present in zip(self.coin_masks, left) if present]
+
+        # earliest-arrival flood from the player; deadlines only ever tighten,
+        # so arriving earlier is never worse and each cell is entered once
+        reached = frontier = self._bit(player_pos)
+        alive, horizon = self.alive, self.horizon
+        while frontier:
+            if all(reached & target for target in targets):
+                return False
+            step += 1
+            frontier = self._spread(frontier) & alive[min(step, horizon)] & ~reached
+            reached |= frontier
+        return not all(reached & target for target in targets)
@@ -0,0 +1,181 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import Counter
+try:
+    import resource
+except ImportError:         # not available on Windows
+    resource = None
+
+# Instrumentation shared by all solvers:
+#
+#   solver = AStarSolver(engine=game_bitboard,
+#                        instrumentation=Instrumentation(progress=print_progress, timing=True))
+#
+# progress(snapshot) is called about every `interval` seconds during the search
+# with a dict holding: solver, elapsed, expanded, generated, nodes_per_sec,
+# frontier, visited, bound (depth for BFS/DFS, path cost for UCS, f for A*,
+# h for greedy) and peak_memory_kb.
+#
+# timing=True adds "timings" to the results: seconds spent per primitive
+# (expand, transitions, apply, goal_test, hashing, heuristic, deadlock, queue,
+# store); expand covers the successor generation the solvers do in one call.
+# Each timed call pays for two clock reads, so leave it off when measuring
+# plain speed. profile='cprofile' or 'tracemalloc' adds a "profile" report.
+#
+# Budgets are enforced here too: start() takes a time limit (seconds) and a
+# memory limit (MB of resident memory), and tick() returns True once one is
+# used up, which tells the solver to stop. The results then carry
+# "budget_exhausted": 'time' or 'memory' (None when the search ran out by itself).
+
+PROGRESS_EVERY = 256        # expansions between two looks at the clock
+PROFILE_MODES = (None, 'cprofile', 'tracemalloc')
+
+# engine function -> primitive it is timed under
+_PRIMITIVES = {
+    'expand': 'expand',
+    'get_available_transitions': 'transitions',
+    'would_cause_immediate_death': 'transitions',
+    'apply_transition': 'apply',
+    'is_goal': 'goal_test',
+    'is_terminal': 'goal_test',
+    'state_id': 'hashing',
+    'pack_state': 'store',
+    'unpack_state': 'store',
+}
+
+
+def peak_memory_kb():
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def current_memory_kb():
+    # Resident set size now; where /proc is missing, the peak is the best we have
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return peak_memory_kb()
+
+
+def print_progress(snapshot, file=None):
+    bound = snapshot['bound']
+    print(f"[{snapshot['solver']}] {snapshot['elapsed']:7.1f}s "
+          f"expanded={snapshot['expanded']} generated={snapshot['generated']} "
+          f"({snapshot['nodes_per_sec']:.0f}/s) frontier={snapshot['frontier']} "
+          f"visited={snapshot['visited']} bound={bound if bound is not None else '-'} "
+          f"mem={snapshot['peak_memory_kb']}kB", file=file or sys.stderr)
+
+
+class _TimedEngine:
+    # Stands in for an engine module, timing the functions in _PRIMITIVES
+    def __init__(self, engine, instrumentation):
+        self._engine = engine
+        for name, primitive in _PRIMITIVES.items():
+            if hasattr(engine, name):
+                setattr(self, name, instrumentation.timed(primitive, getattr(engine, name)))
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+class Instrumentation:
+    def __init__(self, progress=None, interval=1.0, timing=False, profile=None):
+        if profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{profile}'")
+        self.progress = progress
+        self.interval = interval
+        self.timing = timing
+        self.profile = profile
+        self.timings = Counter()
+        self.solver_name = None
+        self.start_time = 0.0
+        self.deadline = None
+        self.memory_limit_kb = None
+        self.exhausted = None
+        self._next_report = 0.0
+        self._profiler = None
+
+    def start(self, solver_name, time_limit=None, memory_limit_mb=None):
+        self.solver_name = solver_name
+        self.timings = Counter()
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + time_limit if time_limit is not None else None
+        self.memory_limit_kb = memory_limit_mb * 1024 if memory_limit_mb is not None else None
+        self.exhausted = None
+        self._next_report = self.start_time + self.interval
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'tracemalloc':
+            tracemalloc.start()
+        return self
+
+    def engine(self, engine):
+        return _TimedEngine(engine, self) if self.timing else engine
+
+    def timed(self, primitive, fn):
+        if not self.timing:
+            return fn
+        timings = self.timings
+        clock = time.perf_counter
+
+        def timed_fn(*args):
+            start = clock()
+            try:
+                return fn(*args)
+            finally:
+                timings[primitive] += clock() - start
+        return timed_fn
+
+    def tick(self, expanded, generated, frontier=None, visited=None, bound=None):
+        # Solvers call this every PROGRESS_EVERY expansions and stop when it
+        # returns True (a budget is used up)
+        now = time.perf_counter()
+        if self.deadline is not None and now >= self.deadline:
+            self.exhausted = 'time'
+        elif self.memory_limit_kb is not None and (current_memory_kb() or 0) >= self.memory_limit_kb:
+            self.exhausted = 'memory'
+        if self.progress is not None and now >= self._next_report:
+            self._next_report = now + self.interval
+            self.progress(self.snapshot(expanded, generated, frontier, visited, bound, now))
+        return self.exhausted is not None
+
+    def snapshot(self, expanded, generated, frontier=None, visited=None, bound=None, now=None):
+        elapsed = (now or time.perf_counter()) - self.start_time
+        return {
+            "solver": self.solver_name,
+            "elapsed": elapsed,
+            "expanded": expanded,
+            "generated": generated,
+            "nodes_per_sec": expanded / elapsed if elapsed > 0 else 0.0,
+            "frontier": frontier,
+            "visited": visited,
+            "bound": bound,
+            "peak_memory_kb": peak_memory_kb(),
+        }
+
+    def finish(self, results):
+        results["budget_exhausted"] = self.exhausted
+        if self.timing:
+            results["timings"] = dict(self.timings)
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(30)
+            results["profile"] = out.getvalue()
+            self._profiler = None
+        elif self.profile == 'tracemalloc' and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:20]
+            tracemalloc.stop()
+            results["profile"] = '\n'.join([f"traced peak: {peak / 1024:.0f} KiB"]
+                                           + [str(stat) for stat in top])
+        return results
@@ -0,0 +1,335 @@
+import argparse
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import game_logic
+import game_bitboard
+from game_state import GameState
+from game_heuristics import INF, add_distance_map, distance_map, static_obstacles
+
+# Compiled levels: the parsed board plus the tables every run would otherwise
+# rebuild, in one binary blob that is read through mmap without copying.
+#
+#   state = load_level('level3.txt')                          # a GameState
+#   level, state = load_level('level3.txt', game_bitboard)    # like game_bitboard.parse_level_file
+#
+# load_level keeps the blob next to the text file (level3.lvl) and recompiles
+# it when the hash of the text no longer matches. A pack holds many levels in
+# one file and opens in a single pass:
+#
+#   python game_levels.py generated/*.txt --pack generated.lvp
+#   levels = load_pack('generated.lvp')           # name -> CompiledLevel
+#
+# Blob layout, little endian, every array 8-byte aligned:
+#   header   magic, version, blake2b of the text, rows, cols, player (r, c),
+#            zobrist hash of the GameState and of the BitboardState
+#   zobrist  uint64[8][cells]   game_bitboard's tables: the 7 dynamic layers and the player
+#   masks    11 bitboard masks of ceil(cells / 8) bytes each, in MASKS order
+#   nbrs     int16[cells][4]    neighbour index per DIRECTIONS entry, -1 off the board
+#   cells    uint16[cells]      CELL_CODES of the cell, or COUNTER_BIT | n for a counter n
+#   goal     uint16[cells]      walking distance to the goal over walls and blocks,
+#                               UNREACHABLE when there is none
+#
+# Once a state is taken from a CompiledLevel, its goal distances are handed to
+# game_heuristics.distance_map, so DistanceHeuristic on that state skips the BFS.
+
+MAGIC = b'LAQL'
+PACK_MAGIC = b'LAQP'
+VERSION = 2
+COUNTER_BIT = 0x8000
+UNREACHABLE = 0xFFFF
+_HEADER = struct.Struct('<4sH16sHHHH2xQQ')
+_PACK_HEADER = struct.Struct('<4sH2xQ')
+_PACK_ENTRY = struct.Struct('<QQII')        # blob offset, blob size, name offset, name size
+_ZOBRIST_TABLES = 8
+MASKS = ('wall', 'goal', 'mesh', 'lava', 'water', 'ice', 'block', 'mesh_lava', 'mesh_water',
+         'coin', 'counter')
+_DYNAMIC_MASKS = MASKS[3:]
+# mesh cells holding lava or water are two characters, so cells are stored by code
+CELL_CODES = {game_logic.EMPTY: 0, game_logic.WALL: 1, game_logic.GOAL: 2, game_logic.LAVA: 3,
+              game_logic.WATER: 4, game_logic.ICE: 5, game_logic.BLOCK: 6, game_logic.MESH: 7,
+              game_logic.COIN: 8, game_logic.MESH_LAVA: 9, game_logic.MESH_WATER: 10}
+CODE_CELLS = {code: cell for cell, code in CELL_CODES.items()}
+
+
+def source_hash(text):
+    return hashlib.blake2b(text, digest_size=16).digest()
+
+
+def compiled_path(level_file):
+    return os.path.splitext(level_file)[0] + '.lvl'
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def compile_level(level_file, text=None):
+    # The blob for one level file (text: its bytes, if already read)
+    if text is None:
+        with open(level_file, 'rb') as f:
+            text = f.read()
+    state = game_logic.parse_level_file(level_file)
+    rows, cols = len(state.board), len(state.board[0])
+    bitboard = game_bitboard.from_game_state(state)
+    level = bitboard.level
+    if len(level.zobrist) != _ZOBRIST_TABLES:
+        raise ValueError("game_bitboard's zobrist tables changed, bump VERSION")
+
+    cells = []
+    for row in state.board:
+        for cell in row:
+            if cell.isdigit():
+                if int(cell) >= COUNTER_BIT:
+                    raise ValueError(f"counter {cell} is too large to compile")
+                cells.append(COUNTER_BIT | int(cell))
+            elif cell in CELL_CODES:
+                cells.append(CELL_CODES[cell])
+            else:
+                raise ValueError(f"cannot compile cell '{cell}'")
+    goal_pos = game_logic.get_goal_pos(state)
+    goal = [UNREACHABLE] * (rows * cols)
+    if goal_pos is not None:
+        distances = distance_map(rows, cols, static_obstacles(state), goal_pos)
+        goal = [UNREACHABLE if d == INF else min(d, UNREACHABLE - 1) for row in distances for d in row]
+
+    n = rows * cols
+    neighbours = [-1 if idx is None else idx for cell in level.neighbours for idx in cell]
+    masks = [getattr(level, name) for name in MASKS[:3]] + [getattr(bitboard, name) for name in _DYNAMIC_MASKS]
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, source_hash(text), rows, cols, *state.player_pos,
+                     state.zobrist, bitboard.zobrist),
+        struct.pack(f'<{_ZOBRIST_TABLES * n}Q', *[key for table in level.zobrist for key in table]),
+        b''.join(mask.to_bytes((n + 7) // 8, 'little') for mask in masks),
+        struct.pack(f'<{4 * n}h', *neighbours),
+        struct.pack(f'<{n}H', *cells),
+        struct.pack(f'<{n}H', *goal),
+    ]
+    return b''.join(part.ljust(_align(len(part)), b'\0') for part in parts)
+
+
+class CompiledLevel:
+    # Views over one blob (bytes, mmap or a slice of a pack); nothing is
+    # copied until a state is asked for
+    def __init__(self, buffer, offset=0):
+        view = memoryview(buffer)[offset:]
+        if len(view) < _HEADER.size:
+            raise ValueError("compiled level is truncated")
+        (magic, version, self.source_hash, self.rows, self.cols, pr, pc,
+         self.state_zobrist, self.bitboard_zobrist) = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("not a compiled level")
+        if version != VERSION:
+            raise ValueError(f"compiled level version {version}, expected {VERSION}")
+        self.player_pos = (pr, pc)
+        n = self.rows * self.cols
+        self.mask_size = (n + 7) // 8
+        sections = (('Q', 8 * _ZOBRIST_TABLES * n), ('B', len(MASKS) * self.mask_size),
+                    ('h', 2 * 4 * n), ('H', 2 * n), ('H', 2 * n))
+        if len(view) < _HEADER.size + sum(_align(size) for _, size in sections):
+            raise ValueError("compiled level is truncated")
+        start = _HEADER.size
+        arrays = []
+        for code, size in sections:
+            arrays.append(view[start:start + size].cast(code))
+            start += _align(size)
+        self.zobrist, self.masks, self.neighbours, self.cells, self.goal_distance = arrays
+        self.size = start
+        # states are immutable, so each is decoded once and then shared
+        self._game_state = None
+        self._level = None
+        self._goal_added = False
+
+    def _add_goal_map(self):
+        # Keyed like DistanceHeuristic asks for it: walls and blocks of the
+        # level as stored, and the first goal cell
+        self._goal_added = True
+        codes = self.cells.tolist()
+        goal = CELL_CODES[game_logic.GOAL]
+        if goal not in codes:
+            return
+        cols = self.cols
+        walls = (CELL_CODES[game_logic.WALL], CELL_CODES[game_logic.BLOCK])
+        obstacles = frozenset(divmod(idx, cols) for idx, v in enumerate(codes) if v in walls)
+        add_distance_map(self.rows, cols, obstacles, divmod(codes.index(goal), cols),
+                         self.goal_distances())
+
+    def game_state(self):
+        if not self._goal_added:
+            self._add_goal_map()
+        if self._game_state is None:
+            cols = self.cols
+            cells = [_cell_string(v) for v in self.cells.tolist()]
+            board = tuple(tuple(cells[r * cols:(r + 1) * cols]) for r in range(self.rows))
+            self._game_state = GameState(board=board, player_pos=self.player_pos,
+                                         zobrist=self.state_zobrist)
+        return self._game_state
+
+    def mask(self, name):
+        i = MASKS.index(name) * self.mask_size
+        return int.from_bytes(self.masks[i:i + self.mask_size], 'little')
+
+    def bitboard_level(self):
+        if self._level is None:
+            n = self.rows * self.cols
+            nbrs = iter([None if idx < 0 else idx for idx in self.neighbours.tolist()])
+            zobrist = tuple(tuple(self.zobrist[t * n:(t + 1) * n].tolist())
+                            for t in range(_ZOBRIST_TABLES))
+            self._level = game_bitboard.Level.compile(
+                self.rows, self.cols, self.mask('wall'), self.mask('goal'), self.mask('mesh'),
+                tuple(zip(nbrs, nbrs, nbrs, nbrs)), zobrist)
+        return self._level
+
+    def bitboard_state(self):
+        if not self._goal_added:
+            self._add_goal_map()
+        counters = tuple((idx, v ^ COUNTER_BIT) for idx, v in enumerate(self.cells.tolist())
+                         if v & COUNTER_BIT)
+        pr, pc = self.player_pos
+        return game_bitboard.BitboardState(
+            self.bitboard_level(), *[self.mask(name) for name in _DYNAMIC_MASKS],
+            counters=counters, player=pr * self.cols + pc, zobrist=self.bitboard_zobrist)
+
+    def goal_distances(self):
+        # Rows of walking distances to the goal, INF where it cannot be reached,
+        # as game_heuristics.distance_map gives them
+        cols = self.cols
+        flat = [INF if d == UNREACHABLE else d for d in self.goal_distance.tolist()]
+        return tuple(tuple(flat[r * cols:(r + 1) * cols]) for r in range(self.rows))
+
+    def release(self):
+        # The views pin the buffer; an mmap cannot close while they exist
+        for array in (self.zobrist, self.masks, self.neighbours, self.cells, self.goal_distance):
+            array.release()
+
+
+def _cell_string(code):
+    if code & COUNTER_BIT:
+        return str(code ^ COUNTER_BIT)
+    try:
+        return CODE_CELLS[code]
+    except KeyError:
+        raise ValueError(f"unknown cell code {code} in compiled level") from None
+
+
+def _map(filename):
+    with open(filename, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_atomic(filename, data):
+    # The file is replaced in one step, so a reader never sees half of it;
+    # a read-only directory only costs the cache
+    tmp = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, filename)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def open_level(level_file):
+    # The CompiledLevel for a level file, compiled (and cached) when missing or stale
+    with open(level_file, 'rb') as f:
+        text = f.read()
+    cached = compiled_path(level_file)
+    try:
+        buffer = _map(cached)
+    except (OSError, ValueError):       # missing, or empty (mmap refuses those)
+        buffer = None
+    if buffer is not None:
+        compiled = None
+        try:
+            compiled = CompiledLevel(buffer)
+        except ValueError:
+            pass
+        if compiled is not None and compiled.source_hash == source_hash(text):
+            return compiled
+        # stale or damaged: let go of the mapping, then compile it again
+        if compiled is not None:
+            compiled.release()
+        buffer.close()
+    blob = compile_level(level_file, text)
+    _write_atomic(cached, blob)
+    return CompiledLevel(blob)
+
+
+def load_level(level_file, engine=game_logic, pack=None):
+    # Drop-in for engine.parse_level_file. pack: a load_pack result, the level
+    # is taken from it when it is there
+    compiled = pack.get(level_file) if pack is not None else None
+    if compiled is None:
+        compiled = open_level(level_file)
+    if engine is game_bitboard:
+        state = compiled.bitboard_state()
+        return state.level, state
+    return compiled.game_state()
+
+
+def build_pack(level_files, pack_file):
+    blobs = [compile_level(level_file) for level_file in level_files]
+    names = [level_file.encode() for level_file in level_files]
+    index_size = _PACK_HEADER.size + _PACK_ENTRY.size * len(blobs)
+    offset = _align(index_size + sum(len(name) for name in names))
+    entries = []
+    name_offset = index_size
+    for blob, name in zip(blobs, names):
+        entries.append(_PACK_ENTRY.pack(offset, len(blob), name_offset, len(name)))
+        offset += len(blob)          # blobs are multiples of 8 already
+        name_offset += len(name)
+    head = b''.join([_PACK_HEADER.pack(PACK_MAGIC, VERSION, len(blobs))] + entries + names)
+    _write_atomic(pack_file, b''.join([head.ljust(_align(len(head)), b'\0')] + blobs))
+
+
+def load_pack(pack_file, verify=False):
+    # name -> CompiledLevel, all over one mapping of the pack. With verify,
+    # levels whose text changed (or is gone) since the pack was built raise
+    # ValueError; rebuild the pack then.
+    buffer = _map(pack_file)
+    magic, version, count = _PACK_HEADER.unpack_from(buffer)
+    if magic != PACK_MAGIC or version != VERSION:
+        raise ValueError(f"{pack_file} is not a level pack of version {VERSION}")
+    levels = {}
+    for i in range(count):
+        offset, _, name_offset, name_size = _PACK_ENTRY.unpack_from(
+            buffer, _PACK_HEADER.size + i * _PACK_ENTRY.size)
+        name = buffer[name_offset:name_offset + name_size].decode()
+        levels[name] = CompiledLevel(buffer, offset)
+    if verify:
+        for name, compiled in levels.items():
+            try:
+                with open(name, 'rb') as f:
+                    fresh = source_hash(f.read()) == compiled.source_hash
+            except OSError:
+                fresh = False
+            if not fresh:
+                raise ValueError(f"{pack_file} is stale: {name} changed")
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile level files.")
+    parser.add_argument('levels', nargs='*', help="level files (default: level*.txt)")
+    parser.add_argument('--pack', default=None, metavar='FILE',
+                        help="write one pack with every level instead of a .lvl per level")
+    args = parser.parse_args(argv)
+
+    levels = args.levels or sorted(glob.glob('level*.txt'))
+    if args.pack:
+        build_pack(levels, args.pack)
+        print(f"{len(levels)} levels -> {args.pack}", file=sys.stderr)
+    else:
+        for level_file in levels:
+            open_level(level_file)
+            print(f"{level_file} -> {compiled_path(level_file)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
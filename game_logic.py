@@ -1,6 +1,7 @@
 import copy
+import struct
 from typing import List, Tuple, Optional
-from game_state import GameState
+from game_state import GameState, zobrist_key
 
 # --- Constants for cell types ---
 PLAYER = '@'
@@ -17,9 +18,13 @@ MESH_LAVA = 'ML'
 MESH_WATER = 'MW'
 ICE_PUSH_ALLOWED = (EMPTY, WATER, LAVA, COIN)
 
-def state_id(state: 'GameState') -> tuple:    
-    board_str = '|'.join(','.join(row) for row in state.board)
-    return (state.player_pos, board_str)
+def state_id(state: 'GameState') -> int:
+    # 64-bit Zobrist hash, kept up to date by apply_transition
+    return state.zobrist
+
+
+def _cell_hash(r, c, cell) -> int:
+    return 0 if cell == EMPTY else zobrist_key(r, c, cell)
 
 
 def _in_bounds(board, r, c):
@@ -81,11 +86,7 @@ def would_cause_immediate_death(state: 'GameState', action: str) -> bool:
 
 
 def count_lava(state: GameState) -> int:
-    
-    count = 0
-    for row in state.board:
-        count += row.count(LAVA)      
-    return count
+    return state.lava_count
 
 def pretty_print_board(board):
     for row in board:
@@ -141,10 +142,84 @@ def get_available_transitions(state: GameState) -> List[str]:
         
     return moves
 
+_SPREAD_DIRS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+# what each fluid changes when it spreads into a neighbour
+_SPREAD_TARGETS = {LAVA: (EMPTY, PLAYER, MESH, WATER), WATER: (EMPTY, PLAYER, MESH)}
+
+
+def _can_spread(board, r, c) -> bool:
+    targets = _SPREAD_TARGETS.get(board[r][c])
+    if targets is None:
+        return False
+    rows, cols = len(board), len(board[0])
+    for dr, dc in _SPREAD_DIRS:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < rows and 0 <= nc < cols and board[nr][nc] in targets:
+            return True
+    return False
+
+
+def _dynamic_cells(state: GameState):
+    # Lava/water frontiers and counting cells of a state, derived with one
+    # full scan the first time a state built outside apply_transition needs them
+    if state.counter_cells is None:
+        lava_frontier, water_frontier, counter_cells = set(), set(), []
+        for r, row in enumerate(state.board):
+            for c, cell in enumerate(row):
+                if cell.isdigit():
+                    counter_cells.append((r, c))
+                elif cell == LAVA and _can_spread(state.board, r, c):
+                    lava_frontier.add((r, c))
+                elif cell == WATER and _can_spread(state.board, r, c):
+                    water_frontier.add((r, c))
+        object.__setattr__(state, 'lava_frontier', frozenset(lava_frontier))
+        object.__setattr__(state, 'water_frontier', frozenset(water_frontier))
+        object.__setattr__(state, 'counter_cells', tuple(counter_cells))
+    return state.lava_frontier, state.water_frontier, state.counter_cells
+
+
 def apply_transition(state: GameState, action: str) -> GameState:
     if action not in get_available_transitions(state):
         return state
+    return _apply_move(state, action)
 
+
+_MOVES = (('w', -1, 0), ('s', 1, 0), ('a', 0, -1), ('d', 0, 1))
+_BLOCKING = (WALL, BLOCK, MESH)
+
+
+def expand(state: GameState) -> List[Tuple[str, Optional[GameState], bool, bool]]:
+    # Every legal move as (action, successor, is_goal, is_dead), in one pass
+    # and without apply_transition's legality check. A move onto lava is dead
+    # before anything spreads, so its successor is not built (None).
+    board = state.board
+    rows, cols = len(board), len(board[0])
+    r, c = state.player_pos
+    successors = []
+    for action, dr, dc in _MOVES:
+        nr, nc = r + dr, c + dc
+        if not (0 <= nr < rows and 0 <= nc < cols):
+            continue
+        target = board[nr][nc]
+        if target in _BLOCKING or target.isdigit():
+            continue
+        if target == ICE:
+            ice_r, ice_c = nr + dr, nc + dc
+            if not (0 <= ice_r < rows and 0 <= ice_c < cols) or board[ice_r][ice_c] not in ICE_PUSH_ALLOWED:
+                continue
+        elif target == LAVA:
+            successors.append((action, None, False, True))
+            continue
+        new_state = _apply_move(state, action)
+        under = new_state.board[nr][nc]
+        successors.append((action, new_state, under == GOAL and new_state.coin_count == 0, under == LAVA))
+    return successors
+
+
+def _apply_move(state: GameState, action: str) -> GameState:
+    # The move itself, for an action already known to be legal
+    lava_frontier, water_frontier, counter_cells = _dynamic_cells(state)
+    lava_count, water_count, coin_count = state.lava_count, state.water_count, state.coin_count
     new_board_list = [list(row) for row in state.board]
     r, c = state.player_pos
     dr, dc = 0, 0
@@ -155,10 +230,14 @@ def apply_transition(state: GameState, action: str) -> GameState:
 
     new_r, new_c = r + dr, c + dc
     target_cell = new_board_list[new_r][new_c]
+    rows, cols = len(new_board_list), len(new_board_list[0])
+    # cells that may have been written, for the incremental Zobrist update
+    touched = set()
+    # cells that became EMPTY before spreading; their fluid neighbours can spread again
+    newly_empty = []
 
     # Handle ice pushing
     if target_cell == ICE:
-        rows, cols = len(new_board_list), len(new_board_list[0])
         ice_new_r, ice_new_c = new_r + dr, new_c + dc
         if not (0 <= ice_new_r < rows and 0 <= ice_new_c < cols):
             return state
@@ -167,12 +246,16 @@ def apply_transition(state: GameState, action: str) -> GameState:
         if dest in ICE_PUSH_ALLOWED:
             new_board_list[ice_new_r][ice_new_c] = ICE            
             new_board_list[new_r][new_c] = EMPTY
+            touched.update(((ice_new_r, ice_new_c), (new_r, new_c)))
+            newly_empty.append((new_r, new_c))
         else:
             return state
 
 
     if target_cell == COIN:
         new_board_list[new_r][new_c] = EMPTY
+        touched.add((new_r, new_c))
+        newly_empty.append((new_r, new_c))
  
     old_under = new_board_list[r][c]
     if old_under == PLAYER:
@@ -181,48 +264,63 @@ def apply_transition(state: GameState, action: str) -> GameState:
     
     new_player_pos = (new_r, new_c)
 
-    # Update numbered squares
-    for r_idx, row in enumerate(new_board_list):
-        for c_idx, cell in enumerate(row):
-            if cell.isdigit():
-                num = int(cell) - 1
-                new_board_list[r_idx][c_idx] = str(num) if num > 0 else EMPTY
+    # Update numbered squares, only the ones still counting down
+    remaining_counters = []
+    for r_idx, c_idx in counter_cells:
+        num = int(new_board_list[r_idx][c_idx]) - 1
+        if num > 0:
+            new_board_list[r_idx][c_idx] = str(num)
+            remaining_counters.append((r_idx, c_idx))
+        else:
+            new_board_list[r_idx][c_idx] = EMPTY
+            newly_empty.append((r_idx, c_idx))
+        touched.add((r_idx, c_idx))
+
+    # Spread Lava and Water, starting only from the frontier cells
+    lava_sources = set(lava_frontier)
+    water_sources = set(water_frontier)
+    for er, ec in newly_empty:
+        for dr_spread, dc_spread in _SPREAD_DIRS:
+            nr, nc = er + dr_spread, ec + dc_spread
+            if 0 <= nr < rows and 0 <= nc < cols:
+                if new_board_list[nr][nc] == LAVA: lava_sources.add((nr, nc))
+                elif new_board_list[nr][nc] == WATER: water_sources.add((nr, nc))
 
-    # Spread Lava and Water
     new_lava = set()
     new_water = set()
     water_to_block = set()
     new_mesh_lava = set()
     new_mesh_water = set()
-    rows, cols = len(new_board_list), len(new_board_list[0])
-    
-    player_dies_this_turn = False
 
-    for r_idx in range(rows):
-        for c_idx in range(cols):
-            cell = new_board_list[r_idx][c_idx]
-            if cell in [LAVA, WATER]:
-                spread_char = LAVA if cell == LAVA else WATER
-                for dr_spread, dc_spread in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    nr, nc = r_idx + dr_spread, c_idx + dc_spread
-                    if not (0 <= nr < rows and 0 <= nc < cols):
-                        continue
-
-                    target = new_board_list[nr][nc]
-
-                    is_treat_as_empty = (target == EMPTY or target == PLAYER)
-                                        
-                    if (nr, nc) == new_player_pos and spread_char == LAVA:
-                        player_dies_this_turn = True
-
-                    if is_treat_as_empty:
-                        if spread_char == LAVA: new_lava.add((nr, nc))
-                        else: new_water.add((nr, nc))
-                    elif target == MESH:
-                        if spread_char == LAVA: new_mesh_lava.add((nr, nc))
-                        else: new_mesh_water.add((nr, nc))
-                    elif spread_char == LAVA and target == WATER:
-                        water_to_block.add((nr, nc))
+    # Lava next to the player spreads onto them
+    player_dies_this_turn = False
+    for dr_spread, dc_spread in _SPREAD_DIRS:
+        nr, nc = new_r + dr_spread, new_c + dc_spread
+        if 0 <= nr < rows and 0 <= nc < cols and new_board_list[nr][nc] == LAVA:
+            player_dies_this_turn = True
+
+    for sources, spread_char in ((lava_sources, LAVA), (water_sources, WATER)):
+        for r_idx, c_idx in sources:
+            # a frontier cell may have been covered by pushed ice
+            if new_board_list[r_idx][c_idx] != spread_char:
+                continue
+            for dr_spread, dc_spread in _SPREAD_DIRS:
+                nr, nc = r_idx + dr_spread, c_idx + dc_spread
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+
+                target = new_board_list[nr][nc]
+
+                is_treat_as_empty = (target == EMPTY or target == PLAYER)
+
+                if is_treat_as_empty:
+                    if spread_char == LAVA: new_lava.add((nr, nc))
+                    else: new_water.add((nr, nc))
+                elif target == MESH:
+                    if spread_char == LAVA: new_mesh_lava.add((nr, nc))
+                    else: new_mesh_water.add((nr, nc))
+                elif spread_char == LAVA and target == WATER:
+                    water_to_block.add((nr, nc))
                             
     for r, c in new_lava: new_board_list[r][c] = LAVA
     for r, c in new_water: new_board_list[r][c] = WATER
@@ -233,6 +331,16 @@ def apply_transition(state: GameState, action: str) -> GameState:
     if player_dies_this_turn:
         pr, pc = new_player_pos
         new_board_list[pr][pc] = LAVA
+        touched.add(new_player_pos)
+        lava_sources.add(new_player_pos)
+
+    # Next frontier: surviving sources and fresh fluid cells that can still spread
+    next_lava_frontier = frozenset(
+        cell for cell in lava_sources | new_lava
+        if new_board_list[cell[0]][cell[1]] == LAVA and _can_spread(new_board_list, *cell))
+    next_water_frontier = frozenset(
+        cell for cell in water_sources | new_water
+        if new_board_list[cell[0]][cell[1]] == WATER and _can_spread(new_board_list, *cell))
 
     final_board_tuple = tuple(tuple(row) for row in new_board_list)
 
@@ -241,13 +349,69 @@ def apply_transition(state: GameState, action: str) -> GameState:
     # print(f"Action: {action} -> player at {new_player_pos}, cell_under = '{cell_under_player}'")
     # pretty_print_board(final_board_tuple)
 
-    return GameState(board=final_board_tuple, player_pos=new_player_pos)
+    touched.update(new_lava, new_water, water_to_block, new_mesh_lava, new_mesh_water)
+    h = state.zobrist ^ zobrist_key('@', *state.player_pos) ^ zobrist_key('@', *new_player_pos)
+    for tr, tc in touched:
+        old_cell, new_cell = state.board[tr][tc], final_board_tuple[tr][tc]
+        if old_cell != new_cell:
+            h ^= _cell_hash(tr, tc, old_cell) ^ _cell_hash(tr, tc, new_cell)
+            lava_count += (new_cell == LAVA) - (old_cell == LAVA)
+            water_count += (new_cell == WATER) - (old_cell == WATER)
+            coin_count += (new_cell == COIN) - (old_cell == COIN)
+
+    return GameState(board=final_board_tuple, player_pos=new_player_pos, zobrist=h,
+                     lava_frontier=next_lava_frontier, water_frontier=next_water_frontier,
+                     counter_cells=tuple(remaining_counters),
+                     lava_count=lava_count, water_count=water_count, coin_count=coin_count,
+                     counter_count=len(remaining_counters))
 
 def count_coins(state: GameState) -> int:
-    count = 0
-    for row in state.board:
-        count += row.count(COIN)
-    return count
+    return state.coin_count
+
+# One byte per cell for pack_state; a counter with n turns left is COUNTER_CODE + n
+_CELL_CODES = {EMPTY: 0, WALL: 1, GOAL: 2, LAVA: 3, WATER: 4, ICE: 5, BLOCK: 6, MESH: 7,
+               COIN: 8, MESH_LAVA: 9, MESH_WATER: 10}
+COUNTER_CODE = 32
+_ENCODE = {**_CELL_CODES, **{str(n): COUNTER_CODE + n for n in range(256 - COUNTER_CODE)}}
+_DECODE = tuple(next((cell for cell, c in _CELL_CODES.items() if c == code), None)
+                if code < COUNTER_CODE else str(code - COUNTER_CODE) for code in range(256))
+
+_PACKED_TAIL = struct.Struct('<HHQHHHH')
+
+def pack_state(state: GameState) -> bytes:
+    # Compact bytes for keeping a state in a search arena or sending it to
+    # another process: the cells, the player, the Zobrist hash and the counts
+    cells = b''.join(bytes(map(_ENCODE.__getitem__, row)) for row in state.board)
+    return cells + _PACKED_TAIL.pack(*state.player_pos, state.zobrist, state.lava_count,
+                                     state.water_count, state.coin_count, state.counter_count)
+
+def unpack_state(packed: bytes, like: GameState) -> GameState:
+    # like: any state of the same level, for its size
+    cols = len(like.board[0])
+    size = len(like.board) * cols
+    board = tuple(tuple(map(_DECODE.__getitem__, packed[i:i + cols])) for i in range(0, size, cols))
+    r, c, zobrist, lava, water, coins, counters = _PACKED_TAIL.unpack_from(packed, size)
+    return GameState(board=board, player_pos=(r, c), zobrist=zobrist, lava_count=lava,
+                     water_count=water, coin_count=coins, counter_count=counters)
+
+def dynamic_masks(state: GameState) -> Tuple[int, int, int, int]:
+    # (lava, ice, block, coin) as bitmasks, bit r * cols + c as in game_bitboard
+    cols = len(state.board[0])
+    masks = {LAVA: 0, ICE: 0, BLOCK: 0, COIN: 0}
+    for r, row in enumerate(state.board):
+        for c, cell in enumerate(row):
+            if cell in masks:
+                masks[cell] |= 1 << (r * cols + c)
+    return masks[LAVA], masks[ICE], masks[BLOCK], masks[COIN]
+
+def has_coin(state: GameState, pos: Tuple[int, int]) -> bool:
+    return state.board[pos[0]][pos[1]] == COIN
+
+def get_goal_pos(state: GameState) -> Optional[Tuple[int, int]]:
+    for r, row in enumerate(state.board):
+        if GOAL in row:
+            return (r, row.index(GOAL))
+    return None
 
 def is_terminal(state: GameState) -> bool:
     r, c = state.player_pos 
@@ -256,10 +420,10 @@ def is_terminal(state: GameState) -> bool:
         return True
     
     if cell_at_player_pos == GOAL:
-        return count_coins(state) == 0
+        return state.coin_count == 0
     
     return False
 
 def is_goal(state: GameState) -> bool:
     r, c = state.player_pos
-    return state.board[r][c] == GOAL and count_coins(state) == 0
\ No newline at end of file
+    return state.board[r][c] == GOAL and state.coin_count == 0
\ No newline at end of file
@@ -0,0 +1,214 @@
+import heapq
+import importlib
+import multiprocessing
+import os
+import queue
+import time
+from collections import Counter, defaultdict
+import game_logic
+from game_solver import Solver, make_heuristic
+from game_deadlock import DEFAULT_CHECKS
+
+# Hash-distributed A* (HDA*): every state belongs to the worker process
+# state_id(state) % workers, which keeps that state's open and closed entries.
+# Successors of another worker's states are batched and sent to it.
+#
+# Workers run in rounds: take in the batches sent to them, expand their open
+# nodes with f up to the lowest f any worker reported last round (at most
+# `expansions_per_round` of them), send their outgoing batches and report to
+# the coordinator (the calling process). After a round the coordinator knows how
+# many batches are still on their way, so termination is exact: the search
+# ends once none are in flight and no worker holds an open node with f below
+# the best goal cost found. With an admissible heuristic and weight 1 that
+# goal is optimal.
+
+
+def _worker(index, workers, inboxes, reports, engine_name, check_collisions, prune_doomed,
+            deadlock_checks, heuristic_mode, weight, game_state, expansions_per_round):
+    engine = importlib.import_module(engine_name)
+    solver = Solver(engine, check_collisions, prune_doomed, deadlock_checks)
+    state_key = solver.state_key
+    deadlock = solver.deadlock_detector(game_state)
+    heuristic = make_heuristic(heuristic_mode, game_state, engine)
+    template = solver.prepare_state(game_state)
+    inbox = inboxes[index]
+
+    open_list = []          # (f, tie, g, state, path)
+    g_score = {}
+    tie = 0
+    expanded = 0
+
+    def add(state, g, path, tie):
+        key = state_key(state)
+        if g >= g_score.get(key, float('inf')):
+            return tie
+        h = heuristic(state)
+        if h == float('inf'):
+            return tie
+        g_score[key] = g
+        heapq.heappush(open_list, (g + weight * h, tie + 1, g, state, path))
+        return tie + 1
+
+    # batches by the round they were sent in; a fast worker's batch for the
+    # next round can arrive before a slow one's for this round
+    received = defaultdict(list)
+
+    while True:
+        message = inbox.get()
+        if message[0] == 'nodes':
+            received[message[1]].append(message[2])
+            continue
+        if message[0] == 'stop':
+            return
+        _, round_number, expected_batches, f_limit, best_cost = message
+        while len(received[round_number - 1]) < expected_batches:
+            _, sent_in, batch = inbox.get()
+            received[sent_in].append(batch)
+
+        for batch in received.pop(round_number - 1):
+            for packed, g, path in batch:
+                tie = add(engine.unpack_state(packed, template), g, path, tie)
+
+        outgoing = [[] for _ in range(workers)]
+        goal = None
+        for _ in range(expansions_per_round):
+            if not open_list:
+                break
+            entry = heapq.heappop(open_list)
+            f, _, g, state, path = entry
+            if g > g_score[state_key(state)]:
+                continue
+            if f > f_limit or f >= best_cost or (goal is not None and f >= goal[0]):
+                # past this round's f layer, or cannot beat the best goal
+                heapq.heappush(open_list, entry)
+                break
+            expanded += 1
+            for action, new_state, won, dead in engine.expand(state):
+                if won:
+                    if goal is None or g + 1 < goal[0]:
+                        goal = (g + 1, path + action)
+                    continue
+                if dead:
+                    continue
+                if deadlock(new_state, len(path) + 1):
+                    continue
+                owner = engine.state_id(new_state) % workers
+                if owner == index:
+                    tie = add(new_state, g + 1, path + action, tie)
+                else:
+                    outgoing[owner].append((engine.pack_state(new_state), g + 1, path + action))
+
+        sent_to = []
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                inboxes[owner].put(('nodes', round_number, batch))
+                sent_to.append(owner)
+
+        while open_list and open_list[0][2] > g_score[state_key(open_list[0][3])]:
+            heapq.heappop(open_list)
+        min_f = open_list[0][0] if open_list else float('inf')
+        # tie counts the nodes that made it into the open list, which is what
+        # AStarSolver reports as generated
+        reports.put((index, sent_to, min_f, goal, tie, expanded, dict(deadlock.pruned)))
+
+
+def _next_report(reports, processes):
+    while True:
+        try:
+            return reports.get(timeout=1)
+        except queue.Empty:
+            dead = [p.exitcode for p in processes if not p.is_alive()]
+            if dead:
+                raise RuntimeError(f"HDA* worker exited with code {dead[0]}")
+
+
+class HDAStarSolver(Solver):
+    # workers defaults to the number of CPUs. Batches are plain tuples built by
+    # engine.pack_state, so no level data crosses process boundaries.
+    # Progress is reported and budgets checked once per round; timings,
+    # profiles and the memory limit only cover the coordinator, not the
+    # workers. When a budget runs out the best goal found so far is returned,
+    # without the guarantee that it is optimal.
+    name = "HDA*"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='admissible', weight=1.0,
+                 workers=None, expansions_per_round=10000, instrumentation=None,
+                 time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, instrumentation,
+                         time_limit, memory_limit_mb)
+        self.heuristic = heuristic
+        self.weight = weight
+        self.workers = workers or os.cpu_count() or 1
+        self.expansions_per_round = expansions_per_round
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = self.engine
+        game_state = self.as_game_state(initial_state)
+        initial_state = self.prepare_state(initial_state)
+        workers = self.workers
+
+        if engine.is_goal(initial_state):
+            return monitor.finish(self._results([], start_time, 1, 0, Counter(), workers=workers))
+
+        inboxes = [multiprocessing.Queue() for _ in range(workers)]
+        reports = multiprocessing.Queue()
+        processes = [multiprocessing.Process(
+            target=_worker, daemon=True,
+            args=(i, workers, inboxes, reports, engine.__name__, self.check_collisions,
+                  self.prune_doomed, self.deadlock_checks, self.heuristic, self.weight,
+                  game_state, self.expansions_per_round))
+            for i in range(workers)]
+        for process in processes:
+            process.start()
+
+        f_limit = self.weight * make_heuristic(self.heuristic, game_state, engine)(initial_state)
+        owner = engine.state_id(initial_state) % workers
+        inboxes[owner].put(('nodes', 0, [(engine.pack_state(initial_state), 0, '')]))
+        expected = [0] * workers
+        expected[owner] = 1
+        best = None                             # (cost, path)
+        generated = [0] * workers
+        expanded = [0] * workers
+        pruned = [Counter() for _ in range(workers)]
+        round_number = 0
+        try:
+            while True:
+                round_number += 1
+                best_cost = best[0] if best else float('inf')
+                for i in range(workers):
+                    inboxes[i].put(('round', round_number, expected[i], f_limit, best_cost))
+                expected = [0] * workers
+                lowest_f = float('inf')
+                for _ in range(workers):
+                    index, sent_to, min_f, goal, generated[index], expanded[index], counts = \
+                        _next_report(reports, processes)
+                    pruned[index] = Counter(counts)
+                    for owner in sent_to:
+                        expected[owner] += 1
+                    lowest_f = min(lowest_f, min_f)
+                    if goal is not None and (best is None or goal[0] < best[0]):
+                        best = goal
+                best_cost = best[0] if best else float('inf')
+                if monitor.tick(sum(expanded), sum(generated), bound=f_limit):
+                    break
+                if not any(expected):
+                    if lowest_f >= best_cost:
+                        break
+                    f_limit = lowest_f
+                else:
+                    # the nodes still in flight are not in lowest_f yet
+                    f_limit = min(f_limit, lowest_f)
+        finally:
+            for inbox in inboxes:
+                inbox.put(('stop',))
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+
+        path = list(best[1]) if best else None
+        return monitor.finish(self._results(path, start_time, sum(generated), sum(expanded),
+                                            sum(pruned, Counter()), workers=workers))
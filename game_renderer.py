@@ -2,15 +2,28 @@ import pygame
 import game_logic
 import os
 
+BACKGROUND = (20, 20, 20)
+# cells that never change once a level is loaded, pre-rendered in dirty-rect mode
+STATIC_CELLS = {game_logic.WALL: 'wall', game_logic.GOAL: 'goal', game_logic.EMPTY: 'empty'}
+
 class gameRenderer:
-    def __init__(self, width, height, tile_size):
+    def __init__(self, width, height, tile_size, dirty_rects=False, headless=False):
         pygame.init()
         self.tile_size = tile_size
         self.width = width
         self.height = height
+        # dirty_rects: redraw only the tiles that changed since the last frame
+        # and push just those rects, instead of repainting the whole window
+        self.dirty_rects = dirty_rects
+        # headless: draw on an offscreen surface and never touch the display
+        # (frame export, see game_export)
+        self.headless = headless
         
-        self.screen = pygame.display.set_mode((width, height))
-        pygame.display.set_caption("Lava and Aqua")
+        if headless:
+            self.screen = pygame.Surface((width, height))
+        else:
+            self.screen = pygame.display.set_mode((width, height))
+            pygame.display.set_caption("Lava and Aqua")
 
         self.assets = {}
         asset_names = {
@@ -23,7 +36,9 @@ class gameRenderer:
             path = f'assets/{filename}'
             try:
                 if os.path.exists(path):
-                    image = pygame.image.load(path).convert_alpha()
+                    image = pygame.image.load(path)
+                    # convert_alpha needs a display mode
+                    image = image if headless else image.convert_alpha()
                     self.assets[key] = pygame.transform.scale(image, (tile_size, tile_size))
                 else:
                     raise FileNotFoundError 
@@ -34,6 +49,17 @@ class gameRenderer:
         self.font = pygame.font.Font(None, 24)
         self.large_font = pygame.font.Font(None, 74)
 
+        # built once rather than every frame
+        self.path_surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+        self.path_surface.fill((255, 255, 0, 80))
+        self.player_overlays = {}
+        for cell, color in ((game_logic.WATER, (0, 0, 255, 120)), (game_logic.LAVA, (255, 50, 0, 160))):
+            overlay = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+            pygame.draw.circle(overlay, color, (tile_size // 2, tile_size // 2), tile_size // 4)
+            self.player_overlays[cell] = overlay
+        self._glyphs = {}       # digit -> rendered text
+        self.invalidate()
+
     def _create_placeholder_surface(self, key):
         surface = pygame.Surface((self.tile_size, self.tile_size))
         colors = {
@@ -59,59 +85,144 @@ class gameRenderer:
 
         return surface
 
-    def render(self, state, move_count, available_moves, path_coords=set(), action_log=None):
-        self.screen.fill((20, 20, 20))
+    def render(self, state, move_count, available_moves, path_coords=set(), action_log=None, status=None):
+        if self.dirty_rects:
+            self._render_dirty(state, move_count, available_moves, path_coords, action_log, status)
+            return
 
-        path_color = (255, 255, 0, 80) 
-        path_surface = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
-        path_surface.fill(path_color)
+        self.screen.fill(BACKGROUND)
 
         for r_idx, c_idx in path_coords:
             x, y = c_idx * self.tile_size, r_idx * self.tile_size
-            self.screen.blit(path_surface, (x, y))
+            self.screen.blit(self.path_surface, (x, y))
  
         for r_idx, row in enumerate(state.board):
             for c_idx, cell in enumerate(row):
-                x, y = c_idx * self.tile_size, r_idx * self.tile_size
-                if cell == game_logic.WALL: self.screen.blit(self.assets['wall'], (x, y))
-                elif cell == game_logic.COIN: self.screen.blit(self.assets['coin'], (x, y))
-                elif cell == game_logic.LAVA: self.screen.blit(self.assets['lava'], (x, y))
-                elif cell == game_logic.WATER: self.screen.blit(self.assets['water'], (x, y))
-                elif cell == game_logic.GOAL: self.screen.blit(self.assets['goal'], (x, y))
-                elif cell == game_logic.ICE: self.screen.blit(self.assets['ice'], (x, y))
-                elif cell == game_logic.BLOCK: self.screen.blit(self.assets['block'], (x, y))
-                elif cell == game_logic.MESH: self.screen.blit(self.assets['mesh'], (x, y))
-                elif cell == game_logic.MESH_LAVA:
-                    self.screen.blit(self.assets['lava'], (x, y)) 
-                    self.screen.blit(self.assets['mesh'], (x, y)) 
-                elif cell == game_logic.MESH_WATER:
-                    self.screen.blit(self.assets['water'], (x, y))
-                    self.screen.blit(self.assets['mesh'], (x, y))
-                elif cell.isdigit():
-                    self.screen.blit(self.assets['digital'], (x, y))
-                    text = self.font.render(cell, True, (255, 255, 255))
-                    text_rect = text.get_rect(center=(x + self.tile_size // 2, y + self.tile_size // 2))
-                    self.screen.blit(text, text_rect)
-                else:
-                    self.screen.blit(self.assets['empty'], (x, y))
+                self._draw_cell(cell, c_idx * self.tile_size, r_idx * self.tile_size)
 
         pr, pc = state.player_pos
-        cell_under = state.board[pr][pc]    
-        overlay_radius = self.tile_size // 4
-        overlay_center = (pc * self.tile_size + self.tile_size//2, pr * self.tile_size + self.tile_size//2)
-        if cell_under == game_logic.WATER:
-            s = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
-            pygame.draw.circle(s, (0, 0, 255, 120), (self.tile_size//2, self.tile_size//2), overlay_radius)
-            self.screen.blit(s, (pc * self.tile_size, pr * self.tile_size))
-        elif cell_under == game_logic.LAVA:
-            s = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
-            pygame.draw.circle(s, (255, 50, 0, 160), (self.tile_size//2, self.tile_size//2), overlay_radius)
-            self.screen.blit(s, (pc * self.tile_size, pr * self.tile_size))
+        self._draw_player(state.board[pr][pc], pc * self.tile_size, pr * self.tile_size)
+
+        self._draw_info(move_count, available_moves, action_log, status)
+        
+        self.present()
+
+    def present(self, rects=None):
+        # Pushes the frame to the window: rects only, or all of it
+        if self.headless:
+            return
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+
+    def invalidate(self):
+        # The next dirty-rect frame redraws everything
+        self._tiles = None
+        self._info = None
+        self._end_key = None
+
+    def _render_dirty(self, state, move_count, available_moves, path_coords, action_log, status):
+        # Only tiles whose (cell, on path, player here) changed since the last
+        # frame are redrawn, and only their rects are pushed to the display
+        if self._end_key is not None:
+            self.invalidate()
+        tile = self.tile_size
+        rows, cols = len(state.board), len(state.board[0])
+        full = self._tiles is None or len(self._tiles) != rows or len(self._tiles[0]) != cols
+        if full:
+            self.screen.fill(BACKGROUND)
+            self._build_background(state)
+            self._tiles = [[None] * cols for _ in range(rows)]
+            self._info = None
+
+        player = state.player_pos
+        rects = []
+        for r_idx, row in enumerate(state.board):
+            drawn = self._tiles[r_idx]
+            static_row = self._static[r_idx]
+            for c_idx, cell in enumerate(row):
+                on_path = (r_idx, c_idx) in path_coords
+                key = (cell, on_path, (r_idx, c_idx) == player)
+                if drawn[c_idx] == key:
+                    continue
+                drawn[c_idx] = key
+                rect = pygame.Rect(c_idx * tile, r_idx * tile, tile, tile)
+                if not on_path and cell == static_row[c_idx]:
+                    self.screen.blit(self._background, rect, rect)
+                else:
+                    self.screen.fill(BACKGROUND, rect)
+                    if on_path:
+                        self.screen.blit(self.path_surface, rect)
+                    self._draw_cell(cell, rect.x, rect.y)
+                if key[2]:
+                    self._draw_player(cell, rect.x, rect.y)
+                rects.append(rect)
+
+        info = (move_count, tuple(available_moves), tuple(action_log or ()), status)
+        if info != self._info:
+            self._info = info
+            rects.append(self._draw_info(move_count, available_moves, action_log, status))
+
+        self.present(None if full else rects)
+
+    def _build_background(self, state):
+        # Floor, walls and goal as they are at the start, drawn once
+        tile = self.tile_size
+        self._background = pygame.Surface((len(state.board[0]) * tile, len(state.board) * tile))
+        self._background.fill(BACKGROUND)
+        self._static = []
+        for r_idx, row in enumerate(state.board):
+            static_row = []
+            for c_idx, cell in enumerate(row):
+                if cell in STATIC_CELLS:
+                    self._background.blit(self.assets[STATIC_CELLS[cell]], (c_idx * tile, r_idx * tile))
+                    static_row.append(cell)
+                else:
+                    static_row.append(None)
+            self._static.append(static_row)
+
+    def _glyph(self, text):
+        glyph = self._glyphs.get(text)
+        if glyph is None:
+            glyph = self._glyphs[text] = self.font.render(text, True, (255, 255, 255))
+        return glyph
 
-        self.screen.blit(self.assets['player'], (pc * self.tile_size, pr * self.tile_size))
+    def _draw_cell(self, cell, x, y):
+        if cell == game_logic.WALL: self.screen.blit(self.assets['wall'], (x, y))
+        elif cell == game_logic.COIN: self.screen.blit(self.assets['coin'], (x, y))
+        elif cell == game_logic.LAVA: self.screen.blit(self.assets['lava'], (x, y))
+        elif cell == game_logic.WATER: self.screen.blit(self.assets['water'], (x, y))
+        elif cell == game_logic.GOAL: self.screen.blit(self.assets['goal'], (x, y))
+        elif cell == game_logic.ICE: self.screen.blit(self.assets['ice'], (x, y))
+        elif cell == game_logic.BLOCK: self.screen.blit(self.assets['block'], (x, y))
+        elif cell == game_logic.MESH: self.screen.blit(self.assets['mesh'], (x, y))
+        elif cell == game_logic.MESH_LAVA:
+            self.screen.blit(self.assets['lava'], (x, y)) 
+            self.screen.blit(self.assets['mesh'], (x, y)) 
+        elif cell == game_logic.MESH_WATER:
+            self.screen.blit(self.assets['water'], (x, y))
+            self.screen.blit(self.assets['mesh'], (x, y))
+        elif cell.isdigit():
+            self.screen.blit(self.assets['digital'], (x, y))
+            text = self._glyph(cell)
+            text_rect = text.get_rect(center=(x + self.tile_size // 2, y + self.tile_size // 2))
+            self.screen.blit(text, text_rect)
+        else:
+            self.screen.blit(self.assets['empty'], (x, y))
 
+    def _draw_player(self, cell_under, x, y):
+        overlay = self.player_overlays.get(cell_under)
+        if overlay is not None:
+            self.screen.blit(overlay, (x, y))
+        self.screen.blit(self.assets['player'], (x, y))
 
+    def _draw_info(self, move_count, available_moves, action_log, status):
+        # Returns the rect of the info bar
         info_y = self.height - 50
+        bar = pygame.Rect(0, self.height - 60, self.width, 60)
+        self.screen.fill(BACKGROUND, bar)
+
         move_text = self.font.render(f"Moves: {move_count}", True, (255, 255, 255))
         self.screen.blit(move_text, (10, info_y))
 
@@ -119,8 +230,12 @@ class gameRenderer:
         available_text = self.font.render(f"Available: {moves_str}", True, (200, 200, 200))
         self.screen.blit(available_text, (200, info_y))
         
-        controls_text = self.font.render("U: Undo | R: Restart | B: BFS | D: DFS | Q: Quit", True, (150, 150, 150))
-        self.screen.blit(controls_text, (10, info_y + 25))
+        if status:
+            status_text = self.font.render(status, True, (255, 220, 100))
+            self.screen.blit(status_text, (10, info_y + 25))
+        else:
+            controls_text = self.font.render("M: Undo | R: Restart | B: BFS | D: DFS | U: UCS | A: A* | G: Greedy | H: Hint | Q: Quit", True, (150, 150, 150))
+            self.screen.blit(controls_text, (10, info_y + 25))
 
         if action_log and len(action_log) > 0: 
             action_log_str = "-".join(action_log)
@@ -130,10 +245,16 @@ class gameRenderer:
                 
             solver_moves_text = self.font.render(f"Path: {action_log_str}", True, (100, 255, 100))
             self.screen.blit(solver_moves_text, (400, info_y))
-        
-        pygame.display.flip()
+        return bar
 
     def show_end_screen(self, state, move_count, won):        
+        if self.dirty_rects:
+            # the overlay darkens the whole window, so draw it once and
+            # repaint everything when play resumes
+            end_key = (id(state), move_count, won)
+            if end_key == self._end_key:
+                return
+            self.invalidate()
         self.render(state, move_count, [],path_coords=set(),action_log=None) 
         
         overlay = pygame.Surface((self.width, self.height))
@@ -157,4 +278,6 @@ class gameRenderer:
         restart_rect = restart_text.get_rect(center=(self.width // 2, self.height // 2 + 60))
         self.screen.blit(restart_text, restart_rect)
         
-        pygame.display.flip()
\ No newline at end of file
+        self.present()
+        if self.dirty_rects:
+            self._end_key = end_key
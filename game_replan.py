@@ -0,0 +1,210 @@
+import heapq
+import time
+from array import array
+from collections import Counter
+import game_bitboard
+from game_solver import AStarSolver, make_heuristic, ACTIONS
+from game_deadlock import DEFAULT_CHECKS
+from game_instrument import PROGRESS_EVERY
+from game_logic import BLOCK, COIN, ICE
+
+# A* that keeps what it learned between calls, for hints while the player
+# moves around one level (one ReplanningSolver per level; reset() forgets).
+#
+# Kept across solve() calls:
+#   - the successor table: for every expanded state its children that survive
+#     the death, terminal and deadlock tests, packed by engine.pack_state,
+#     each with its heuristic value. Expanding a state found there costs a
+#     dict lookup instead of apply_transition, the deadlock checks and the
+#     heuristic. It stops growing at max_table states.
+#   - solution paths: every state on a path found (or given to add_solution)
+#     is stored with the rest of that path. Asking from such a state returns
+#     the rest at once; a search that reaches one finishes through it, queued
+#     with its exact remaining cost, so with optimal paths the result stays
+#     optimal. Past max_table states the older paths are forgotten.
+#
+# The g-values of earlier searches count from their own start state, so they
+# are not reused; lava keeps spreading whatever the player does, so a
+# deviation rarely leads back to the very same states, but most of the
+# states explored around it have been expanded before.
+#
+# The heuristic and the deadlock checks read blocks, coins and ice off the
+# state they are built from, and hold for the states that can follow it
+# (blocks only appear, coins and ice only go). They are built from
+# level_state, the state the level starts in, when given; a state asked
+# about that cannot follow the one they were built from (after a restart or
+# an undo, without level_state) gets them rebuilt, and the successor table
+# with its heuristic values is dropped.
+
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+def _layout(state):
+    # (blocks, coins, has ice) of a GameState
+    cells = [(cell, (r, c)) for r, row in enumerate(state.board) for c, cell in enumerate(row)]
+    return (frozenset(pos for cell, pos in cells if cell == BLOCK),
+            frozenset(pos for cell, pos in cells if cell == COIN),
+            any(cell == ICE for cell, _ in cells))
+
+
+def _can_follow(layout, base):
+    blocks, coins, has_ice = layout
+    base_blocks, base_coins, base_ice = base
+    return blocks >= base_blocks and coins <= base_coins and (base_ice or not has_ice)
+
+
+class ReplanningSolver(AStarSolver):
+    name = "Replanning A*"
+
+    def __init__(self, engine=game_bitboard, check_collisions=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='admissible', weight=1.0,
+                 max_table=500000, level_state=None, instrumentation=None, time_limit=None,
+                 memory_limit_mb=None):
+        super().__init__(engine, check_collisions, False, deadlock_checks, heuristic, weight,
+                         instrumentation, time_limit, memory_limit_mb)
+        self.max_table = max_table
+        self.level_state = level_state
+        self.reset()
+
+    def reset(self):
+        self.table = {}         # state key -> ((action, packed child, child key, h), ...)
+        self.known = {}         # state key -> (path, offset): the moves path[offset:] reach the goal
+        self.heuristic_fn = None
+        self.deadlock = None
+        self.base = None        # _layout of the state both were built from
+
+    def _prepare(self, state):
+        # Heuristic and deadlock checks that hold for state (a GameState)
+        layout = _layout(state)
+        if self.base is not None and _can_follow(layout, self.base):
+            return
+        if self.level_state is not None:
+            level_state = self.as_game_state(self.level_state)
+            if _can_follow(layout, _layout(level_state)):
+                state, layout = level_state, _layout(level_state)
+        self.heuristic_fn = make_heuristic(self.heuristic, state, self.engine)
+        self.deadlock = self.deadlock_detector(state)
+        self.base = layout
+        self.table = {}
+
+    def add_solution(self, state, path):
+        # Remembers a path from state (from any solver; the search returns
+        # optimal paths only if the paths it is given are)
+        engine, state_key = self.engine, self.state_key
+        state = self.prepare_state(state)
+        path = ''.join(path)
+        if len(self.known) + len(path) + 1 > self.max_table:
+            self.known = {}
+        for offset, action in enumerate(path):
+            self.known.setdefault(state_key(state), (path, offset))
+            state = engine.apply_transition(state, action)
+        self.known.setdefault(state_key(state), (path, len(path)))
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        self._prepare(self.as_game_state(initial_state))
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        heuristic = monitor.timed('heuristic', self.heuristic_fn)
+        is_dead = monitor.timed('deadlock', self.deadlock)
+        pruned_before = Counter(self.deadlock.pruned)
+        table, known, weight = self.table, self.known, self.weight
+        initial_state = self.prepare_state(initial_state)
+        initial_key = state_key(initial_state)
+
+        def finish(path, mode, generated, discovered, hits):
+            if path is not None and mode != 'suffix':
+                self.add_solution(initial_state, path)
+            return monitor.finish(self._results(
+                path, start_time, generated, discovered, self.deadlock.pruned - pruned_before,
+                replan=mode, table_hits=hits, table_size=len(table)))
+
+        if initial_key in known:
+            path, offset = known[initial_key]
+            return finish(list(path[offset:]), 'suffix', 0, 0, 0)
+
+        # search nodes: parent index, action, packed state (until expanded), key, g
+        pack, unpack = engine.pack_state, engine.unpack_state
+        parents = array('q', [-1])
+        actions = bytearray(1)
+        arena = [pack(initial_state)]
+        keys = [initial_key]
+        costs = array('q', [0])
+        finishes = {}           # node index -> key of the known state it ends through
+        g_score = {initial_key: 0}
+        queue = [(weight * heuristic(initial_state), 0)]
+
+        generated_states_count = 1
+        discovered_states_count = 0
+        table_hits = 0
+
+        def path_to(index):
+            path = []
+            while parents[index] != -1:
+                path.append(ACTIONS[actions[index]])
+                index = parents[index]
+            path.reverse()
+            return path
+
+        while queue:
+            current_f, current = heapq.heappop(queue)
+            discovered_states_count += 1
+            if current in finishes:
+                path, offset = known[finishes[current]]
+                return finish(path_to(current) + list(path[offset:]), 'reconnected',
+                              generated_states_count, discovered_states_count, table_hits)
+
+            key, current_g = keys[current], costs[current]
+            state = unpack(arena[current], initial_state)
+            arena[current] = None
+            if engine.is_goal(state):
+                return finish(path_to(current), 'search', generated_states_count,
+                              discovered_states_count, table_hits)
+
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(queue), len(g_score), current_f):
+                break
+
+            if current_g > g_score[key]:
+                continue
+
+            children = table.get(key)
+            if children is None:
+                children = []
+                for action, new_state, _, dead in engine.expand(state):
+                    if dead: continue
+                    # deadlock verdicts do not depend on the depth without prune_doomed
+                    if is_dead(new_state, 0): continue
+                    h_new = heuristic(new_state)
+                    if h_new == float('inf'):
+                        continue
+                    children.append((action, pack(new_state), state_key(new_state), h_new))
+                children = tuple(children)
+                if len(table) < self.max_table:
+                    table[key] = children
+            else:
+                table_hits += 1
+
+            new_g = current_g + 1
+            for action, packed, new_key, h_new in children:
+                if new_g >= g_score.get(new_key, float('inf')):
+                    continue
+                g_score[new_key] = new_g
+                parents.append(current)
+                actions.append(_ACTION_CODES[action])
+                arena.append(packed)
+                keys.append(new_key)
+                costs.append(new_g)
+                index = len(arena) - 1
+                if new_key in known:
+                    # finishes through a stored path: its remaining length is exact
+                    path, offset = known[new_key]
+                    finishes[index] = new_key
+                    heapq.heappush(queue, (new_g + len(path) - offset, index))
+                else:
+                    heapq.heappush(queue, (new_g + weight * h_new, index))
+                generated_states_count += 1
+
+        return finish(None, 'search', generated_states_count, discovered_states_count, table_hits)
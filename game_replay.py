@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import game_bitboard
+from game_levels import open_level, source_hash
+from game_solver import ACTIONS
+
+# Solutions as compact replays, and a bulk verifier to re-check them all
+# after a rules change:
+#
+#   python game_replay.py record results.jsonl -o solutions.lvr    (game_cli output)
+#   python game_replay.py verify solutions.lvr level*.txt -j 8
+#
+# A replay file is a header followed by records, so new replays can simply be
+# appended (the app does this for every solution it finds):
+#   header   magic, version
+#   record   blake2b of the level text (as game_levels.source_hash), length of
+#            the level name, number of moves, the name (utf-8), then the moves
+#            at 2 bits each (index in ACTIONS), four per byte, first move in
+#            the low bits
+# Levels are matched on the hash, so a replay stays tied to the exact level it
+# was recorded on; the name is only there for the reports.
+#
+# The verifier replays each record on game_bitboard from the compiled level and
+# reports the first step that is not available ('illegal'), that kills the
+# player ('fatal') or that comes after the game ended ('after_end'), or
+# 'not_goal' when the moves run out before the goal.
+
+MAGIC = b'LAQR'
+VERSION = 1
+_FILE_HEADER = struct.Struct('<4sH')
+_RECORD = struct.Struct('<16sHI')       # level hash, name size, move count
+_CODES = {action: code for code, action in enumerate(ACTIONS)}
+# byte -> the four moves it holds
+_DECODE = [''.join(ACTIONS[(byte >> shift) & 3] for shift in (0, 2, 4, 6)) for byte in range(256)]
+_CHUNK = 64             # replays per task sent to a worker
+
+
+def pack_moves(moves):
+    data = bytearray((len(moves) + 3) // 4)
+    for i, action in enumerate(moves):
+        data[i >> 2] |= _CODES[action] << ((i & 3) * 2)
+    return bytes(data)
+
+
+def unpack_moves(data, count):
+    return ''.join([_DECODE[byte] for byte in data])[:count]
+
+
+def encode_replay(level_hash, level_name, moves):
+    name = level_name.encode()
+    return _RECORD.pack(level_hash, len(name), len(moves)) + name + pack_moves(moves)
+
+
+def write_replays(filename, replays, append=False):
+    # replays: (level file, moves) pairs; returns how many were written
+    exists = append and os.path.exists(filename) and os.path.getsize(filename) > 0
+    count = 0
+    with open(filename, 'ab' if exists else 'wb') as f:
+        if not exists:
+            f.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        for level_file, moves in replays:
+            with open(level_file, 'rb') as level:
+                level_hash = source_hash(level.read())
+            f.write(encode_replay(level_hash, level_file, moves))
+            count += 1
+    return count
+
+
+def read_replays(filename):
+    # [(level hash, level name, moves)]
+    with open(filename, 'rb') as f:
+        data = f.read()
+    magic, version = _FILE_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{filename} is not a replay file of version {VERSION}")
+    replays = []
+    offset = _FILE_HEADER.size
+    while offset < len(data):
+        level_hash, name_size, count = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        name = data[offset:offset + name_size].decode()
+        offset += name_size
+        size = (count + 3) // 4
+        if offset + size > len(data):
+            raise ValueError(f"{filename} is truncated")
+        replays.append((level_hash, name, unpack_moves(data[offset:offset + size], count)))
+        offset += size
+    return replays
+
+
+def verify_replay(state, moves, engine=game_bitboard):
+    # (error, step): (None, None) when the moves win the level
+    for step, action in enumerate(moves):
+        if engine.is_terminal(state):
+            return 'after_end', step
+        if action not in engine.get_available_transitions(state):
+            return 'illegal', step
+        state = engine.apply_transition(state, action)
+        if engine.is_terminal(state) and not engine.is_goal(state):
+            return 'fatal', step
+    if not engine.is_goal(state):
+        return 'not_goal', len(moves)
+    return None, None
+
+
+_levels = {}            # level hash -> compiled level, per worker process
+
+
+def _load_levels(level_files):
+    _levels.clear()
+    for level_file in level_files:
+        compiled = open_level(level_file)
+        _levels[compiled.source_hash] = compiled
+
+
+def _verify_chunk(chunk):
+    records = []
+    for index, level_hash, name, moves in chunk:
+        record = {"index": index, "level": name, "moves": len(moves)}
+        compiled = _levels.get(level_hash)
+        if compiled is None:
+            error, step = 'unknown_level', None
+        else:
+            error, step = verify_replay(compiled.bitboard_state(), moves)
+        record.update(ok=error is None, error=error, step=step)
+        records.append(record)
+    return records
+
+
+def verify_all(replays, level_files, jobs=None):
+    # One record per replay, in order: index, level, moves, ok, error, step.
+    # Replays of levels that are not among level_files (or whose text changed
+    # since recording) come back as 'unknown_level'.
+    tasks = [(index, *replay) for index, replay in enumerate(replays)]
+    chunks = [tasks[i:i + _CHUNK] for i in range(0, len(tasks), _CHUNK)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(chunks) <= 1:
+        _load_levels(level_files)
+        return [record for chunk in chunks for record in _verify_chunk(chunk)]
+    with multiprocessing.Pool(min(jobs, len(chunks)), _load_levels, (level_files,)) as pool:
+        return [record for records in pool.imap(_verify_chunk, chunks) for record in records]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and verify solution replays.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="turn game_cli JSON lines into replays")
+    record.add_argument('results', help="game_cli output (JSON lines)")
+    record.add_argument('--output', '-o', default='solutions.lvr')
+    record.add_argument('--append', action='store_true', help="add to an existing replay file")
+    verify = commands.add_parser('verify', help="replay every solution and report failures")
+    verify.add_argument('replays', help="replay file")
+    verify.add_argument('levels', nargs='*', help="level files (default: level*.txt)")
+    verify.add_argument('--jobs', '-j', type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    verify.add_argument('--output', '-o', default=None,
+                        help="JSON lines file for every replay (default: failures to stdout)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        solved = []
+        with open(args.results) as f:
+            for line in f:
+                result = json.loads(line)
+                if result.get("path") is not None:
+                    solved.append((result["level"], result["path"]))
+        count = write_replays(args.output, solved, args.append)
+        print(f"{count} replays -> {args.output}", file=sys.stderr)
+        return
+
+    records = verify_all(read_replays(args.replays), args.levels or sorted(glob.glob('level*.txt')),
+                         args.jobs)
+    failed = [record for record in records if not record["ok"]]
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for record in (records if args.output else failed):
+            out.write(json.dumps(record) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(records) - len(failed)}/{len(records)} replays verified", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,17 @@
 import collections
+from array import array
+from functools import partial
 import time
 import heapq
-from game_logic import get_available_transitions, apply_transition, is_goal, state_id, would_cause_immediate_death, count_lava, is_terminal
+import game_logic
+from game_state import GameState
+from game_heuristics import DistanceHeuristic, LavaSchedule
+from game_deadlock import DeadlockDetector, DEFAULT_CHECKS, REGION_CACHE_SIZE
+from game_instrument import Instrumentation, PROGRESS_EVERY
 
-def calculate_heuristic(state):
-    goal_pos = None
-    coins_count = 0
-    
-    for r in range(len(state.board)):
-        for c in range(len(state.board[0])):
-            cell = state.board[r][c]
-            if cell == 'T':
-                goal_pos = (r, c)
-            elif cell == 'C':
-                coins_count += 1
+def calculate_heuristic(state, engine=game_logic):
+    goal_pos = engine.get_goal_pos(state)
+    coins_count = engine.count_coins(state)
                 
     if goal_pos is None: return float('inf') 
     
@@ -23,33 +21,142 @@ def calculate_heuristic(state):
     
     return dist + (coins_count * 10)
 
-class Node:
-    def __init__(self, state, parent=None, action=None, cost=0):
-        self.state = state
-        self.parent = parent
-        self.action = action
-        self.cost = cost
+def make_heuristic(mode, state, engine=game_logic):
+    # 'admissible': walking distances over the static walls plus an MST over the
+    #               coins left (DistanceHeuristic), precomputed once per level
+    # 'legacy':     calculate_heuristic, Manhattan distance + 10 per coin (not admissible)
+    if mode == 'admissible':
+        return DistanceHeuristic(state, engine)
+    if mode == 'legacy':
+        return lambda s: calculate_heuristic(s, engine)
+    raise ValueError(f"Unknown heuristic mode '{mode}'")
+
+ACTIONS = 'wsad'
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+class NodeStore:
+    # The search tree as parallel arrays indexed by node number: parent index,
+    # one-byte action, path cost and depth. A node's state sits in the arena,
+    # packed by engine.pack_state, only until the node is expanded (take), so
+    # the rest of the tree costs a few dozen bytes per node.
+    __slots__ = ('engine', 'root', 'parents', 'actions', 'costs', 'depths', 'arena')
+
+    def __init__(self, engine, root_state):
+        self.engine = engine
+        self.root = root_state
+        self.parents = array('q', [-1])
+        self.actions = bytearray(1)
+        self.costs = array('q', [0])
+        self.depths = array('l', [0])
+        self.arena = [engine.pack_state(root_state)]
+
+    def add(self, state, parent, action, cost=0):
+        self.parents.append(parent)
+        self.actions.append(_ACTION_CODES[action])
+        self.costs.append(cost)
+        self.depths.append(self.depths[parent] + 1)
+        self.arena.append(self.engine.pack_state(state))
+        return len(self.arena) - 1
+
+    def take(self, index):
+        # The state of a node about to be expanded; its packed copy is dropped
+        packed = self.arena[index]
+        self.arena[index] = None
+        return self.engine.unpack_state(packed, self.root)
+
+def _whole_state(state):
+    return state
+
+class Solver:
+    # engine: any module exposing the game_logic transition API
+    # (game_logic for string boards, game_bitboard for bitmask boards).
+    # Visited sets are keyed on the 64-bit Zobrist hash; with check_collisions
+    # they hold the states themselves, which hash the same way but compare
+    # the full boards on a hash match.
+    # Generated states that can no longer be won are dropped before they are
+    # queued: deadlock_checks run on every one of them (see game_deadlock), and
+    # prune_doomed adds the lava arrival check of game_heuristics.LavaSchedule.
+    # instrumentation: a game_instrument.Instrumentation for progress callbacks,
+    # per-primitive timings and profiling.
+    # time_limit (seconds) and memory_limit_mb (resident memory) bound the
+    # search: once one is used up the solver stops and returns what it has,
+    # with results["budget_exhausted"] set to 'time' or 'memory'.
+    name = "Solver"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, instrumentation=None,
+                 time_limit=None, memory_limit_mb=None):
+        self.engine = engine
+        self.check_collisions = check_collisions
+        self.state_key = _whole_state if check_collisions else engine.state_id
+        self.prune_doomed = prune_doomed
+        self.deadlock_checks = deadlock_checks
+        self.instrumentation = instrumentation
+        self.time_limit = time_limit
+        self.memory_limit_mb = memory_limit_mb
+
+    def prepare_state(self, state):
+        if isinstance(state, GameState) and hasattr(self.engine, 'from_game_state'):
+            return self.engine.from_game_state(state)
+        return state
+
+    def as_game_state(self, state):
+        if isinstance(state, GameState):
+            return state
+        return self.engine.to_game_state(state)
+
+    def deadlock_detector(self, state, cache_size=REGION_CACHE_SIZE):
+        state = self.as_game_state(state)
+        lava_schedule = LavaSchedule(state) if self.prune_doomed else None
+        return DeadlockDetector(state, self.engine, self.deadlock_checks or (), lava_schedule,
+                                cache_size)
 
-    def __lt__(self, other):
-            return self.cost < other.cost
+    def start_instrumentation(self):
+        # Without an Instrumentation a disabled one is used, so the solvers
+        # can call it unconditionally
+        return (self.instrumentation or Instrumentation()).start(
+            self.name, self.time_limit, self.memory_limit_mb)
 
-def reconstruct_path(goal_node):
+    def _results(self, path, start_time, generated, discovered, pruned, **extra):
+        # pruned: prune counts per check (DeadlockDetector.pruned)
+        results = {
+            "path": path,
+            "execution_time": time.time() - start_time,
+            "generated_states_count": generated,
+            "pruned_states_count": sum(pruned.values()),
+            "pruned_by_check": dict(pruned),
+            "discovered_states_count": discovered,
+            "path_length": len(path) if path else 0,
+            "solver_name": self.name,
+        }
+        results.update(extra)
+        return results
+
+def reconstruct_path(store, index):
     path = []
-    current_node = goal_node
     
-    while current_node.parent is not None:
-        path.append(current_node.action)
-        current_node = current_node.parent
+    while store.parents[index] != -1:
+        path.append(ACTIONS[store.actions[index]])
+        index = store.parents[index]
         
     path.reverse()
     return path
 
-class UCSSolver:
+class UCSSolver(Solver):
+    name = "UCS"
+
     def solve(self, initial_state):
         start_time = time.time()
-        pq = []
-        start_node = Node(initial_state, cost=0)
-        heapq.heappush(pq, start_node)
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        initial_state = self.prepare_state(initial_state)
+        store = NodeStore(engine, initial_state)
+        pq = [(0, 0)]           # (path cost, node index)
+        push = monitor.timed('queue', partial(heapq.heappush, pq))
+        pop = monitor.timed('queue', partial(heapq.heappop, pq))
         
         visited = set()
                 
@@ -57,285 +164,555 @@ class UCSSolver:
         discovered_states_count = 0 
         
         while pq:
-            current_node = heapq.heappop(pq)
+            current_cost, current = pop()
+            state = store.take(current)
             
-            sid = state_id(current_node.state)
+            sid = state_key(state)
             if sid in visited:
                 continue
             
             visited.add(sid)
             discovered_states_count += 1
-            
-            if is_goal(current_node.state):
-                path = reconstruct_path(current_node)
-                end_time = time.time()
-                return {
-                    "path": path,
-                    "execution_time": end_time - start_time,
-                    "generated_states_count": generated_states_count,
-                    "discovered_states_count": discovered_states_count,
-                    "path_length": len(path),
-                    "solver_name": "UCS"
-                }
-
-            for action in get_available_transitions(current_node.state):                
-                if would_cause_immediate_death(current_node.state, action):
+            if engine.is_goal(state):
+                path = reconstruct_path(store, current)
+                return monitor.finish(self._results(path, start_time, generated_states_count,
+                                                    discovered_states_count, deadlock.pruned))
+
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(pq), len(visited), current_cost):
+                break
+
+            for action, new_state, _, dead in engine.expand(state):
+                if dead:
                     continue
 
-                new_state = apply_transition(current_node.state, action)
-                
-                if is_terminal(new_state) and not is_goal(new_state):
+                if is_dead(new_state, store.depths[current] + 1):
                     continue
 
-                move_cost = 1 + count_lava(new_state)
-                new_total_cost = current_node.cost + move_cost
+                move_cost = 1 + new_state.lava_count
+                new_total_cost = current_cost + move_cost
                 
-                new_node = Node(new_state, current_node, action, new_total_cost)
-                heapq.heappush(pq, new_node)
+                push((new_total_cost, store.add(new_state, current, action, new_total_cost)))
                 generated_states_count += 1
                       
-        end_time = time.time()
-        return {
-            "path": None,
-            "execution_time": end_time - start_time,
-            "generated_states_count": generated_states_count,
-            "discovered_states_count": discovered_states_count,
-            "path_length": 0,
-            "solver_name": "UCS"
-        }
+        return monitor.finish(self._results(None, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned))
     
-class BFSSolver:
+class BFSSolver(Solver):
+    name = "BFS"
+
     def solve(self, initial_state):
         start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        initial_state = self.prepare_state(initial_state)
         
         queue = collections.deque()
+        push = monitor.timed('queue', queue.append)
+        pop = monitor.timed('queue', queue.popleft)
         visited = set()
-        start_node = Node(initial_state)
-        queue.append(start_node)
-        visited.add(state_id(initial_state))
+        store = NodeStore(engine, initial_state)
+        push(0)
+        visited.add(state_key(initial_state))
                 
         generated_states_count = 1
         discovered_states_count = 0 
         
         while queue:
-            current_node = queue.popleft()
+            current = pop()
+            state = store.take(current)
             discovered_states_count += 1
-            
-            if is_goal(current_node.state):
-                path = reconstruct_path(current_node)
-                end_time = time.time()
-                return {
-                    "path": path,
-                    "execution_time": end_time - start_time,
-                    "generated_states_count": generated_states_count,
-                    "discovered_states_count": discovered_states_count,
-                    "path_length": len(path),
-                    "solver_name": "BFS"
-                }
-
-            for action in get_available_transitions(current_node.state):                
-                if would_cause_immediate_death(current_node.state, action):
-                    continue
+            if engine.is_goal(state):
+                path = reconstruct_path(store, current)
+                return monitor.finish(self._results(path, start_time, generated_states_count,
+                                                    discovered_states_count, deadlock.pruned))
 
-                new_state = apply_transition(current_node.state, action)
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(queue), len(visited), store.depths[current]):
+                break
 
-                if is_terminal(new_state) and not is_goal(new_state):
+            for action, new_state, _, dead in engine.expand(state):
+                if dead:
                     continue
 
-                sid = state_id(new_state)
+                if is_dead(new_state, store.depths[current] + 1):
+                    continue
+
+                sid = state_key(new_state)
                 
                 if sid not in visited:
-                    new_node = Node(new_state, current_node, action)
                     visited.add(sid)
-                    queue.append(new_node)
+                    push(store.add(new_state, current, action))
                     generated_states_count += 1
                      
-        end_time = time.time()
-        return {
-            "path": None,
-            "execution_time": end_time - start_time,
-            "generated_states_count": generated_states_count,
-            "discovered_states_count": discovered_states_count,
-            "path_length": 0,
-            "solver_name": "BFS"
-        }
+        return monitor.finish(self._results(None, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned))
+
+class DFSSolver(Solver):
+    name = "DFS"
 
-class DFSSolver:
     def solve(self, initial_state):
         start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        initial_state = self.prepare_state(initial_state)
         
         stack = collections.deque()
+        push = monitor.timed('queue', stack.append)
+        pop = monitor.timed('queue', stack.pop)
         visited = set()
-        start_node = Node(initial_state)
-        stack.append((start_node, 0))
-        visited.add(state_id(initial_state))
+        store = NodeStore(engine, initial_state)
+        push(0)
+        visited.add(state_key(initial_state))
                 
         generated_states_count = 1
         discovered_states_count = 0 
 
         while stack: 
-            current_node, current_depth = stack.pop()
+            current = pop()
+            state = store.take(current)
             discovered_states_count += 1
-            
-            if is_goal(current_node.state):
-                path = reconstruct_path(current_node)
-                end_time = time.time()
-                return {
-                    "path": path,
-                    "execution_time": end_time - start_time,
-                    "generated_states_count": generated_states_count,
-                    "discovered_states_count": discovered_states_count,
-                    "path_length": len(path),
-                    "solver_name": "DFS"
-                }
-
-            for action in get_available_transitions(current_node.state):
-                if would_cause_immediate_death(current_node.state, action):
-                    continue
+            if engine.is_goal(state):
+                path = reconstruct_path(store, current)
+                return monitor.finish(self._results(path, start_time, generated_states_count,
+                                                    discovered_states_count, deadlock.pruned))
 
-                new_state = apply_transition(current_node.state, action)
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(stack), len(visited), store.depths[current]):
+                break
 
-                if is_terminal(new_state) and not is_goal(new_state):
+            for action, new_state, _, dead in engine.expand(state):
+                if dead:
                     continue
 
-                sid = state_id(new_state)
+                if is_dead(new_state, store.depths[current] + 1):
+                    continue
+
+                sid = state_key(new_state)
                 
                 if sid not in visited:
-                    new_node = Node(new_state, current_node, action)
                     visited.add(sid)
-                    stack.append((new_node, current_depth + 1))
+                    push(store.add(new_state, current, action))
                     generated_states_count += 1
                     
-        end_time = time.time()
-        return {
-            "path": None,
-            "execution_time": end_time - start_time,
-            "generated_states_count": generated_states_count,
-            "discovered_states_count": discovered_states_count,
-            "path_length": 0,
-            "solver_name": "DFS"
-        }
+        return monitor.finish(self._results(None, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned))
     
 
         
-class AStarSolver:
+class AStarSolver(Solver):
+    # weight > 1 gives weighted A* (f = g + weight * h): faster, no longer optimal.
+    # Paths are optimal only with heuristic='admissible' and weight=1.
+    name = "A*"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='admissible', weight=1.0,
+                 instrumentation=None, time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, instrumentation,
+                         time_limit, memory_limit_mb)
+        self.heuristic = heuristic
+        self.weight = weight
+
     def solve(self, initial_state):
         start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        heuristic = monitor.timed('heuristic', make_heuristic(
+            self.heuristic, self.as_game_state(initial_state), self.engine))
+        weight = self.weight
+        initial_state = self.prepare_state(initial_state)
         
-        queue = []
-        count = 0 
-        
-        start_node = Node(initial_state)
+        store = NodeStore(engine, initial_state)
+        g_score = {state_key(initial_state): 0}
         
-        g_score = {state_id(initial_state): 0}
+        f_score = weight * heuristic(initial_state)
         
-        f_score = calculate_heuristic(initial_state)
+        # (f, node index); the index also breaks ties in insertion order
+        queue = [(f_score, 0)]
+        push = monitor.timed('queue', partial(heapq.heappush, queue))
+        pop = monitor.timed('queue', partial(heapq.heappop, queue))
         
-        heapq.heappush(queue, (f_score, count, start_node))
-        
-        visited = set()
         generated_states_count = 1
         discovered_states_count = 0
 
         while queue:
-            current_f, _, current_node = heapq.heappop(queue)
+            current_f, current = pop()
+            state = store.take(current)
             discovered_states_count += 1
-            
-            if is_goal(current_node.state):
-                path = reconstruct_path(current_node)
-                end_time = time.time()
-                return {
-                    "path": path,
-                    "execution_time": end_time - start_time,
-                    "generated_states_count": generated_states_count,
-                    "discovered_states_count": discovered_states_count,
-                    "path_length": len(path),
-                    "solver_name": "A*"
-                }
-
-            current_sid = state_id(current_node.state)
-            
-            if current_sid in visited and g_score.get(current_sid, float('inf')) < (current_f - calculate_heuristic(current_node.state)):
-                continue
-            
-            visited.add(current_sid)
-            current_g = g_score[current_sid]
+            if engine.is_goal(state):
+                path = reconstruct_path(store, current)
+                return monitor.finish(self._results(path, start_time, generated_states_count,
+                                                    discovered_states_count, deadlock.pruned))
 
-            for action in get_available_transitions(current_node.state):
-                if would_cause_immediate_death(current_node.state, action):
-                    continue
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(queue), len(g_score), current_f):
+                break
+
+            current_sid = state_key(state)
+            current_g = store.costs[current]
 
-                new_state = apply_transition(current_node.state, action)
-                                
-                r, c = new_state.player_pos
-                if new_state.board[r][c] == 'L': continue
+            # a cheaper path to this state was queued after this entry
+            if current_g > g_score[current_sid]:
+                continue
 
-                new_sid = state_id(new_state)
+            for action, new_state, _, dead in engine.expand(state):
+                if dead: continue
+                if is_dead(new_state, store.depths[current] + 1): continue
+
+                new_sid = state_key(new_state)
                 new_g = current_g + 1
 
                 if new_g < g_score.get(new_sid, float('inf')):
+                    h_new = heuristic(new_state)
+                    if h_new == float('inf'):
+                        continue
                     g_score[new_sid] = new_g
-                    f_new = new_g + calculate_heuristic(new_state)
+                    f_new = new_g + weight * h_new
                     
-                    new_node = Node(new_state, current_node, action)
-                    count += 1
-                    heapq.heappush(queue, (f_new, count, new_node))
+                    push((f_new, store.add(new_state, current, action, new_g)))
                     generated_states_count += 1
 
-        return { "path": None, "solver_name": "A*", "execution_time": time.time() - start_time }
+        return monitor.finish(self._results(None, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned))
     
-class GreedySolver:
+class GreedySolver(Solver):
+    name = "Greedy"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='legacy', instrumentation=None,
+                 time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, instrumentation,
+                         time_limit, memory_limit_mb)
+        self.heuristic = heuristic
+
     def solve(self, initial_state):
         start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        heuristic = monitor.timed('heuristic', make_heuristic(
+            self.heuristic, self.as_game_state(initial_state), self.engine))
+        initial_state = self.prepare_state(initial_state)
         
-        queue = []
-        count = 0
-        
-        start_node = Node(initial_state)        
-        priority = calculate_heuristic(initial_state)
+        store = NodeStore(engine, initial_state)
+        priority = heuristic(initial_state)
         
-        heapq.heappush(queue, (priority, count, start_node))
+        queue = [(priority, 0)]     # (h, node index)
+        push = monitor.timed('queue', partial(heapq.heappush, queue))
+        pop = monitor.timed('queue', partial(heapq.heappop, queue))
         
         visited = set()
-        visited.add(state_id(initial_state))
+        visited.add(state_key(initial_state))
         
         generated_states_count = 1
         discovered_states_count = 0
 
         while queue:
-            _, _, current_node = heapq.heappop(queue)
+            current_h, current = pop()
+            state = store.take(current)
             discovered_states_count += 1
-            
-            if is_goal(current_node.state):
-                path = reconstruct_path(current_node)
-                end_time = time.time()
-                return {
-                    "path": path,
-                    "execution_time": end_time - start_time,
-                    "generated_states_count": generated_states_count,
-                    "discovered_states_count": discovered_states_count,
-                    "path_length": len(path),
-                    "solver_name": "Greedy"
-                }
-
-            for action in get_available_transitions(current_node.state):
-                if would_cause_immediate_death(current_node.state, action):
-                    continue
+            if engine.is_goal(state):
+                path = reconstruct_path(store, current)
+                return monitor.finish(self._results(path, start_time, generated_states_count,
+                                                    discovered_states_count, deadlock.pruned))
+
+            if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                    discovered_states_count, generated_states_count,
+                    len(queue), len(visited), current_h):
+                break
 
-                new_state = apply_transition(current_node.state, action)
-                r, c = new_state.player_pos
-                if new_state.board[r][c] == 'L': continue
+            for action, new_state, _, dead in engine.expand(state):
+                if dead: continue
+                if is_dead(new_state, store.depths[current] + 1): continue
 
-                sid = state_id(new_state)
+                sid = state_key(new_state)
                 
                 if sid not in visited:
                     visited.add(sid)
-                    new_node = Node(new_state, current_node, action)
-                    
-                    h_score = calculate_heuristic(new_state)
+                    h_score = heuristic(new_state)
                     
-                    count += 1
-                    heapq.heappush(queue, (h_score, count, new_node))
+                    push((h_score, store.add(new_state, current, action)))
                     generated_states_count += 1
 
-        return { "path": None, "solver_name": "Greedy", "execution_time": time.time() - start_time }
\ No newline at end of file
+        return monitor.finish(self._results(None, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned))
+
+class AnytimeAStarSolver(AStarSolver):
+    # Weighted A* run again and again with a smaller weight each time
+    # (weight, weight - weight_step, ... down to 1). A run only keeps nodes
+    # that could still beat the best solution so far (g + h below its length),
+    # so later runs are cheap, and with the admissible heuristic a run that
+    # ends without finding a better one proves the best optimal. Meant to be
+    # used with time_limit / memory_limit_mb: when a budget runs out the best
+    # solution so far is returned.
+    name = "Anytime A*"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='admissible', weight=3.0,
+                 weight_step=0.5, instrumentation=None, time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, heuristic,
+                         weight, instrumentation, time_limit, memory_limit_mb)
+        self.weight_step = weight_step
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        deadlock = self.deadlock_detector(initial_state)
+        is_dead = monitor.timed('deadlock', deadlock)
+        heuristic = monitor.timed('heuristic', make_heuristic(
+            self.heuristic, self.as_game_state(initial_state), self.engine))
+        # the bound only holds g + h back with a heuristic that never overestimates
+        admissible = self.heuristic == 'admissible'
+        initial_state = self.prepare_state(initial_state)
+        initial_h = heuristic(initial_state)
+
+        best_path = [] if engine.is_goal(initial_state) else None
+        optimal = best_path is not None
+        solutions = []          # one entry per improvement
+        weight = self.weight
+        
+        generated_states_count = 0
+        discovered_states_count = 0
+
+        while not optimal and monitor.exhausted is None:
+            bound = len(best_path) if best_path is not None else float('inf')
+            store = NodeStore(engine, initial_state)
+            g_score = {state_key(initial_state): 0}
+            queue = [(weight * initial_h, 0)]
+            push = monitor.timed('queue', partial(heapq.heappush, queue))
+            pop = monitor.timed('queue', partial(heapq.heappop, queue))
+            generated_states_count += 1
+            found = None
+
+            while queue:
+                current_f, current = pop()
+                state = store.take(current)
+                discovered_states_count += 1
+                if engine.is_goal(state):
+                    found = current
+                    break
+
+                if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                        discovered_states_count, generated_states_count,
+                        len(queue), len(g_score), current_f):
+                    break
+
+                current_sid = state_key(state)
+                current_g = store.costs[current]
+
+                if current_g > g_score[current_sid]:
+                    continue
+
+                for action, new_state, _, dead in engine.expand(state):
+                    if dead: continue
+                    if is_dead(new_state, store.depths[current] + 1): continue
+
+                    new_sid = state_key(new_state)
+                    new_g = current_g + 1
+
+                    if new_g < g_score.get(new_sid, float('inf')):
+                        h_new = heuristic(new_state)
+                        if new_g + (h_new if admissible else 0) >= bound:
+                            continue
+                        g_score[new_sid] = new_g
+                        f_new = new_g + weight * h_new
+
+                        push((f_new, store.add(new_state, current, action, new_g)))
+                        generated_states_count += 1
+
+            if found is None:
+                # the whole space under the bound was searched: nothing better exists
+                optimal = admissible and best_path is not None and monitor.exhausted is None
+                break
+
+            best_path = reconstruct_path(store, found)
+            solutions.append({"weight": weight, "path_length": len(best_path),
+                              "execution_time": time.time() - start_time})
+            if weight <= 1:
+                optimal = admissible
+                break
+            weight = max(1.0, weight - self.weight_step)
+
+        return monitor.finish(self._results(best_path, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned,
+                                            solutions=solutions, optimal=optimal))
+
+
+class IDAStarSolver(Solver):
+    # IDA*: depth-first searches under a growing f = g + h bound, so memory
+    # stays at the current path plus a transposition table of at most
+    # table_size states (least recently used dropped first), instead of every
+    # state seen as in BFS/UCS/A*. The table holds per state:
+    #   - the iteration and g it was last reached with: reaching it again in the
+    #     same iteration with no fewer moves is skipped, its subtree was (or is
+    #     being) searched with at least as much of the bound left
+    #   - its h raised to what the search under it proved (the lowest f found
+    #     past the bound minus g), which stays admissible and cuts it sooner in
+    #     later iterations
+    #   - the move that led to that lowest f, tried first next iteration
+    #   - the lowest f it was cut at this iteration and the g of that cut
+    # A move back onto the current path is a cycle and is never taken, whether
+    # or not the table still holds the state. The next bound is the lowest f
+    # cut at a state that was not then searched in the same iteration from as
+    # few moves (cuts of states dropped from the table always count), so on a
+    # level without a solution the bound reaches infinity once every reachable
+    # state fits under it, even with a table too small to hold them all.
+    # Paths are optimal with heuristic='admissible'. With prune_doomed a
+    # state's fate depends on the move it is reached at, so nothing is learned.
+    name = "IDA*"
+
+    def __init__(self, engine=game_logic, check_collisions=False, prune_doomed=False,
+                 deadlock_checks=DEFAULT_CHECKS, heuristic='admissible', table_size=200000,
+                 instrumentation=None, time_limit=None, memory_limit_mb=None):
+        super().__init__(engine, check_collisions, prune_doomed, deadlock_checks, instrumentation,
+                         time_limit, memory_limit_mb)
+        self.heuristic = heuristic
+        self.table_size = table_size
+
+    def solve(self, initial_state):
+        start_time = time.time()
+        monitor = self.start_instrumentation()
+        engine = monitor.engine(self.engine)
+        state_key = monitor.timed('hashing', self.state_key)
+        heuristic = monitor.timed('heuristic', make_heuristic(
+            self.heuristic, self.as_game_state(initial_state), self.engine))
+        # its region cache is held to the table's size too
+        deadlock = self.deadlock_detector(initial_state, self.table_size)
+        is_dead = monitor.timed('deadlock', deadlock)
+        initial_state = self.prepare_state(initial_state)
+
+        # state key -> [iteration, g, h, best action, cut iteration, cut g, cut f],
+        # least recently used first; a cut iteration of -1 marks an entry
+        # no longer in the table
+        table = collections.OrderedDict()
+        table_size = self.table_size
+        learn = not self.prune_doomed
+        won_entry = [0, 0, 0, None, -1, 0, 0]   # stands in for a state that wins
+        outside = float('inf')  # lowest f cut this iteration at a state not in the table
+        iteration = 0
+
+        def lookup(key, state):
+            nonlocal outside
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = [0, 0, heuristic(state), None, 0, 0, 0]
+                if len(table) > table_size:
+                    _, dropped = table.popitem(last=False)
+                    if dropped[4] == iteration:
+                        outside = min(outside, dropped[6])
+                    dropped[4] = -1
+            else:
+                table.move_to_end(key)
+            return entry
+
+        generated_states_count = 1
+        discovered_states_count = 0
+        root_key = state_key(initial_state)
+        root = lookup(root_key, initial_state)
+        bound = root[2]
+        path = [] if engine.is_goal(initial_state) else None
+
+        while path is None and bound < float('inf') and monitor.exhausted is None:
+            iteration += 1
+            root[0], root[1] = iteration, 0
+            outside = float('inf')
+            # frame: [entry, g, children, next child, lowest f past the bound, its action, key]
+            stack = []
+            moves = []
+            on_path = set()
+            state, key, entry, g = initial_state, root_key, root, 0
+
+            while True:
+                if state is not None:
+                    # open the node: its children, the previous best move first
+                    discovered_states_count += 1
+                    on_path.add(key)
+                    if entry[4] == iteration and entry[5] >= g:
+                        entry[4] = 0    # its cuts are searched now, from as few moves
+                    children = []
+                    for action, new_state, won, dead in engine.expand(state):
+                        if dead: continue
+                        if won:
+                            if g + 1 <= bound:
+                                path = moves + [action]
+                                break
+                            children.append((action, None, None, won_entry))
+                            continue
+                        if is_dead(new_state, g + 1): continue
+                        generated_states_count += 1
+                        new_key = state_key(new_state)
+                        children.append((action, new_state, new_key, lookup(new_key, new_state)))
+                    if path is not None:
+                        break
+                    best = entry[3]
+                    children.sort(key=lambda child: (child[0] != best, child[3][2]))
+                    stack.append([entry, g, children, 0, float('inf'), None, key])
+                    state = None
+                    if not discovered_states_count % PROGRESS_EVERY and monitor.tick(
+                            discovered_states_count, generated_states_count,
+                            len(stack), len(table), bound):
+                        break
+
+                frame = stack[-1]
+                entry, g, children, index = frame[0], frame[1], frame[2], frame[3]
+                if index == len(children):
+                    # every child searched: learn from the subtree, report to the parent
+                    stack.pop()
+                    on_path.discard(frame[6])
+                    lowest = frame[4]
+                    if learn:
+                        entry[2] = max(entry[2], lowest - g)
+                    entry[3] = frame[5]
+                    if not stack:
+                        break
+                    action = moves.pop()
+                    parent = stack[-1]
+                    if lowest < parent[4]:
+                        parent[4], parent[5] = lowest, action
+                    continue
+
+                frame[3] = index + 1
+                action, new_state, new_key, child = children[index]
+                new_g = g + 1
+                f = new_g + child[2]
+                if new_key in on_path or (child[0] == iteration and child[1] <= new_g):
+                    # a cycle or a duplicate: no path through it ends within this
+                    # bound, and it is searched (or cut) where it was first reached
+                    f = max(f, bound + 1)
+                elif f <= bound:
+                    child[0], child[1] = iteration, new_g
+                    moves.append(action)
+                    state, key, entry, g = new_state, new_key, child, new_g
+                    continue
+                elif f < float('inf'):
+                    if child[4] == -1:
+                        outside = min(outside, f)
+                    elif child[4] != iteration:
+                        child[4], child[5], child[6] = iteration, new_g, f
+                    else:
+                        child[5], child[6] = min(child[5], new_g), min(child[6], f)
+                if f < frame[4]:
+                    frame[4], frame[5] = f, action
+
+            bound = min([outside] + [entry[6] for entry in table.values() if entry[4] == iteration])
+
+        return monitor.finish(self._results(path, start_time, generated_states_count,
+                                            discovered_states_count, deadlock.pruned,
+                                            iterations=iteration, table_size=len(table)))
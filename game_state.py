@@ -1,10 +1,65 @@
-from dataclasses import dataclass
-from typing import Tuple
+import hashlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+EMPTY_CELL = ' '
+LAVA_CELL = 'L'
+WATER_CELL = 'W'
+COIN_CELL = 'C'
+
+@lru_cache(maxsize=None)
+def zobrist_key(*parts) -> int:
+    # Derived from the key itself (not from a seeded RNG), so every process and
+    # every run agrees on the hash of a state
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def compute_zobrist(board, player_pos) -> int:
+    h = zobrist_key('@', *player_pos)
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell != EMPTY_CELL:
+                h ^= zobrist_key(r, c, cell)
+    return h
+
+def count_cells(board) -> Tuple[int, int, int, int]:
+    # (lava, water, coins, counters) on a board, in one pass over its rows
+    lava = water = coins = counters = 0
+    for row in board:
+        lava += row.count(LAVA_CELL)
+        water += row.count(WATER_CELL)
+        coins += row.count(COIN_CELL)
+        counters += sum(1 for cell in row if cell.isdigit())
+    return lava, water, coins, counters
 
 @dataclass(frozen=True)
 class GameState:
     board: Tuple[Tuple[str, ...], ...]
     player_pos: Tuple[int, int]
+    # 64-bit Zobrist hash of board + player; apply_transition passes it in
+    # already updated, otherwise it is computed here from scratch
+    zobrist: Optional[int] = field(default=None, compare=False, repr=False)
+    # Cells game_logic still has to visit each move: fluid cells that may
+    # spread and numbered cells still counting down. None until derived.
+    lava_frontier: Optional[FrozenSet[Tuple[int, int]]] = field(default=None, compare=False, repr=False)
+    water_frontier: Optional[FrozenSet[Tuple[int, int]]] = field(default=None, compare=False, repr=False)
+    counter_cells: Optional[Tuple[Tuple[int, int], ...]] = field(default=None, compare=False, repr=False)
+    # Number of LAVA, WATER and COIN cells and of counters still counting down.
+    # apply_transition passes them in, updated from the cells it changed, so
+    # costs and goal tests read them in O(1); otherwise they are counted here.
+    lava_count: Optional[int] = field(default=None, compare=False, repr=False)
+    water_count: Optional[int] = field(default=None, compare=False, repr=False)
+    coin_count: Optional[int] = field(default=None, compare=False, repr=False)
+    counter_count: Optional[int] = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.zobrist is None:
+            object.__setattr__(self, 'zobrist', compute_zobrist(self.board, self.player_pos))
+        if None in (self.lava_count, self.water_count, self.coin_count, self.counter_count):
+            counts = count_cells(self.board)
+            for name, count in zip(('lava_count', 'water_count', 'coin_count', 'counter_count'), counts):
+                object.__setattr__(self, name, count)
 
     def __hash__(self):
-        return hash((self.board, self.player_pos))
\ No newline at end of file
+        return self.zobrist
@@ -0,0 +1,39 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# small enough for every solver to finish in well under a second
+SMALL_LEVELS = ['level1.txt', 'level2.txt', 'level3.txt', 'level4.txt', 'level5.txt',
+                'level15v1.txt', 'level15v2.txt']
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # levels and assets are opened by relative path
+    monkeypatch.chdir(ROOT)
+    return ROOT
+
+
+@pytest.fixture(scope='session')
+def shortest():
+    # level -> BFS path length on game_logic, the reference every optimal solver must match
+    from game_logic import parse_level_file
+    from game_solver import BFSSolver
+    lengths = {}
+    for level in SMALL_LEVELS:
+        path = BFSSolver().solve(parse_level_file(os.path.join(ROOT, level)))["path"]
+        lengths[level] = None if path is None else len(path)
+    return lengths
+
+
+def board_state(*rows):
+    # A GameState from rows written like a level file ('@' marks the player)
+    from game_state import GameState
+    board = [row.split(',') for row in rows]
+    r = next(r for r, row in enumerate(board) if '@' in row)
+    c = board[r].index('@')
+    board[r][c] = ' '
+    return GameState(board=tuple(tuple(row) for row in board), player_pos=(r, c))
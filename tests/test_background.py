@@ -0,0 +1,53 @@
+import time
+import game_logic
+from game_background import SolverRace
+
+
+def wait_for(race, seconds=60):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        results = race.poll()
+        if results is not None:
+            return results
+        time.sleep(0.02)
+    raise AssertionError("no result from the race")
+
+
+def test_first_solution_wins_and_stops_the_rest():
+    race = SolverRace(progress_interval=0.05)
+    easy = game_logic.parse_level_file('level1.txt')
+    hard = game_logic.parse_level_file('level14.txt')
+    assert race.start('bfs', hard)
+    assert race.start('astar', easy)
+    assert not race.start('astar', easy)        # already racing
+    processes = [process for _, process in race.runs.values()]
+    results = wait_for(race)
+    assert results["solver_name"] == "A*"
+    assert len(results["path"]) == 12
+    assert not race.running
+    assert not any(process.is_alive() for process in processes)
+    assert race.poll() is None
+
+
+def test_cancel_stops_every_solver():
+    race = SolverRace(progress_interval=0.05)
+    hard = game_logic.parse_level_file('level14.txt')
+    race.start('bfs', hard)
+    race.start('ucs', hard)
+    processes = [process for _, process in race.runs.values()]
+    time.sleep(0.5)
+    race.poll()
+    race.cancel()
+    assert not race.running
+    assert race.progress == {}
+    assert not any(process.is_alive() for process in processes)
+    assert race.poll() is None
+
+
+def test_results_without_a_path_come_back_once_all_gave_up():
+    race = SolverRace()
+    race.start('bfs', game_logic.parse_level_file('level12.txt'))
+    results = wait_for(race)
+    assert results["path"] is None and results["solver_name"] == "BFS"
+    assert "error" not in results
+    assert not race.running
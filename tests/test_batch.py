@@ -0,0 +1,47 @@
+import random
+import pytest
+import game_logic
+from game_solver import BFSSolver
+from conftest import SMALL_LEVELS
+
+pytest.importorskip('numpy')
+import game_batch
+
+# ice, meshes, counters and coins between them
+MIXED_LEVELS = ['level10.txt', 'level11.txt', 'level12.txt', 'level14.txt', 'level15.txt',
+                'level16.txt']
+ACTIONS = [action for action, _ in game_batch.DIRECTIONS]
+
+
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_batch_bfs_matches_bfs(level):
+    state = game_logic.parse_level_file(level)
+    expected = BFSSolver(deadlock_checks=()).solve(state)
+    results = game_batch.BatchBFSSolver().solve(state)
+    assert results["path"] == expected["path"]
+    # small batches split the layers without changing the order
+    assert game_batch.BatchBFSSolver(batch_size=64).solve(state)["path"] == expected["path"]
+
+
+@pytest.mark.parametrize('level', MIXED_LEVELS)
+def test_batch_moves_match_apply_transition(level):
+    rng = random.Random(level)
+    start = game_logic.parse_level_file(level)
+    for _ in range(6):
+        state = start
+        for _ in range(50):
+            boards, prow, pcol = game_batch.encode_states([state])
+            moves = game_logic.get_available_transitions(state)
+            legal = game_batch.available_moves(boards, prow, pcol)[0]
+            assert [action for action, ok in zip(ACTIONS, legal) if ok] == moves
+            for d, action in enumerate(ACTIONS):
+                if action not in moves:
+                    continue
+                succ, nr, nc = game_batch.apply_direction(boards, prow, pcol, d)
+                expected = game_logic.apply_transition(state, action)
+                got = game_batch.decode_state(succ[0], int(nr[0]), int(nc[0]))
+                assert got.board == expected.board
+                assert got.player_pos == expected.player_pos
+            if game_logic.is_terminal(state) or not moves:
+                break
+            state = game_logic.apply_transition(state, rng.choice(moves))
@@ -0,0 +1,50 @@
+import json
+from game_bench import compare, main
+
+BASELINE = {
+    'bfs.level1.txt': {'status': 'solved', 'wall_time': 1.0, 'nodes_per_sec': 1000.0,
+                       'peak_memory_kb': 20000, 'path_length': 12},
+    'bitboard.apply_transition': {'ops_per_sec': 50000.0},
+}
+
+
+def changed(key, **values):
+    current = json.loads(json.dumps(BASELINE))
+    current[key].update(values)
+    return current
+
+
+def test_compare_flags_slowdowns_past_the_threshold():
+    assert compare(BASELINE, BASELINE, 0.2) == []
+    # 25% slower, or 25% fewer operations per second
+    slower = compare(changed('bfs.level1.txt', wall_time=1.25), BASELINE, 0.2)
+    assert len(slower) == 1 and 'wall_time' in slower[0] and '+25%' in slower[0]
+    fewer = compare(changed('bitboard.apply_transition', ops_per_sec=37500.0), BASELINE, 0.2)
+    assert len(fewer) == 1 and 'ops_per_sec' in fewer[0]
+    # within the threshold, or faster
+    assert compare(changed('bfs.level1.txt', wall_time=1.15), BASELINE, 0.2) == []
+    assert compare(changed('bfs.level1.txt', wall_time=0.5, nodes_per_sec=4000.0), BASELINE, 0.2) == []
+
+
+def test_compare_flags_path_and_status_changes():
+    longer = compare(changed('bfs.level1.txt', path_length=14), BASELINE, 0.2)
+    assert longer == ['bfs.level1.txt: path length 12 -> 14']
+    lost = compare({'bfs.level1.txt': {'status': 'timeout'}}, BASELINE, 0.2)
+    assert lost == ['bfs.level1.txt: was solved, now timeout']
+    # keys only in one of the two are not compared
+    assert compare({}, BASELINE, 0.2) == []
+
+
+def test_main_saves_and_checks_a_baseline(tmp_path):
+    baseline = str(tmp_path / 'baseline.json')
+    args = ['--skip-micro', '--solvers', 'bfs', '--levels', 'level1.txt', '--baseline', baseline]
+    assert main(args + ['--save-baseline']) == 0
+    with open(baseline) as f:
+        saved = json.load(f)
+    assert saved['bfs.level1.txt']['path_length'] == 12
+    # timings on a shared machine vary, so only a changed path must fail here
+    assert main(args + ['--threshold', '100']) == 0
+    saved['bfs.level1.txt']['path_length'] = 11
+    with open(baseline, 'w') as f:
+        json.dump(saved, f)
+    assert main(args + ['--threshold', '100']) == 1
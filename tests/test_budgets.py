@@ -0,0 +1,51 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_cli import SOLVERS, make_solver
+from game_solver import AnytimeAStarSolver
+from conftest import SMALL_LEVELS
+
+SOLVER_NAMES = sorted(SOLVERS) + ['batch-bfs', 'hdastar', 'external-bfs']
+
+
+def wins(state, path):
+    for action in path:
+        state = game_logic.apply_transition(state, action)
+    return game_logic.is_goal(state)
+
+
+@pytest.mark.parametrize('name', SOLVER_NAMES)
+def test_tiny_time_limit_stops_the_search(name):
+    if name == 'batch-bfs':
+        pytest.importorskip('numpy')
+    state = game_logic.parse_level_file('level3.txt')
+    results = make_solver(name, time_limit=1e-6).solve(state)
+    assert results["budget_exhausted"] == 'time'
+    # nothing, or the best path found before the budget ran out
+    assert results["path"] is None or wins(state, results["path"])
+
+
+def test_goal_state_is_returned_whatever_the_budget():
+    state = game_logic.parse_level_file('level1.txt')
+    path = make_solver('bfs').solve(state)["path"]
+    for action in path:
+        state = game_logic.apply_transition(state, action)
+    for name in SOLVER_NAMES:
+        if name == 'batch-bfs':
+            continue
+        results = make_solver(name, time_limit=1e-6).solve(state)
+        assert results["path"] == []
+
+
+@pytest.mark.parametrize('engine', [game_logic, game_bitboard], ids=lambda e: e.__name__)
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_anytime_ends_optimal(level, engine, shortest):
+    state = game_logic.parse_level_file(level)
+    results = AnytimeAStarSolver(engine=engine).solve(state)
+    assert results["optimal"] is True
+    assert results["budget_exhausted"] is None
+    assert len(results["path"]) == shortest[level]
+    assert wins(state, results["path"])
+    lengths = [solution["path_length"] for solution in results["solutions"]]
+    assert lengths and lengths == sorted(lengths, reverse=True)
+    assert lengths[-1] == shortest[level]
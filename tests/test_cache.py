@@ -0,0 +1,73 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_cache import SolutionCache
+from game_solver import AStarSolver, BFSSolver
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'solutions.sqlite'))
+    yield cache
+    cache.close()
+
+
+def play(state, moves):
+    for action in moves:
+        state = game_logic.apply_transition(state, action)
+    return state
+
+
+def test_rest_of_the_path_from_a_state_on_it(cache):
+    start = game_logic.parse_level_file('level3.txt')
+    path = cache.solve(BFSSolver(), start)["path"]
+    assert len(cache) == 1
+    for offset in (0, 5, len(path)):
+        results = cache.get("BFS", play(start, path[:offset]))
+        assert results["cached"] and results["cache_offset"] == offset
+        assert results["path"] == path[offset:]
+    # bitboard states share the keys
+    bitboard = game_bitboard.from_game_state(play(start, path[:7]))
+    assert cache.get("BFS", bitboard)["path"] == path[7:]
+    # a state off the path is not known
+    assert cache.get("BFS", game_logic.apply_transition(start, 'w')) is None
+
+
+def test_tags_are_kept_apart(cache):
+    start = game_logic.parse_level_file('level2.txt')
+    cache.solve(BFSSolver(), start)
+    assert cache.get("A*", start) is None
+    results = cache.solve(AStarSolver(), start)
+    assert "cached" not in results
+    assert cache.get("A*", start)["cached"]
+    assert len(cache) == 2
+
+
+def test_least_recently_used_solution_goes_with_its_states(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'solutions.sqlite'), max_entries=2)
+    levels = ['level1.txt', 'level2.txt', 'level4.txt']
+    starts = [game_logic.parse_level_file(level) for level in levels]
+    paths = [cache.solve(BFSSolver(), start)["path"] for start in starts[:2]]
+    cache.get("BFS", starts[0])         # level2's solution is now the oldest
+    cache.solve(BFSSolver(), starts[2])
+    assert len(cache) == 2
+    assert cache.get("BFS", starts[1]) is None
+    assert cache.get("BFS", play(starts[1], paths[1][:3])) is None
+    orphans = cache.db.execute("SELECT COUNT(*) FROM states WHERE solution NOT IN "
+                               "(SELECT id FROM solutions)").fetchone()[0]
+    assert orphans == 0
+    assert cache.get("BFS", play(starts[0], paths[0][:3]))["path"] == paths[0][3:]
+    cache.close()
+
+
+def test_cut_short_results_are_not_kept(cache):
+    start = game_logic.parse_level_file('level3.txt')
+    stopped = BFSSolver(time_limit=1e-6).solve(start)
+    assert stopped["budget_exhausted"] == 'time'
+    assert not cache.put("BFS", start, stopped)
+    assert not cache.put("BFS", start, {"path": None, "error": "Traceback ..."})
+    assert len(cache) == 0
+    assert cache.get("BFS", start) is None
+    # a search that ran out of states is an answer, and is kept
+    assert cache.put("BFS", start, {"path": None, "budget_exhausted": None})
+    assert cache.get("BFS", start)["path"] is None
@@ -0,0 +1,23 @@
+from game_cli import run_batch, run_one
+
+
+def test_run_batch_records_every_outcome(tmp_path):
+    missing = str(tmp_path / 'missing.txt')
+    records = list(run_batch(['level1.txt', 'level12.txt', missing], ['bfs'], jobs=2))
+    status = {record["level"]: record["status"] for record in records}
+    assert status == {'level1.txt': 'solved', 'level12.txt': 'no_solution', missing: 'error'}
+    error = next(record for record in records if record["level"] == missing)
+    assert 'missing.txt' in error["error"]
+    solved = next(record for record in records if record["level"] == 'level1.txt')
+    assert solved["path_length"] == len(solved["path"]) == 12
+
+
+def test_run_batch_stops_runs_past_the_timeout():
+    records = list(run_batch(['level14.txt', 'level1.txt'], ['bfs'], jobs=2, timeout=2))
+    status = {record["level"]: record["status"] for record in records}
+    assert status == {'level14.txt': 'timeout', 'level1.txt': 'solved'}
+
+
+def test_run_one_in_process():
+    record = run_one('level2.txt', 'astar', 'logic')
+    assert (record["status"], record["engine"], record["solver"]) == ('solved', 'logic', 'astar')
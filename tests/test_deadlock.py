@@ -0,0 +1,78 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_deadlock import DeadlockDetector, enclosed_by_lava, goal_covered, sealed_off
+from game_solver import BFSSolver
+from conftest import SMALL_LEVELS, board_state
+
+ENGINES = [game_logic, game_bitboard]
+
+
+def verdict(state, check, engine=game_logic):
+    detector = DeadlockDetector(state, engine, (check,))
+    return detector(engine.from_game_state(state) if engine is game_bitboard else state)
+
+
+def solvable(state):
+    return BFSSolver(deadlock_checks=()).solve(state)["path"] is not None
+
+
+@pytest.mark.parametrize('engine', ENGINES, ids=lambda e: e.__name__)
+def test_goal_covered(engine):
+    start = board_state('#,#,#,#,#',
+                        '#,@, ,T,#',
+                        '#,#,#,#,#')
+    assert verdict(start, goal_covered, engine) is None
+    covered = board_state('#,#,#,#,#',
+                          '#,@, ,B,#',
+                          '#,#,#,#,#')
+    detector = DeadlockDetector(start, engine, (goal_covered,))
+    state = engine.from_game_state(covered) if engine is game_bitboard else covered
+    assert detector(state) == 'goal_covered'
+    assert not solvable(covered)
+
+
+@pytest.mark.parametrize('engine', ENGINES, ids=lambda e: e.__name__)
+def test_sealed_off_by_frozen_ice(engine):
+    # walls on three sides and the goal on the fourth: the ice never moves again
+    frozen = board_state('#,#,#,#,#,#',
+                         '#,@, , ,#,#',
+                         '#,#,#,I,T,#',
+                         '#,#,#,#,#,#')
+    assert verdict(frozen, sealed_off, engine) == 'sealed_off'
+    assert not solvable(frozen)
+    # the same ice, with another way round to the goal
+    around = board_state('#,#,#,#,#,#',
+                         '#,@, , , ,#',
+                         '#,#,#,I,T,#',
+                         '#,#,#,#,#,#')
+    assert verdict(around, sealed_off, engine) is None
+    assert solvable(around)
+
+
+@pytest.mark.parametrize('engine', ENGINES, ids=lambda e: e.__name__)
+def test_enclosed_by_lava(engine):
+    trapped = board_state('#,#,#,#,#,#,#',
+                          '#,@, ,L, , ,#',
+                          '#,#,#, , ,T,#',
+                          '#,#,#,#,#,#,#')
+    assert verdict(trapped, enclosed_by_lava, engine) == 'enclosed_by_lava'
+    assert not solvable(trapped)
+    # ice next to the player can be pushed onto the lava and clear the way
+    with_ice = board_state('#,#,#,#,#,#,#',
+                           '#,@,I,L, , ,#',
+                           '#,#,#, , ,T,#',
+                           '#,#,#,#,#,#,#')
+    assert verdict(with_ice, enclosed_by_lava, engine) is None
+    assert solvable(with_ice)
+
+
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_checks_keep_bfs_lengths(level):
+    state = game_logic.parse_level_file(level)
+    unchecked = BFSSolver(engine=game_bitboard, deadlock_checks=()).solve(state)
+    checked = BFSSolver(engine=game_bitboard).solve(state)
+    pruned = BFSSolver(engine=game_bitboard, prune_doomed=True).solve(state)
+    assert len(checked["path"]) == len(unchecked["path"])
+    assert len(pruned["path"]) == len(unchecked["path"])
+    assert checked["generated_states_count"] <= unchecked["generated_states_count"]
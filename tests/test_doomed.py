@@ -0,0 +1,49 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_heuristics import LavaSchedule
+from game_solver import BFSSolver
+from conftest import SMALL_LEVELS, board_state
+
+# the lava closes the only corridor to the goal before the player gets there
+DOOMED = board_state('#,#,#,#,#,#,#,#,#,#',
+                     '#,@, , , , , , , ,#',
+                     '#,#,#,#,#,#,#,#, ,#',
+                     '#,T, , , , ,L, , ,#',
+                     '#,#,#,#,#,#,#,#,#,#')
+# the lava comes for the goal too, one step too late
+IN_TIME = board_state('#,#,#,#,#,#,#',
+                      '#,@, , , ,T,#',
+                      '#,#,#,#,#, ,#',
+                      '#,L, , , , ,#',
+                      '#,#,#,#,#,#,#')
+
+
+def test_lava_schedule_dooms_a_lost_state():
+    schedule = LavaSchedule(DOOMED)
+    assert schedule.is_doomed(DOOMED, 0)
+    assert BFSSolver().solve(DOOMED)["path"] is None
+
+
+def test_lava_schedule_spares_a_state_in_time():
+    schedule = LavaSchedule(IN_TIME)
+    path = BFSSolver().solve(IN_TIME)["path"]
+    assert len(path) == 4
+    state = IN_TIME
+    for step, action in enumerate(path):
+        assert not schedule.is_doomed(state, step)
+        state = game_logic.apply_transition(state, action)
+    # the same cells a few steps later lose the race
+    assert schedule.is_doomed(IN_TIME, 5)
+
+
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_prune_doomed_keeps_bfs_lengths(level, shortest):
+    state = game_logic.parse_level_file(level)
+    pruned = BFSSolver(engine=game_bitboard, prune_doomed=True).solve(state)
+    assert len(pruned["path"]) == shortest[level]
+
+
+def test_prune_doomed_on_hand_built_boards():
+    assert BFSSolver(prune_doomed=True).solve(DOOMED)["path"] is None
+    assert len(BFSSolver(prune_doomed=True).solve(IN_TIME)["path"]) == 4
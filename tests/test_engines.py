@@ -0,0 +1,135 @@
+import glob
+import os
+import random
+import pytest
+import game_logic
+import game_bitboard
+from game_state import compute_zobrist, count_cells
+from conftest import ROOT
+
+LEVELS = sorted(os.path.basename(f) for f in glob.glob(os.path.join(ROOT, 'level*.txt')))
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_bitboard_round_trip(level):
+    state = game_logic.parse_level_file(level)
+    back = game_bitboard.to_game_state(game_bitboard.from_game_state(state))
+    assert back.board == state.board
+    assert back.player_pos == state.player_pos
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_engines_agree_on_random_walks(level):
+    rng = random.Random(level)
+    start = game_logic.parse_level_file(level)
+    for _ in range(5):
+        state, bitboard = start, game_bitboard.from_game_state(start)
+        for _ in range(60):
+            assert game_bitboard.to_game_state(bitboard).board == state.board
+            assert bitboard.player_pos == state.player_pos
+            assert game_bitboard.is_terminal(bitboard) == game_logic.is_terminal(state)
+            assert game_bitboard.is_goal(bitboard) == game_logic.is_goal(state)
+            moves = game_logic.get_available_transitions(state)
+            assert game_bitboard.get_available_transitions(bitboard) == moves
+            if game_logic.is_terminal(state) or not moves:
+                break
+            for action in moves:
+                assert (game_bitboard.would_cause_immediate_death(bitboard, action)
+                        == game_logic.would_cause_immediate_death(state, action))
+            action = rng.choice(moves)
+            state = game_logic.apply_transition(state, action)
+            bitboard = game_bitboard.apply_transition(bitboard, action)
+
+
+
+def random_walk(state, rng, steps=60):
+    # Random legal moves on game_logic until the game ends or steps run out
+    states = [state]
+    for _ in range(steps):
+        if game_logic.is_terminal(state):
+            break
+        moves = game_logic.get_available_transitions(state)
+        if not moves:
+            break
+        state = game_logic.apply_transition(state, rng.choice(moves))
+        states.append(state)
+    return states
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_incremental_ids_match_a_full_hash(level):
+    rng = random.Random(level)
+    start = game_logic.parse_level_file(level)
+    for _ in range(5):
+        bitboard = game_bitboard.from_game_state(start)
+        for state in random_walk(start, rng)[1:]:
+            assert game_logic.state_id(state) == compute_zobrist(state.board, state.player_pos)
+        state = start
+        for _ in range(60):
+            moves = game_logic.get_available_transitions(state)
+            if game_logic.is_terminal(state) or not moves:
+                break
+            action = rng.choice(moves)
+            state = game_logic.apply_transition(state, action)
+            bitboard = game_bitboard.apply_transition(bitboard, action)
+            fresh = game_bitboard.from_game_state(game_bitboard.to_game_state(bitboard))
+            assert game_bitboard.state_id(bitboard) == game_bitboard.state_id(fresh)
+
+
+def assert_expand_matches(engine, state, board_of):
+    expanded = engine.expand(state)
+    assert [action for action, *_ in expanded] == engine.get_available_transitions(state)
+    for action, successor, won, dead in expanded:
+        applied = engine.apply_transition(state, action)
+        assert won == engine.is_goal(applied)
+        assert dead == (engine.is_terminal(applied) and not engine.is_goal(applied))
+        if successor is None:
+            # only a step onto lava skips building the successor
+            assert dead
+            continue
+        assert board_of(successor) == board_of(applied)
+        assert successor.player_pos == applied.player_pos
+        assert engine.state_id(successor) == engine.state_id(applied)
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_expand_matches_apply_transition(level):
+    rng = random.Random(level)
+    start = game_logic.parse_level_file(level)
+    for _ in range(5):
+        for state in random_walk(start, rng):
+            if game_logic.is_terminal(state):
+                break
+            assert_expand_matches(game_logic, state, lambda s: s.board)
+            assert_expand_matches(game_bitboard, game_bitboard.from_game_state(state),
+                                  lambda s: game_bitboard.to_game_state(s).board)
+
+
+def counts(state):
+    return state.lava_count, state.water_count, state.coin_count, state.counter_count
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_counts_follow_every_move(level):
+    # the counts carried from state to state must equal a recount of the
+    # board, and survive pack_state / unpack_state on both engines
+    rng = random.Random(level)
+    start = game_logic.parse_level_file(level)
+    start_bitboard = game_bitboard.from_game_state(start)
+    for _ in range(5):
+        bitboard = start_bitboard
+        state = start
+        for _ in range(60):
+            assert counts(state) == count_cells(state.board)
+            assert counts(bitboard) == counts(state)
+            unpacked = game_logic.unpack_state(game_logic.pack_state(state), start)
+            assert unpacked.board == state.board and counts(unpacked) == counts(state)
+            unpacked = game_bitboard.unpack_state(game_bitboard.pack_state(bitboard), start_bitboard)
+            assert game_bitboard.state_id(unpacked) == game_bitboard.state_id(bitboard)
+            assert counts(unpacked) == counts(bitboard)
+            moves = game_logic.get_available_transitions(state)
+            if game_logic.is_terminal(state) or not moves:
+                break
+            action = rng.choice(moves)
+            state = game_logic.apply_transition(state, action)
+            bitboard = game_bitboard.apply_transition(bitboard, action)
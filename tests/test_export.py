@@ -0,0 +1,50 @@
+import os
+import pytest
+pygame = pytest.importorskip('pygame')
+import game_logic
+import game_export
+from game_solver import BFSSolver
+
+TILE = 16
+
+
+@pytest.fixture(scope='module', autouse=True)
+def quit_pygame():
+    # SDL's timer thread must not be running when later tests fork workers
+    yield
+    pygame.quit()
+
+
+@pytest.fixture(scope='module')
+def solved():
+    state = game_logic.parse_level_file('level3.txt')
+    return state, BFSSolver().solve(state)["path"]
+
+
+def test_frames_for_part_of_a_path(solved, tmp_path):
+    state, path = solved
+    moves = path[:6]
+    count = game_export.export(state, moves, str(tmp_path), tile_size=TILE)
+    assert count == len(moves) + 1
+    assert sorted(os.listdir(tmp_path)) == [f'frame_{i:04d}.png' for i in range(count)]
+    rows, cols = len(state.board), len(state.board[0])
+    frame = pygame.image.load(str(tmp_path / 'frame_0000.png'))
+    assert frame.get_size() == (cols * TILE, rows * TILE + 60)
+
+
+def test_solution_ends_on_the_end_screen(solved, tmp_path):
+    state, path = solved
+    # one frame per state, then the end screen
+    assert game_export.export(state, path, str(tmp_path), tile_size=TILE) == len(path) + 2
+    # moves that are not available are skipped, as the app skips them
+    assert len(game_export.trajectory(state, ['x'] + path)[1]) == len(path)
+
+
+def test_sprite_sheet_size(solved, tmp_path):
+    state, path = solved
+    out = str(tmp_path / 'sheet.png')
+    count = game_export.export(state, path[:12], out, tile_size=TILE, sheet=True, columns=5)
+    assert count == 13
+    rows, cols = len(state.board), len(state.board[0])
+    sheet = pygame.image.load(out)
+    assert sheet.get_size() == (5 * cols * TILE, 3 * (rows * TILE + 60))
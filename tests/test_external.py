@@ -0,0 +1,42 @@
+import os
+from collections import Counter
+import pytest
+import game_logic
+import game_bitboard
+from game_external import ExternalBFSSolver
+from conftest import SMALL_LEVELS
+
+
+def counting_spills(solver):
+    # depth -> runs spilled for it
+    runs = Counter()
+    spill = solver._spill
+
+    def counted(directory, depth, number, buffer):
+        runs[depth] += 1
+        return spill(directory, depth, number, buffer)
+
+    solver._spill = counted
+    return runs
+
+
+@pytest.mark.parametrize('engine', [game_logic, game_bitboard], ids=lambda e: e.__name__)
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_external_bfs_with_small_runs(level, engine, shortest, tmp_path):
+    state = game_logic.parse_level_file(level)
+    solver = ExternalBFSSolver(engine=engine, workdir=str(tmp_path), chunk_size=7)
+    runs = counting_spills(solver)
+    results = solver.solve(state)
+    assert len(results["path"]) == shortest[level]
+    if shortest[level] > 3:
+        assert max(runs.values()) > 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_external_bfs_cleans_up_after_a_budget_stop(tmp_path):
+    state = game_logic.parse_level_file('level3.txt')
+    solver = ExternalBFSSolver(workdir=str(tmp_path), chunk_size=7, time_limit=1e-6)
+    results = solver.solve(state)
+    assert results["budget_exhausted"] == 'time'
+    assert results["path"] is None
+    assert os.listdir(tmp_path) == []
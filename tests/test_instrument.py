@@ -0,0 +1,48 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_instrument import Instrumentation
+from game_solver import AStarSolver, BFSSolver
+
+
+def solve(solver_class, instrumentation, level='level3.txt'):
+    state = game_logic.parse_level_file(level)
+    return solver_class(engine=game_bitboard, instrumentation=instrumentation).solve(state)
+
+
+def test_progress_snapshots():
+    snapshots = []
+    results = solve(BFSSolver, Instrumentation(progress=snapshots.append, interval=0))
+    assert snapshots
+    assert {snapshot["solver"] for snapshot in snapshots} == {"BFS"}
+    expanded = [snapshot["expanded"] for snapshot in snapshots]
+    assert expanded == sorted(expanded)
+    assert expanded[-1] <= results["discovered_states_count"]
+    for snapshot in snapshots:
+        assert snapshot["generated"] >= snapshot["expanded"]
+        assert snapshot["elapsed"] >= 0 and snapshot["nodes_per_sec"] >= 0
+    # a long interval reports nothing on a short search
+    quiet = []
+    solve(BFSSolver, Instrumentation(progress=quiet.append, interval=3600))
+    assert quiet == []
+
+
+def test_timings_per_primitive():
+    results = solve(AStarSolver, Instrumentation(timing=True))
+    timings = results["timings"]
+    assert {'hashing', 'heuristic', 'goal_test'} <= set(timings)
+    assert all(seconds >= 0 for seconds in timings.values())
+    assert sum(timings.values()) <= results["execution_time"]
+    assert "timings" not in solve(AStarSolver, None)
+
+
+@pytest.mark.parametrize('mode, marker', [('cprofile', 'cumulative'), ('tracemalloc', 'traced peak')])
+def test_profile_report(mode, marker):
+    results = solve(AStarSolver, Instrumentation(profile=mode), 'level2.txt')
+    assert marker in results["profile"]
+    assert results["path"] is not None
+
+
+def test_unknown_profile_mode():
+    with pytest.raises(ValueError):
+        Instrumentation(profile='perf')
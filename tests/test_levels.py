@@ -0,0 +1,117 @@
+import os
+import shutil
+import pytest
+import game_logic
+import game_bitboard
+import game_levels
+from game_heuristics import distance_map, static_obstacles
+from conftest import SMALL_LEVELS
+
+LEVELS = SMALL_LEVELS + ['level10.txt', 'level14.txt']
+
+
+@pytest.fixture
+def levels(tmp_path):
+    # copies, so compiled files land in tmp_path rather than next to the repo's levels
+    copies = []
+    for level in LEVELS:
+        shutil.copy(level, tmp_path / level)
+        copies.append(str(tmp_path / level))
+    return copies
+
+
+def assert_same_level(compiled, level_file):
+    parsed = game_logic.parse_level_file(level_file)
+    state = compiled.game_state()
+    assert state.board == parsed.board
+    assert state.player_pos == parsed.player_pos
+    assert game_logic.state_id(state) == game_logic.state_id(parsed)
+    assert (state.lava_count, state.coin_count) == (parsed.lava_count, parsed.coin_count)
+    bitboard = compiled.bitboard_state()
+    assert game_bitboard.to_game_state(bitboard).board == parsed.board
+    assert game_bitboard.state_id(bitboard) == game_bitboard.state_id(game_bitboard.from_game_state(parsed))
+    rows, cols = len(parsed.board), len(parsed.board[0])
+    assert compiled.goal_distances() == distance_map(rows, cols, static_obstacles(parsed),
+                                                     game_logic.get_goal_pos(parsed))
+
+
+def test_compiled_levels_match_the_text(levels):
+    for level_file in levels:
+        assert_same_level(game_levels.open_level(level_file), level_file)
+        assert os.path.exists(game_levels.compiled_path(level_file))
+        # the second open maps the cached file
+        assert_same_level(game_levels.open_level(level_file), level_file)
+
+
+def test_stale_compiled_level_is_rebuilt(levels):
+    level_file, other = levels[0], levels[2]
+    game_levels.open_level(level_file)
+    shutil.copy(other, level_file)
+    assert_same_level(game_levels.open_level(level_file), other)
+
+
+@pytest.mark.parametrize('size', [0, 10, 48, 200, -1])
+def test_damaged_compiled_level_is_rebuilt(levels, size):
+    level_file = levels[2]
+    cached = game_levels.compiled_path(level_file)
+    game_levels.open_level(level_file)
+    with open(cached, 'rb') as f:
+        blob = f.read()
+    with open(cached, 'wb') as f:
+        f.write(blob[:size])
+    assert_same_level(game_levels.open_level(level_file), level_file)
+    with open(cached, 'rb') as f:
+        assert f.read() == blob
+
+
+def test_pack_round_trip(levels, tmp_path):
+    pack_file = str(tmp_path / 'levels.lvp')
+    game_levels.build_pack(levels, pack_file)
+    pack = game_levels.load_pack(pack_file, verify=True)
+    assert sorted(pack) == sorted(levels)
+    for level_file in levels:
+        assert_same_level(pack[level_file], level_file)
+
+    # levels come from the pack even once their text is gone
+    os.remove(levels[0])
+    state = game_levels.load_level(levels[0], pack=pack)
+    assert state.board == pack[levels[0]].game_state().board
+    with pytest.raises(ValueError):
+        game_levels.load_pack(pack_file, verify=True)
+
+
+def test_load_level_matches_both_engines(levels):
+    for level_file in levels:
+        level, state = game_levels.load_level(level_file, game_bitboard)
+        assert state.level is level
+        parsed = game_logic.parse_level_file(level_file)
+        assert game_bitboard.to_game_state(state).board == parsed.board
+        assert game_levels.load_level(level_file).board == parsed.board
+
+
+def test_mesh_cells_round_trip(tmp_path):
+    # ML and MW are the two-character cells; counters keep their number
+    level_file = str(tmp_path / 'mesh.txt')
+    with open(level_file, 'w') as f:
+        f.write('\n'.join(['#,#,#,#,#,#,#',
+                           '#,@, ,ML,M,MW,#',
+                           '#,L,I,C,12,W,#',
+                           '#, ,B, , ,T,#',
+                           '#,#,#,#,#,#,#']) + '\n')
+    assert_same_level(game_levels.open_level(level_file), level_file)
+    assert_same_level(game_levels.open_level(level_file), level_file)
+    pack_file = str(tmp_path / 'mesh.lvp')
+    game_levels.build_pack([level_file], pack_file)
+    assert_same_level(game_levels.load_pack(pack_file)[level_file], level_file)
+
+
+def test_old_compiled_version_is_rebuilt(levels):
+    level_file = levels[0]
+    cached = game_levels.compiled_path(level_file)
+    game_levels.open_level(level_file)
+    with open(cached, 'r+b') as f:
+        f.seek(4)
+        f.write((game_levels.VERSION - 1).to_bytes(2, 'little'))
+    assert_same_level(game_levels.open_level(level_file), level_file)
+    with open(cached, 'rb') as f:
+        assert int.from_bytes(f.read()[4:6], 'little') == game_levels.VERSION
@@ -0,0 +1,24 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_parallel import HDAStarSolver
+from conftest import SMALL_LEVELS
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_hdastar_matches_bfs(level, workers, shortest):
+    state = game_logic.parse_level_file(level)
+    results = HDAStarSolver(engine=game_bitboard, workers=workers).solve(state)
+    assert results["workers"] == workers
+    assert len(results["path"]) == shortest[level]
+    for action in results["path"]:
+        state = game_logic.apply_transition(state, action)
+    assert game_logic.is_goal(state)
+
+
+def test_hdastar_ends_without_a_solution():
+    state = game_logic.parse_level_file('level12.txt')
+    results = HDAStarSolver(engine=game_bitboard, workers=2).solve(state)
+    assert results["path"] is None
+    assert results["budget_exhausted"] is None
@@ -0,0 +1,59 @@
+import os
+import pytest
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+import game_logic
+import game_bitboard
+from game_renderer import gameRenderer
+from game_solver import AStarSolver
+
+TILE = 24
+
+
+@pytest.fixture(scope='module', autouse=True)
+def quit_pygame():
+    # SDL's timer thread must not be running when later tests fork workers
+    yield
+    pygame.quit()
+
+
+def frame(renderer, draw, dirty):
+    # The screen after draw() in one mode; both modes share the renderer, so a
+    # dirty frame is drawn over the full frame before it
+    renderer.dirty_rects = dirty
+    draw()
+    return pygame.image.tostring(renderer.screen, 'RGB')
+
+
+# counters, coins, ice and meshes between them
+@pytest.mark.parametrize('level', ['level15v1.txt', 'level7.txt', 'level16.txt'])
+def test_dirty_frames_match_full_redraws(level):
+    start = game_logic.parse_level_file(level)
+    path = AStarSolver(engine=game_bitboard).solve(start)["path"]
+    states = [start]
+    for action in path:
+        states.append(game_logic.apply_transition(states[-1], action))
+    rows, cols = len(start.board), len(start.board[0])
+    renderer = gameRenderer(cols * TILE, rows * TILE + 60, TILE, dirty_rects=True)
+
+    coords = set()
+    for index, state in enumerate(states):
+        if index == len(states) // 2:
+            # a path shown halfway through, as a hint or solver result would be
+            coords = {s.player_pos for s in states}
+
+        def draw():
+            renderer.render(state, index, game_logic.get_available_transitions(state), coords,
+                            path[:index], status="A*")
+
+        assert frame(renderer, draw, True) == frame(renderer, draw, False)
+
+    def end():
+        renderer.show_end_screen(states[-1], len(path), True)
+
+    assert frame(renderer, end, True) == frame(renderer, end, False)
+    # a restart after the end screen repaints all of it
+    restart = lambda: renderer.render(start, 0, game_logic.get_available_transitions(start))
+    renderer.dirty_rects = True
+    end()
+    assert frame(renderer, restart, True) == frame(renderer, restart, False)
@@ -0,0 +1,70 @@
+import random
+import pytest
+import game_logic
+from game_replan import ReplanningSolver
+from game_solver import AStarSolver
+
+
+def play(state, moves):
+    for action in moves:
+        state = game_logic.apply_transition(state, action)
+    return state
+
+
+@pytest.mark.parametrize('level_state', [False, True], ids=['without_level_state', 'with_level_state'])
+def test_hint_restart_hint(level_state):
+    # On level4 lava meets water and turns to blocks: a heuristic built from
+    # the later state walls off cells the start state can still walk
+    start = game_logic.parse_level_file('level4.txt')
+    optimal = len(AStarSolver().solve(start)["path"])
+    later = play(start, 'ddaddwddwww')
+    replanner = ReplanningSolver(level_state=start if level_state else None)
+    assert replanner.solve(later)["path"] is not None
+    results = replanner.solve(start)
+    assert results["path"] is not None
+    assert len(results["path"]) == optimal
+
+
+def test_hints_after_random_detours():
+    rng = random.Random(4)
+    start = game_logic.parse_level_file('level4.txt')
+    optimal = len(AStarSolver().solve(start)["path"])
+    for _ in range(12):
+        state = start
+        for _ in range(rng.randint(3, 12)):
+            moves = [a for a in game_logic.get_available_transitions(state)
+                     if not game_logic.is_terminal(game_logic.apply_transition(state, a))]
+            if not moves:
+                break
+            state = game_logic.apply_transition(state, rng.choice(moves))
+        replanner = ReplanningSolver()
+        replanner.solve(state)
+        assert len(replanner.solve(start)["path"]) == optimal
+
+
+def test_repeated_hint_reuses_the_path():
+    start = game_logic.parse_level_file('level3.txt')
+    replanner = ReplanningSolver()
+    path = replanner.solve(start)["path"]
+    results = replanner.solve(play(start, path[:5]))
+    assert results["replan"] == 'suffix'
+    assert results["path"] == path[5:]
+
+
+def test_tables_stay_packed_and_bounded():
+    start = game_logic.parse_level_file('level4.txt')
+    optimal = len(AStarSolver().solve(start)["path"])
+    replanner = ReplanningSolver(max_table=40)
+    path = replanner.solve(start)["path"]
+    assert len(path) == optimal
+    assert all(isinstance(packed, bytes)
+               for children in replanner.table.values() for _, packed, _, _ in children)
+    for cut in range(1, len(path), 3):
+        state = play(start, path[:cut])
+        detours = [a for a in game_logic.get_available_transitions(state) if a != path[cut]
+                   and not game_logic.is_terminal(game_logic.apply_transition(state, a))]
+        if detours:
+            replanner.solve(game_logic.apply_transition(state, detours[0]))
+        assert len(replanner.table) <= 40
+        assert len(replanner.known) <= 40
+    assert len(replanner.solve(start)["path"]) == optimal
@@ -0,0 +1,91 @@
+import random
+import shutil
+import pytest
+import game_logic
+import game_replay
+from game_solver import AStarSolver
+
+
+@pytest.fixture
+def solved(tmp_path):
+    # (level copy, shortest path) pairs; verification compiles the copies in tmp_path
+    pairs = []
+    for level in ('level1.txt', 'level3.txt', 'level5.txt'):
+        shutil.copy(level, tmp_path / level)
+        path = AStarSolver().solve(game_logic.parse_level_file(level))["path"]
+        pairs.append((str(tmp_path / level), ''.join(path)))
+    return pairs
+
+
+def fatal_moves(state, limit=8):
+    # Some moves that end the game without winning, found breadth first
+    layer = [(state, '')]
+    for _ in range(limit):
+        next_layer = []
+        for current, moves in layer:
+            for action in game_logic.get_available_transitions(current):
+                new_state = game_logic.apply_transition(current, action)
+                if game_logic.is_terminal(new_state):
+                    if not game_logic.is_goal(new_state):
+                        return moves + action
+                else:
+                    next_layer.append((new_state, moves + action))
+        layer = next_layer
+    raise AssertionError("no fatal move found")
+
+
+def test_moves_round_trip():
+    rng = random.Random(22)
+    for count in list(range(10)) + [257, 1000]:
+        moves = ''.join(rng.choice('wsad') for _ in range(count))
+        data = game_replay.pack_moves(moves)
+        assert len(data) == (count + 3) // 4
+        assert game_replay.unpack_moves(data, count) == moves
+
+
+def test_replay_file_round_trip(solved, tmp_path):
+    replays = str(tmp_path / 'solutions.lvr')
+    assert game_replay.write_replays(replays, solved[:2]) == 2
+    assert game_replay.write_replays(replays, solved[2:], append=True) == 1
+    records = game_replay.read_replays(replays)
+    assert [(name, moves) for _, name, moves in records] == solved
+    with open(replays, 'rb') as f:
+        data = f.read()
+    with open(replays, 'wb') as f:
+        f.write(data[:-1])
+    with pytest.raises(ValueError):
+        game_replay.read_replays(replays)
+
+
+def test_verify_replay_errors():
+    state = game_logic.parse_level_file('level3.txt')
+    path = ''.join(AStarSolver().solve(state)["path"])
+    assert game_replay.verify_replay(state, path, game_logic) == (None, None)
+    assert game_replay.verify_replay(state, path[:-1], game_logic) == ('not_goal', len(path) - 1)
+    assert game_replay.verify_replay(state, path + 'w', game_logic) == ('after_end', len(path))
+    fatal = fatal_moves(state)
+    assert game_replay.verify_replay(state, fatal, game_logic) == ('fatal', len(fatal) - 1)
+    # the first blocked move along the path
+    for step in range(len(path)):
+        available = game_logic.get_available_transitions(state)
+        blocked = [action for action in 'wsad' if action not in available]
+        if blocked:
+            break
+        state = game_logic.apply_transition(state, path[step])
+    start = game_logic.parse_level_file('level3.txt')
+    assert game_replay.verify_replay(start, path[:step] + blocked[0], game_logic) == ('illegal', step)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_verify_all(solved, tmp_path, jobs):
+    replays = str(tmp_path / 'solutions.lvr')
+    broken = (solved[1][0], solved[1][1][:-1])
+    game_replay.write_replays(replays, solved * 30 + [broken])
+    levels = [level for level, _ in solved]
+    records = game_replay.verify_all(game_replay.read_replays(replays), levels, jobs)
+    assert len(records) == 91
+    assert all(record["ok"] for record in records[:90])
+    assert records[90]["error"] == 'not_goal'
+    # a level missing from the list cannot be matched
+    records = game_replay.verify_all(game_replay.read_replays(replays), levels[1:], jobs)
+    assert {record["error"] for record in records if record["level"] == levels[0]} == {'unknown_level'}
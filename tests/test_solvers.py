@@ -0,0 +1,68 @@
+import pytest
+import game_logic
+import game_bitboard
+from game_solver import AStarSolver, BFSSolver, IDAStarSolver
+from conftest import SMALL_LEVELS
+
+ENGINES = [game_logic, game_bitboard]
+
+
+def wins(state, path):
+    for action in path:
+        assert action in game_logic.get_available_transitions(state)
+        state = game_logic.apply_transition(state, action)
+    return game_logic.is_goal(state)
+
+
+@pytest.mark.parametrize('engine', ENGINES, ids=lambda e: e.__name__)
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_astar_matches_bfs(level, engine, shortest):
+    state = game_logic.parse_level_file(level)
+    results = AStarSolver(engine=engine).solve(state)
+    assert len(results["path"]) == shortest[level]
+    assert wins(state, results["path"])
+
+
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_bfs_engines_agree(level, shortest):
+    state = game_logic.parse_level_file(level)
+    results = BFSSolver(engine=game_bitboard).solve(state)
+    assert len(results["path"]) == shortest[level]
+    assert wins(state, results["path"])
+
+
+@pytest.mark.parametrize('table_size', [200000, 1000])
+@pytest.mark.parametrize('engine', ENGINES, ids=lambda e: e.__name__)
+@pytest.mark.parametrize('level', SMALL_LEVELS)
+def test_idastar_matches_bfs(level, engine, table_size, shortest):
+    # a table too small for the level costs time, never the optimal length
+    state = game_logic.parse_level_file(level)
+    results = IDAStarSolver(engine=engine, table_size=table_size).solve(state)
+    assert len(results["path"]) == shortest[level]
+    assert wins(state, results["path"])
+    assert results["table_size"] <= table_size
+
+
+def test_idastar_stays_within_its_table():
+    solver = IDAStarSolver(engine=game_bitboard, table_size=300)
+    detectors = []
+    make_detector = solver.deadlock_detector
+    solver.deadlock_detector = lambda state, size: detectors.append(make_detector(state, size)) or detectors[-1]
+    results = solver.solve(game_logic.parse_level_file('level3.txt'))
+    assert len(results["path"]) == 39
+    assert len(detectors[0]._regions) <= 300
+
+
+def test_idastar_ends_without_a_solution():
+    # level12 cannot be won; A* runs out of states, IDA* must notice too
+    results = IDAStarSolver(engine=game_bitboard).solve(game_logic.parse_level_file('level12.txt'))
+    assert results["path"] is None
+    assert results["budget_exhausted"] is None
+
+
+def test_idastar_ends_without_a_solution_on_a_small_table():
+    # states dropped from the table must not make it give up early or loop forever
+    solver = IDAStarSolver(engine=game_bitboard, table_size=5000)
+    results = solver.solve(game_logic.parse_level_file('level12.txt'))
+    assert results["path"] is None
+    assert results["budget_exhausted"] is None